@@ -1,54 +1,674 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring, IndexModel, UpdateOne, ReplaceOne, ReturnDocument, ASCENDING, DESCENDING, TEXT
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 from contextlib import asynccontextmanager
 import os
+import argparse
+import asyncio
+import contextvars
+import json
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, ValidationError, field_validator
+from typing import List, Optional, Dict, Any, AsyncIterator
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 import uuid
+import hashlib
+import time
+import re
+import heapq
+import threading
+import numpy as np
 from datetime import datetime, timezone, timedelta
-from passlib.context import CryptContext
 import jwt
-import qrcode
 import io
 import base64
-import requests
+import codecs
+import csv
+import math
+import zlib
+import orjson
 
 ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
+
+# Settings
+# All configuration lives on one typed model. Importing this module reads nothing from the
+# environment, opens no connections and skips the rarely used heavy dependencies (qrcode and
+# PIL, httpx for the LLM client, passlib and bcrypt), which load on first use instead.
+# create_app(settings) builds the services below from a Settings; `uvicorn server:app` gets
+# one built from Settings.from_env(). Every field is set by the upper-cased environment
+# variable of the same name, e.g. READ_CACHE_TTL for read_cache_ttl.
+class Settings(BaseModel):
+    # Required to serve requests; checked when the app starts
+    mongo_url: Optional[str] = None
+    db_name: Optional[str] = None
+    cors_origins: List[str] = ["*"]
+    jwt_secret: str = "your-secret-key-change-this"
+    slow_request_seconds: float = 0  # 0 disables the log
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 64
+    password_hash_retry_after: int = 1
+    principal_cache_size: int = 10000
+    principal_cache_ttl: float = 60
+    principal_cache_url: Optional[str] = None
+    qr_cache_size: int = 1024
+    qr_render_workers: int = 2
+    single_flight_enabled: bool = True
+    single_flight_stale_seconds: float = 0.5
+    read_cache_size: int = 10000
+    read_cache_ttl: float = 5
+    fast_json_responses: bool = False
+    gemini_api_key: Optional[str] = None
+    gemini_api_url: str = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
+    llm_timeout_seconds: float = 5
+    llm_max_connections: int = 20
+    llm_circuit_failures: int = 5
+    llm_circuit_reset_seconds: float = 30
+    llm_cache_size: int = 1024
+    llm_cache_ttl: float = 600
+    recommender_refresh_seconds: float = 30
+    club_top_events: int = 5
+    portfolio_cache_size: int = 2048
+    portfolio_cache_ttl: float = 300
+    # None shares principal_cache_url; an empty string keeps portfolios in process
+    portfolio_cache_url: Optional[str] = None
+    live_coalesce_seconds: float = 0.25
+    live_heartbeat_seconds: float = 15
+    live_max_connections: int = 1000
+    live_change_stream: bool = False
+
+    @field_validator("cors_origins", mode="before")
+    @classmethod
+    def split_origins(cls, value: Any) -> Any:
+        return value.split(",") if isinstance(value, str) else value
+
+    @classmethod
+    def from_env(cls, env_file: Optional[Path] = ROOT_DIR / ".env") -> "Settings":
+        """Settings from `env_file` overlaid with the process environment, which wins."""
+        values: Dict[str, Optional[str]] = {}
+        if env_file is not None and env_file.exists():
+            from dotenv import dotenv_values
+            values.update(dotenv_values(env_file))
+        values.update(os.environ)
+        return cls.model_validate({
+            name: values[name.upper()] for name in cls.model_fields if values.get(name.upper()) is not None
+        })
+
+# Replaced by create_app(); the defaults let helpers run without an app
+settings = Settings()
+
+# Metrics
+# Per-worker Prometheus metrics rendered by GET /metrics (scrape each worker). The HTTP
+# middleware times every request by route template; a pymongo command listener times every
+# Mongo command by collection and command name. With SLOW_REQUEST_SECONDS set, requests
+# slower than that are logged together with the Mongo commands they issued.
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    escaped = (
+        str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in values
+    )
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, Any] = {}
+        # Mongo commands are observed from Motor's executor threads
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = METRICS_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            values = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        names = self.labelnames + ("le",)
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{format_labels(names, key + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_bucket{format_labels(names, key + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_sum{format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{format_labels(self.labelnames, key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = METRICS_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+metrics = MetricsRegistry()
+HTTP_REQUESTS = metrics.counter("http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+HTTP_REQUEST_SECONDS = metrics.histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+HTTP_IN_FLIGHT = metrics.gauge("http_requests_in_flight", "HTTP requests being served", ("method",))
+MONGO_COMMAND_SECONDS = metrics.histogram("mongo_command_duration_seconds", "Mongo command latency", ("collection", "command"))
+MONGO_COMMAND_FAILURES = metrics.counter("mongo_command_failures_total", "Failed Mongo commands", ("collection", "command"))
+CACHE_REQUESTS = metrics.counter("cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+PASSWORD_HASH_SECONDS = metrics.histogram(
+    "password_hash_duration_seconds", "bcrypt time per operation, excluding queueing", ("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+PASSWORD_HASH_REJECTED = metrics.counter("password_hash_rejected_total", "Logins and registrations shed with a 503")
+QR_RENDER_SECONDS = metrics.histogram("qr_render_duration_seconds", "QR image render time", ("format",))
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+# Mongo commands issued by the request being served, for the slow-request log
+request_db_calls: contextvars.ContextVar = contextvars.ContextVar("request_db_calls", default=None)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times Mongo commands by collection and command name.
+
+    Motor runs each operation on its executor with a copy of the caller's context, so
+    request_db_calls still points at the issuing request's list in here.
+    """
+
+    def __init__(self):
+        self._started: Dict[tuple, tuple] = {}
+
+    def started(self, event) -> None:
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        self._started[(event.connection_id, event.request_id)] = (
+            event.command_name, collection if isinstance(collection, str) else "", request_db_calls.get()
+        )
+
+    def _finished(self, event, failed: bool) -> None:
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        command, collection, calls = started
+        seconds = event.duration_micros / 1e6
+        MONGO_COMMAND_SECONDS.observe(seconds, collection=collection, command=command)
+        if failed:
+            MONGO_COMMAND_FAILURES.inc(collection=collection, command=command)
+        if calls is not None:
+            calls.append({"command": command, "collection": collection, "ms": round(seconds * 1000, 3), "failed": failed})
+
+    def succeeded(self, event) -> None:
+        self._finished(event, failed=False)
+
+    def failed(self, event) -> None:
+        self._finished(event, failed=True)
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        # The route is only known after routing, so in-flight requests are counted per method
+        method = scope["method"]
+        HTTP_IN_FLIGHT.inc(method=method)
+        calls: List[dict] = []
+        token = request_db_calls.set(calls)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_db_calls.reset(token)
+            HTTP_IN_FLIGHT.dec(method=method)
+            # FastAPI leaves the matched route in the scope; unmatched paths share one label
+            route = getattr(scope.get("route"), "path", "<unmatched>")
+            HTTP_REQUESTS.inc(method=method, route=route, status=status_code)
+            HTTP_REQUEST_SECONDS.observe(elapsed, method=method, route=route)
+            if settings.slow_request_seconds and elapsed >= settings.slow_request_seconds:
+                logging.warning("Slow request: " + json.dumps({
+                    "method": method, "path": scope["path"], "route": route, "status": status_code,
+                    "ms": round(elapsed * 1000, 3), "db_ms": round(sum(c["ms"] for c in calls), 3),
+                    "db_calls": calls,
+                }))
+
+mongo_command_metrics = MongoCommandMetrics()
 
 # MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# The client is created by the app's lifespan, which pings the server before serving, so
+# the first request doesn't pay for connection setup. create_app(database=...) skips both
+# and serves from the given database instead.
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+async def connect_database(settings: Settings) -> tuple:
+    """Returns (client, database) once the server has answered a ping."""
+    if not settings.mongo_url or not settings.db_name:
+        raise RuntimeError("MONGO_URL and DB_NAME must be set")
+    # tz_aware: stored BSON dates come back as UTC-aware datetimes
+    mongo = AsyncIOMotorClient(settings.mongo_url, tz_aware=True, event_listeners=[mongo_command_metrics])
+    try:
+        await mongo.admin.command("ping")
+    except Exception:
+        mongo.close()
+        raise
+    return mongo, mongo[settings.db_name]
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+class PasswordHasher:
+    """Runs bcrypt in a dedicated thread pool so it never blocks the event loop.
+
+    At most `max_workers` hashes run at once and at most `max_queue` more may wait.
+    Beyond that callers get a 503 with Retry-After instead of queueing indefinitely.
+    passlib and bcrypt are imported on the first hash or verify.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, retry_after: int):
+        self._context = None
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.pending = 0
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+
+    async def _run(self, operation: str, fn, *args):
+        if self.pending >= self.max_workers + self.max_queue:
+            PASSWORD_HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=503,
+                detail="Too many authentication requests, please retry",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        def timed():
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                PASSWORD_HASH_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.pending -= 1
+
+    @property
+    def context(self):
+        if self._context is None:
+            from passlib.context import CryptContext
+            self._context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        return self._context
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple:
+        """Returns (valid, new_hash); new_hash is set when the stored hash needs upgrading."""
+        return await self._run("verify", self.context.verify_and_update, password, hashed)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
+
+password_hasher: Optional[PasswordHasher] = None  # built by configure()
+
+# Caching
+class LocalCacheBackend:
+    """In-process TTL + LRU store.
+
+    The default backend. A single instance shared by several caches also stands in for
+    a shared backend in tests.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+class RedisCacheBackend:
+    """Shared backend so that every uvicorn worker sees the same entries and invalidations."""
+
+    def __init__(self, url: str, ttl: float, prefix: str):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError("A redis:// cache URL requires the 'redis' package")
+        self.redis = aioredis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.redis.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.redis.set(self.prefix + key, json.dumps(value, default=str), ex=max(1, int(self.ttl)))
+
+    async def delete(self, key: str) -> None:
+        await self.redis.delete(self.prefix + key)
+
+def make_cache_backend(url: Optional[str], max_size: int, ttl: float, prefix: str):
+    if url:
+        return RedisCacheBackend(url, ttl, prefix)
+    return LocalCacheBackend(max_size, ttl)
+
+class PrincipalCache:
+    """Caches authenticated user documents by id for get_current_user.
+
+    Writers that change anything on the User model must call invalidate() after the
+    database write so the next request reloads the principal.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        user_doc = await self.backend.get(user_id)
+        if user_doc is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        record_cache("principal", user_doc is not None)
+        return user_doc
+
+    async def set(self, user_id: str, user_doc: dict) -> None:
+        await self.backend.set(user_id, user_doc)
+
+    async def invalidate(self, user_id: str) -> None:
+        self.invalidations += 1
+        await self.backend.delete(user_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations}
+
+principal_cache: Optional[PrincipalCache] = None  # built by configure()
 
 # JWT settings
-SECRET_KEY = os.environ.get('JWT_SECRET', 'your-secret-key-change-this')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
 # Security
 security = HTTPBearer()
+# For endpoints that also accept the token in the query string
+optional_security = HTTPBearer(auto_error=False)
+
+# Index registry: every hot query in this module must be backed by one of these.
+# Keyed by collection name; each entry is a key list plus IndexModel options.
+INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "users": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("email", ASCENDING)], "unique": True},
+    ],
+    "clubs": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("created_at", ASCENDING), ("id", ASCENDING)]},
+    ],
+    "events": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("date", ASCENDING), ("id", ASCENDING)]},
+        {"keys": [("club_id", ASCENDING), ("date", ASCENDING), ("id", ASCENDING)]},
+        {"keys": [("tags", ASCENDING), ("date", ASCENDING), ("id", ASCENDING)]},
+        # GET /events/search; a collection can only have one text index
+        {"keys": [("title", TEXT), ("description", TEXT), ("location", TEXT)], "name": "events_text",
+         "weights": {"title": 10, "location": 3, "description": 1}},
+    ],
+    "rsvps": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("event_id", ASCENDING), ("user_id", ASCENDING)], "unique": True},
+        {"keys": [("event_id", ASCENDING), ("status", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)]},
+    ],
+    "attendance": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("event_id", ASCENDING), ("user_id", ASCENDING)], "unique": True},
+        {"keys": [("user_id", ASCENDING), ("checked_in_at", DESCENDING), ("id", DESCENDING)]},
+    ],
+    "tasks": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("created_at", DESCENDING), ("id", DESCENDING)]},
+        {"keys": [("club_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]},
+        {"keys": [("created_by", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]},
+        {"keys": [("assigned_to", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]},
+    ],
+    "transactions": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("club_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]},
+    ],
+    "achievements": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+        {"keys": [("user_id", ASCENDING)]},
+        # Legacy achievements predate rule_id, so uniqueness only covers rule-based ones
+        {"keys": [("user_id", ASCENDING), ("rule_id", ASCENDING)], "unique": True,
+         "partialFilterExpression": {"rule_id": {"$exists": True}}},
+    ],
+    "user_stats": [
+        {"keys": [("user_id", ASCENDING)], "unique": True},
+    ],
+    "club_ledgers": [
+        {"keys": [("club_id", ASCENDING)], "unique": True},
+    ],
+    "club_stats": [
+        {"keys": [("club_id", ASCENDING)], "unique": True},
+    ],
+    "migrations": [
+        {"keys": [("id", ASCENDING)], "unique": True},
+    ],
+    "activity_buckets": [
+        {"keys": [("scope", ASCENDING), ("scope_id", ASCENDING), ("start", ASCENDING)], "unique": True},
+    ],
+}
+
+async def ensure_indexes(database) -> None:
+    """Create every index in INDEXES. Idempotent, safe to run on each startup.
+
+    Raises RuntimeError naming the collection if existing rows break a unique index.
+    """
+    for collection_name, specs in INDEXES.items():
+        models = [
+            IndexModel(spec["keys"], **{k: v for k, v in spec.items() if k != "keys"})
+            for spec in specs
+        ]
+        try:
+            created = await database[collection_name].create_indexes(models)
+        except OperationFailure as e:
+            if e.code != 11000:
+                raise
+            unique_keys = " or ".join(
+                f"({', '.join(field for field, _ in spec['keys'])})" for spec in specs if spec.get("unique")
+            )
+            raise RuntimeError(
+                f"Cannot create the unique indexes on {collection_name}: it holds rows with the same "
+                f"{unique_keys} ({e}). Run `python server.py migrate` to remove the duplicates"
+            ) from e
+        logging.info(f"Indexes ensured on {collection_name}: {', '.join(created)}")
+
+# Before these unique indexes existed, concurrent requests could get past the
+# find-then-insert checks and store duplicates, which would stop the indexes from
+# building. `python server.py migrate` removes them first. Each entry maps a collection
+# to its unique key and to the field whose earliest value marks the copy that is kept.
+DEDUPLICATED_KEYS: Dict[str, tuple] = {
+    "users": (("email",), "created_at"),
+    "rsvps": (("event_id", "user_id"), "created_at"),
+    "attendance": (("event_id", "user_id"), "checked_in_at"),
+}
+# Where removed duplicate accounts are referenced; these move to the account that is kept
+USER_ID_FIELDS = {"rsvps": ("user_id",), "attendance": ("user_id",), "tasks": ("assigned_to", "created_by"),
+                  "transactions": ("created_by",)}
+USER_ID_LIST_FIELDS = {"clubs": ("coordinator_ids", "treasurer_ids", "faculty_mentor_ids")}
+
+async def merge_user_into(database, removed_id: str, kept_id: str) -> None:
+    for collection_name, fields in USER_ID_FIELDS.items():
+        for field in fields:
+            await database[collection_name].update_many({field: removed_id}, {"$set": {field: kept_id}})
+    for collection_name, fields in USER_ID_LIST_FIELDS.items():
+        for field in fields:
+            await database[collection_name].update_many({field: removed_id}, {"$addToSet": {field: kept_id}})
+            await database[collection_name].update_many({field: removed_id}, {"$pull": {field: removed_id}})
+    # Derived from attendance; migrate recomputes them for the kept account afterwards
+    await database.user_stats.delete_many({"user_id": removed_id})
+    await database.achievements.delete_many({"user_id": removed_id})
+
+async def remove_duplicates(database) -> Dict[str, int]:
+    """Delete the rows that break a unique key in DEDUPLICATED_KEYS, keeping the earliest.
+
+    Removed accounts are merged into the kept one first, so their RSVPs and attendance
+    are deduplicated next. Event counters and club_stats still count the removed rows until
+    reconcile_club_stats runs, as migrate does next. Returns the number of removed rows per
+    collection.
+    """
+    removed: Dict[str, int] = {}
+    for collection_name, (keys, order_field) in DEDUPLICATED_KEYS.items():
+        removed[collection_name] = 0
+        pipeline = [
+            {"$sort": {order_field: ASCENDING, "_id": ASCENDING}},
+            {"$group": {
+                "_id": {key: f"${key}" for key in keys},
+                "docs": {"$push": {"_id": "$_id", "id": "$id"}},
+                "count": {"$sum": 1},
+            }},
+            {"$match": {"count": {"$gt": 1}}},
+        ]
+        groups = await database[collection_name].aggregate(pipeline, allowDiskUse=True).to_list(None)
+        for group in groups:
+            kept, duplicates = group["docs"][0], group["docs"][1:]
+            if collection_name == "users":
+                for duplicate in duplicates:
+                    await merge_user_into(database, duplicate["id"], kept["id"])
+            await database[collection_name].delete_many({"_id": {"$in": [doc["_id"] for doc in duplicates]}})
+            removed[collection_name] += len(duplicates)
+    return removed
+
+async def warm_recommender(database) -> None:
+    try:
+        await recommender.sync(database, force=True)
+    except Exception:
+        # GET /recommendations retries the sync on its next call
+        logging.exception("Initial recommender sync failed")
 
 # Lifespan context manager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global client, db
     # Startup
     logging.info("Application starting up...")
+    owns_client = db is None
+    if owns_client:
+        client, db = await connect_database(settings)
+    await ensure_indexes(db)
+    await check_native_datetimes(db)
+    await check_derived_collections(db)
+    # Built in the background: GET /recommendations waits for it on the sync lock, nothing
+    # else needs the index
+    warm_up = asyncio.create_task(warm_recommender(db))
+    change_stream = asyncio.create_task(watch_event_counters(db)) if settings.live_change_stream else None
     yield
     # Shutdown
     logging.info("Application shutting down...")
-    client.close()
+    warm_up.cancel()
+    if change_stream:
+        change_stream.cancel()
+    qr_executor.shutdown(wait=False)
+    password_hasher.shutdown()
+    await gemini_client.close()
+    if owns_client:
+        client.close()
+        client = db = None
 
-# Create the main app with lifespan
-app = FastAPI(lifespan=lifespan)
 api_router = APIRouter(prefix="/api")
 
 # Models
@@ -98,7 +718,6 @@ class Event(BaseModel):
     date: datetime
     location: str
     tags: List[str] = []  # Tech, Workshop, Cultural, etc.
-    qr_code: Optional[str] = None
     max_attendees: Optional[int] = None
     rsvp_count: int = 0
     attendance_count: int = 0
@@ -113,12 +732,18 @@ class EventCreate(BaseModel):
     tags: List[str] = []
     max_attendees: Optional[int] = None
 
+    @field_validator("tags")
+    @classmethod
+    def drop_blank_tags(cls, tags: List[str]) -> List[str]:
+        # "Tech, " splits into a blank tag, which can't name a counter field
+        return [tag.strip() for tag in tags if tag.strip()]
+
 class RSVP(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     event_id: str
     user_id: str
-    status: str  # confirmed, cancelled
+    status: str  # confirmed, waitlisted
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class Attendance(BaseModel):
@@ -167,39 +792,67 @@ class TransactionCreate(BaseModel):
     description: str
     receipt_url: Optional[str] = None
 
+class TransactionImportRow(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: Optional[str] = None  # kept when given, so re-sending an import reports duplicates
+    club_id: Optional[str] = None  # must match the import's club when given
+    type: str
+    amount: float
+    category: str
+    description: str
+    receipt_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+
 class Achievement(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
+    rule_id: Optional[str] = None  # ACHIEVEMENT_RULES id, suffixed with the club or tag for scoped rules
     title: str
     description: str
     badge_type: str  # bronze, silver, gold
     earned_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class CheckinScan(BaseModel):
+    user_id: str
+    scanned_at: Optional[datetime] = None  # when the QR code was scanned, if recorded offline
+
+class BatchCheckin(BaseModel):
+    scans: List[CheckinScan] = Field(..., min_length=1, max_length=5000)
+
 # Helper functions
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> tuple:
+    return await password_hasher.verify_and_update(plain_password, hashed_password)
+
+async def invalidate_principal(user_id: str) -> None:
+    """Call after any write to a user's profile, interests, role or club."""
+    await principal_cache.invalidate(user_id)
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(to_encode, settings.jwt_secret, algorithm=ALGORITHM)
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+    return await user_from_token(credentials.credentials)
+
+async def user_from_token(token: str) -> User:
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, settings.jwt_secret, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        user_doc = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if not user_doc:
-            raise HTTPException(status_code=404, detail="User not found")
+        user_doc = await principal_cache.get(user_id)
+        if user_doc is None:
+            user_doc = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+            if not user_doc:
+                raise HTTPException(status_code=404, detail="User not found")
+            await principal_cache.set(user_id, user_doc)
         
         return User(**user_doc)
     except jwt.ExpiredSignatureError:
@@ -207,17 +860,1854 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-def generate_qr_code(data: str) -> str:
+# QR codes
+# Check-in QR images are rendered on demand by GET /events/{id}/qr instead of being
+# stored on the event document. The payload depends only on the event id, so rendered
+# images are cached indefinitely (bounded by QR_CACHE_SIZE) and served with a strong ETag.
+# qrcode and PIL are imported by the first render.
+QR_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+qr_executor: Optional[ThreadPoolExecutor] = None  # built by configure()
+
+class QRCodeCache:
+    """Bounded LRU of rendered QR images keyed by (event id, format)."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        record_cache("qr", entry is not None)
+        return entry
+
+    def put(self, key: tuple, entry: tuple) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+qr_cache: Optional[QRCodeCache] = None  # built by configure()
+
+def render_qr_code(data: str, fmt: str = "png") -> bytes:
+    import qrcode
+
+    start = time.perf_counter()
     qr = qrcode.QRCode(version=1, box_size=10, border=5)
     qr.add_data(data)
     qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
+    if fmt == "svg":
+        from qrcode.image.svg import SvgPathImage
+        img = qr.make_image(image_factory=SvgPathImage)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
     
     buffer = io.BytesIO()
-    img.save(buffer, format='PNG')
-    buffer.seek(0)
-    img_str = base64.b64encode(buffer.getvalue()).decode()
-    return f"data:image/png;base64,{img_str}"
+    img.save(buffer)
+    QR_RENDER_SECONDS.observe(time.perf_counter() - start, format=fmt)
+    return buffer.getvalue()
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+# Single flight
+# Concurrent identical reads share one in-flight call instead of each issuing its own:
+# read-cache fills (keyed like the cache), the upcoming-events query behind recommendations
+# (keyed by collection, filter and projection) and Gemini calls (keyed by prompt hash).
+# Query results are also reused for SINGLE_FLIGHT_STALE_SECONDS after they complete.
+SINGLE_FLIGHT_CALLS = metrics.counter(
+    "single_flight_calls_total", "Calls through a single-flight group: leader, shared or stale", ("flight", "result")
+)
+
+class Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Shares one in-flight call among concurrent callers with the same key.
+
+    The call runs in its own task, so a caller that is cancelled (its client went away)
+    only stops waiting; the call itself is cancelled when its last waiter leaves.
+    Exceptions reach every waiter and are never reused. Callers share the result object
+    and must not mutate it.
+    """
+
+    def __init__(self, name: str, stale_seconds: float = 0.0, max_results: int = 1024):
+        self.name = name
+        self.stale_seconds = stale_seconds
+        self.max_results = max_results
+        self._flights: Dict[Any, Flight] = {}
+        self._results: OrderedDict = OrderedDict()  # key -> (expires_at, result)
+
+    async def do(self, key: Any, fn):
+        if not settings.single_flight_enabled:
+            return await fn()
+        recent = self._results.get(key)
+        if recent is not None:
+            if recent[0] > time.monotonic():
+                SINGLE_FLIGHT_CALLS.inc(flight=self.name, result="stale")
+                return recent[1]
+            del self._results[key]
+        
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(lambda task: self._finish(key, flight))
+            SINGLE_FLIGHT_CALLS.inc(flight=self.name, result="leader")
+        else:
+            SINGLE_FLIGHT_CALLS.inc(flight=self.name, result="shared")
+        
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Later callers must start a new call rather than join the cancelled one
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    def _finish(self, key: Any, flight: Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # exception() also marks a failure as retrieved when every waiter has gone
+        if flight.task.cancelled() or flight.task.exception() is not None or not self.stale_seconds:
+            return
+        self._results[key] = (time.monotonic() + self.stale_seconds, flight.task.result())
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+# Fills store their result in read_cache, which then serves it; no stale window needed
+read_flight = SingleFlight("read_cache")
+query_flight: Optional[SingleFlight] = None  # built by configure()
+# Answers are kept in recommendation_cache once parsed
+llm_flight = SingleFlight("llm")
+
+async def shared_find(collection, query: dict, projection: dict, sort: List[tuple], limit: int) -> List[dict]:
+    """collection.find(...).to_list(limit) through query_flight."""
+    key = (collection.name, json.dumps([query, projection, sort, limit], sort_keys=True, default=str))
+    return await query_flight.do(
+        key, lambda: collection.find(query, projection).sort(sort).to_list(limit)
+    )
+
+# Read cache
+# GET /clubs, /clubs/{id} and /events/{id} keep their rendered JSON body and strong ETag in
+# process. Each entry is stamped with the collection (lists) or document it was read from;
+# writers bump the stamp, which retires every entry whose read started before the bump.
+# Entries also expire after READ_CACHE_TTL, which bounds how long another worker's write
+# can go unseen. A request whose If-None-Match matches a current entry gets a 304 without
+# touching Mongo or re-serializing anything.
+CLUB_CACHE_CONTROL = "public, max-age=60"
+# Counters change with every RSVP, so browsers always revalidate event pages
+EVENT_CACHE_CONTROL = "public, no-cache"
+CONDITIONAL_REQUESTS = metrics.counter(
+    "http_conditional_requests_total", "If-None-Match requests to cached routes by outcome", ("cache", "result")
+)
+
+class VersionedReadCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._seq = 0
+        self._bumps: OrderedDict = OrderedDict()  # stamp -> (seq, monotonic time)
+        self._entries: OrderedDict = OrderedDict()  # key -> (stamp, seq, expires_at, body, etag, headers)
+
+    def begin(self) -> int:
+        """Call before reading the data an entry will be rendered from; pass the result to put()."""
+        return self._seq
+
+    def bump(self, *stamps: str) -> None:
+        now = time.monotonic()
+        for stamp in stamps:
+            self._seq += 1
+            self._bumps[stamp] = (self._seq, now)
+            self._bumps.move_to_end(stamp)
+        # Any entry older than a forgotten bump has expired anyway
+        while self._bumps and next(iter(self._bumps.values()))[1] < now - self.ttl:
+            self._bumps.popitem(last=False)
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stamp, seq, expires_at = entry[:3]
+        bump = self._bumps.get(stamp)
+        if expires_at < time.monotonic() or (bump is not None and bump[0] > seq):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, stamp: str, seq: int, body: bytes, headers: Dict[str, str]) -> tuple:
+        entry = (stamp, seq, time.monotonic() + self.ttl, body, make_etag(body), headers)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return entry
+
+read_cache: Optional[VersionedReadCache] = None  # built by configure()
+
+def render_json(model: type, content: Any) -> bytes:
+    """The body FastAPI would send for `content` (a document or list of documents) as `model`."""
+    if isinstance(content, list):
+        if settings.fast_json_responses:
+            return FastJSONResponse([trusted_document(model, item) for item in content]).body
+        return JSONResponse(jsonable_encoder([model(**item) for item in content])).body
+    if settings.fast_json_responses:
+        return FastJSONResponse(trusted_document(model, content)).body
+    return JSONResponse(jsonable_encoder(model(**content))).body
+
+async def cached_response(request: Request, cache: str, key: tuple, stamp: str, cache_control: str, load) -> Response:
+    """Serve from read_cache, calling `load()` -> (body, headers) on a miss."""
+    entry = read_cache.get(key)
+    record_cache(cache, entry is not None)
+    if entry is None:
+        async def fill():
+            seq = read_cache.begin()
+            body, extra_headers = await load()
+            return read_cache.put(key, stamp, seq, body, extra_headers)
+        entry = await read_flight.do(key, fill)
+    
+    body, etag, extra_headers = entry[3:]
+    headers = {"ETag": etag, "Cache-Control": cache_control, **extra_headers}
+    if "if-none-match" in request.headers:
+        modified = not etag_matches(request, etag)
+        CONDITIONAL_REQUESTS.inc(cache=cache, result="modified" if modified else "not_modified")
+        if not modified:
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Document codec
+# Datetimes are stored as native BSON dates in UTC, so Mongo can range-filter and sort on
+# them and the BSON decoder hands back aware datetimes with no per-row parsing. Models
+# become documents through to_document(). Documents written before the switch hold ISO
+# strings until `python server.py migrate` (or migrate-datetimes) converts them. Mongo sorts
+# every string before every date and range operators never compare the two, so keyset pages
+# and range reads would skip rows on a mixed collection: the app refuses to start until no
+# strings remain, which it records in `migrations` so later starts check with one read.
+DATETIME_FIELDS: Dict[str, tuple] = {
+    "users": ("created_at",),
+    "clubs": ("created_at",),
+    "events": ("date", "created_at"),
+    "rsvps": ("created_at", "promoted_at"),
+    "attendance": ("checked_in_at",),
+    "tasks": ("deadline", "created_at"),
+    "transactions": ("created_at",),
+    "achievements": ("earned_at",),
+    "club_ledgers": ("updated_at",),
+    "club_stats": ("updated_at",),
+    "user_stats": ("updated_at",),
+}
+
+def db_datetime(value: datetime) -> datetime:
+    """The stored form of a datetime: UTC, truncated to BSON's millisecond precision.
+
+    Naive values are taken to be UTC.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    value = value.astimezone(timezone.utc)
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+def to_document(model: BaseModel) -> dict:
+    """Dump a model for insertion, with every datetime field in its stored form."""
+    doc = model.model_dump()
+    for field, value in doc.items():
+        if isinstance(value, datetime):
+            doc[field] = db_datetime(value)
+    return doc
+
+def parse_datetime_fields(doc: dict, *fields: str) -> dict:
+    """Parse legacy ISO-string datetimes; native BSON dates pass through untouched."""
+    for field in fields:
+        if isinstance(doc.get(field), str):
+            doc[field] = datetime.fromisoformat(doc[field])
+    return doc
+
+def datetime_range(field: str, start: Optional[datetime], end: Optional[datetime]) -> dict:
+    bounds = {}
+    if start is not None:
+        bounds["$gte"] = db_datetime(start)
+    if end is not None:
+        bounds["$lt"] = db_datetime(end)
+    return {field: bounds} if bounds else {}
+
+NATIVE_DATETIMES_MIGRATION = "native-datetimes"
+
+async def string_datetime_fields(database) -> List[str]:
+    """The "collection.field"s that still hold an ISO-string datetime somewhere."""
+    remaining = []
+    for collection_name, fields in DATETIME_FIELDS.items():
+        for field in fields:
+            if await database[collection_name].find_one({field: {"$type": "string"}}, {"_id": 1}):
+                remaining.append(f"{collection_name}.{field}")
+    return remaining
+
+async def record_migration(database, migration_id: str) -> None:
+    await database.migrations.update_one(
+        {"id": migration_id},
+        {"$setOnInsert": {"completed_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+async def check_native_datetimes(database) -> None:
+    """Raise RuntimeError while string datetimes remain; record the migration once none do."""
+    if await database.migrations.find_one({"id": NATIVE_DATETIMES_MIGRATION}, {"_id": 1}):
+        return
+    remaining = await string_datetime_fields(database)
+    if remaining:
+        raise RuntimeError(
+            f"ISO-string datetimes remain in {', '.join(remaining)}; "
+            "run `python server.py migrate` before starting the app"
+        )
+    await record_migration(database, NATIVE_DATETIMES_MIGRATION)
+
+async def migrate_datetimes(database, batch_size: int = 1000) -> Dict[str, int]:
+    """Convert ISO-string datetime fields to BSON dates, in batches of `batch_size` documents.
+
+    Safe to run while the app is serving: each update only applies if the field still
+    holds the string that was read. Returns the number of converted values per collection.
+    """
+    converted: Dict[str, int] = {}
+    for collection_name, fields in DATETIME_FIELDS.items():
+        collection = database[collection_name]
+        converted[collection_name] = 0
+        for field in fields:
+            last_id = None
+            while True:
+                query: Dict[str, Any] = {field: {"$type": "string"}}
+                if last_id is not None:
+                    query["_id"] = {"$gt": last_id}
+                docs = await collection.find(query, {"_id": 1, field: 1}) \
+                    .sort("_id", ASCENDING).limit(batch_size).to_list(batch_size)
+                if not docs:
+                    break
+                last_id = docs[-1]["_id"]
+                updates = []
+                for doc in docs:
+                    try:
+                        value = db_datetime(datetime.fromisoformat(doc[field]))
+                    except ValueError:
+                        logging.warning(f"Skipping unparseable {collection_name}.{field} on {doc['_id']}: {doc[field]!r}")
+                        continue
+                    updates.append(UpdateOne({"_id": doc["_id"], field: doc[field]}, {"$set": {field: value}}))
+                if updates:
+                    result = await collection.bulk_write(updates, ordered=False)
+                    converted[collection_name] += result.modified_count
+    return converted
+
+# Pagination
+# List endpoints page with an opaque keyset cursor over (sort field, id). List-shaped
+# responses return the cursor for the next page in the X-Next-Cursor header; object-shaped
+# responses carry it as "next_cursor". Passing stream=true switches to NDJSON read
+# straight off the Motor cursor.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Legacy event documents may still embed a base64 QR image; never read it back
+EVENT_PROJECTION = {"_id": 0, "qr_code": 0}
+
+def encode_cursor(sort_value: Any, doc_id: str) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = {"$date": sort_value.isoformat()}
+    raw = json.dumps([sort_value, doc_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, doc_id = json.loads(raw)
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["$date"])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return sort_value, doc_id
+
+def keyset_filter(query: dict, sort_field: str, direction: int, cursor: Optional[str]) -> dict:
+    if not cursor:
+        return query
+    sort_value, doc_id = decode_cursor(cursor)
+    op = "$gt" if direction == ASCENDING else "$lt"
+    after = {"$or": [
+        {sort_field: {op: sort_value}},
+        {sort_field: sort_value, "id": {op: doc_id}},
+    ]}
+    return {"$and": [query, after]} if query else after
+
+def find_sorted(collection, query: dict, sort_field: str, direction: int, cursor: Optional[str],
+                projection: Optional[dict] = None):
+    return collection.find(
+        keyset_filter(query, sort_field, direction, cursor),
+        projection or {"_id": 0},
+    ).sort([(sort_field, direction), ("id", direction)])
+
+async def fetch_page(collection, query: dict, sort_field: str, direction: int, cursor: Optional[str],
+                     limit: int, decode, projection: Optional[dict] = None) -> tuple:
+    """Read one page plus a look-ahead row; returns (decoded items, next cursor or None)."""
+    docs = await find_sorted(collection, query, sort_field, direction, cursor, projection) \
+        .limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1].get(sort_field), docs[-1]["id"])
+    return [decode(doc) for doc in docs], next_cursor
+
+def ndjson_stream(cursor, decode) -> StreamingResponse:
+    async def rows():
+        async for doc in cursor.batch_size(STREAM_BATCH_SIZE):
+            yield json.dumps(jsonable_encoder(decode(doc))) + "\n"
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+async def paginated_list(response: Response, collection, query: dict, sort_field: str, direction: int,
+                         cursor: Optional[str], limit: Optional[int], stream: bool, decode,
+                         projection: Optional[dict] = None, model: Optional[type] = None):
+    """List endpoint body. Pass the route's item `model` to allow the fast JSON path."""
+    if stream:
+        db_cursor = find_sorted(collection, query, sort_field, direction, cursor, projection)
+        if limit:
+            db_cursor = db_cursor.limit(limit)
+        return ndjson_stream(db_cursor, decode)
+
+    items, next_cursor = await fetch_page(
+        collection, query, sort_field, direction, cursor, limit or DEFAULT_PAGE_SIZE, decode, projection
+    )
+    if settings.fast_json_responses and model is not None:
+        # A returned Response bypasses response_model and the injected `response`
+        return FastJSONResponse(
+            [trusted_document(model, item) for item in items],
+            headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None,
+        )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
+
+# Fast JSON responses
+# With FAST_JSON_RESPONSES=true, paginated list endpoints skip FastAPI's response_model pass
+# (validate every row, dump it back to Python, then json.dumps) for documents read from our
+# own collections: rows are shaped with trusted_document() and rendered in one orjson call.
+# Routes keep their response_model, so the OpenAPI schema and the JSON body are unchanged.
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        # OPT_UTC_Z renders UTC offsets as "Z", like pydantic does
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+_model_shapes: Dict[type, tuple] = {}
+
+def trusted_document(model: type, doc: dict) -> dict:
+    """Shape a stored document the way the model would serialize it, without validation.
+
+    Only for documents this module wrote from the same model: fields missing from older
+    documents get the model's static default and fields outside the model are dropped.
+    """
+    shape = _model_shapes.get(model)
+    if shape is None:
+        shape = _model_shapes[model] = tuple(
+            (name, None if field.is_required() or field.default_factory else field.default)
+            for name, field in model.model_fields.items()
+        )
+    return {name: doc.get(name, default) for name, default in shape}
+
+def decode_club(doc: dict) -> dict:
+    return parse_datetime_fields(doc, 'created_at')
+
+def decode_event(doc: dict) -> dict:
+    return parse_datetime_fields(doc, 'created_at', 'date')
+
+def decode_task(doc: dict) -> dict:
+    return parse_datetime_fields(doc, 'created_at', 'deadline')
+
+def decode_transaction(doc: dict) -> dict:
+    return parse_datetime_fields(doc, 'created_at')
+
+def decode_attendance(doc: dict) -> dict:
+    return parse_datetime_fields(doc, 'checked_in_at')
+
+def decode_rsvp(doc: dict) -> dict:
+    return parse_datetime_fields(doc, 'created_at')
+
+def decode_achievement(doc: dict) -> dict:
+    return parse_datetime_fields(doc, 'earned_at')
+
+# LLM client
+# Recommendations call Gemini through one pooled AsyncClient with strict timeouts. A circuit
+# breaker stops calling a failing upstream for LLM_CIRCUIT_RESET_SECONDS and the endpoint
+# falls back to local tag matching meanwhile. GEMINI_API_URL can point at a local fake.
+# httpx is imported when the first request is made.
+
+class LLMUnavailable(Exception):
+    pass
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures.
+
+    Once `reset_timeout` has passed it lets a single probe call through (half-open);
+    that probe's outcome closes the circuit or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+class GeminiClient:
+    def __init__(self, api_url: str, api_key: Optional[str], timeout: float, max_connections: int,
+                 breaker: CircuitBreaker):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.breaker = breaker
+        self._http = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.api_key)
+
+    def _client(self):
+        if self._http is None:
+            import httpx
+
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 2.0)),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._http
+
+    async def generate(self, prompt: str) -> str:
+        import httpx
+
+        if not self.breaker.allow():
+            raise LLMUnavailable("circuit open")
+        try:
+            response = await self._client().post(
+                self.api_url,
+                params={"key": self.api_key},
+                json={"contents": [{"parts": [{"text": prompt}]}]},
+            )
+            response.raise_for_status()
+            text = response.json()["candidates"][0]["content"]["parts"][0]["text"]
+        except (httpx.HTTPError, KeyError, IndexError, TypeError, ValueError) as e:
+            self.breaker.record_failure()
+            raise LLMUnavailable(f"Gemini API request failed: {e!r}")
+        self.breaker.record_success()
+        return text.strip()
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+# Built by configure(), as are recommendation_cache, (sorted interests, upcoming-event set
+# version) -> recommended titles, and events_prompt_cache, upcoming-event set version ->
+# prompt text listing those events
+gemini_client: Optional[GeminiClient] = None
+recommendation_cache: Optional[LocalCacheBackend] = None
+events_prompt_cache: Optional[LocalCacheBackend] = None
+
+def upcoming_events_version(events: List[dict]) -> str:
+    digest = hashlib.sha1()
+    for event_id in sorted(e['id'] for e in events):
+        digest.update(event_id.encode())
+    return digest.hexdigest()
+
+async def events_prompt_text(events: List[dict], version: str) -> str:
+    text = await events_prompt_cache.get(version)
+    record_cache("llm_prompt", text is not None)
+    if text is None:
+        text = "\n".join([
+            f"- {e['title']}: {e['description']} (Tags: {', '.join(e.get('tags', []))})"
+            for e in events
+        ])
+        await events_prompt_cache.set(version, text)
+    return text
+
+# Local recommender
+# Used when Gemini is not configured or its circuit is open. Keeps a TF-IDF index over the
+# tags, title and description of upcoming events, updated as events are created and
+# resynced from the database every RECOMMENDER_REFRESH_SECONDS to pick up other workers.
+RECOMMENDER_FIELD_WEIGHTS = {"tags": 3.0, "title": 2.0, "description": 1.0}
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or our the this to with will you your".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+def phrase_terms(phrase: str) -> List[str]:
+    """Terms for a tag or interest: its words plus the whole phrase as one term."""
+    words = tokenize(phrase)
+    whole = " ".join(words)
+    return words + [f"#{whole}"] if whole else words
+
+def event_timestamp(value: Any) -> float:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class EventRecommender:
+    """In-memory inverted index over upcoming events.
+
+    Rows are events; each term keeps a posting list of (row, weight) where weight is the
+    row's L2-normalised, field-weighted term frequency. Scoring interests is one sparse
+    matrix-vector product: the postings of the query terms are concatenated, scaled by
+    idf and reduced per row with np.bincount. Past events are masked at query time and
+    physically dropped once they make up half of the index.
+    """
+
+    def __init__(self):
+        self._reset()
+        self.synced_through: Optional[Any] = None
+        self.last_sync = 0.0
+        self._sync_lock = asyncio.Lock()
+
+    def _reset(self) -> None:
+        self.event_ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.row_terms: List[Dict[str, float]] = []
+        self.dates: List[float] = []
+        self.postings: Dict[str, tuple] = {}
+        self._arrays: Dict[str, tuple] = {}
+        self._dates_array: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.event_ids)
+
+    @staticmethod
+    def _term_weights(event: dict) -> Dict[str, float]:
+        weights: Dict[str, float] = {}
+        fields = {
+            "tags": [term for tag in event.get("tags", []) for term in phrase_terms(tag)],
+            "title": tokenize(event.get("title", "")),
+            "description": tokenize(event.get("description", "")),
+        }
+        for field, terms in fields.items():
+            for term in terms:
+                weights[term] = weights.get(term, 0.0) + RECOMMENDER_FIELD_WEIGHTS[field]
+        norm = float(np.sqrt(sum(w * w for w in weights.values()))) or 1.0
+        return {term: w / norm for term, w in weights.items()}
+
+    def _add_row(self, event_id: str, date: float, terms: Dict[str, float]) -> None:
+        row = len(self.event_ids)
+        self.event_ids.append(event_id)
+        self.row_of[event_id] = row
+        self.row_terms.append(terms)
+        self.dates.append(date)
+        for term, weight in terms.items():
+            rows, weights = self.postings.setdefault(term, ([], []))
+            rows.append(row)
+            weights.append(weight)
+            self._arrays.pop(term, None)
+        self._dates_array = None
+
+    def add(self, event: dict, now: Optional[float] = None) -> None:
+        """Index one event. Past events and events already indexed are ignored."""
+        date = event_timestamp(event["date"])
+        if event["id"] in self.row_of or date <= (now if now is not None else time.time()):
+            return
+        self._add_row(event["id"], date, self._term_weights(event))
+
+    def expire(self, now: Optional[float] = None) -> None:
+        """Rebuild without past events once they make up half of the rows."""
+        now = now if now is not None else time.time()
+        live = [row for row, date in enumerate(self.dates) if date > now]
+        if len(live) * 2 > len(self.dates):
+            return
+        rows = [(self.event_ids[row], self.dates[row], self.row_terms[row]) for row in live]
+        self._reset()
+        for event_id, date, terms in rows:
+            self._add_row(event_id, date, terms)
+
+    def _posting_arrays(self, term: str) -> Optional[tuple]:
+        arrays = self._arrays.get(term)
+        if arrays is None and term in self.postings:
+            rows, weights = self.postings[term]
+            arrays = (np.asarray(rows, dtype=np.int64), np.asarray(weights, dtype=np.float64))
+            self._arrays[term] = arrays
+        return arrays
+
+    def recommend(self, interests: List[str], k: int = 5, now: Optional[float] = None) -> List[tuple]:
+        """Top-k (event_id, score) pairs for the given interests, best first."""
+        n = len(self.event_ids)
+        query: Dict[str, float] = {}
+        for interest in interests:
+            for term in phrase_terms(interest):
+                query[term] = query.get(term, 0.0) + 1.0
+        postings = [(self._posting_arrays(term), weight) for term, weight in query.items()]
+        postings = [(arrays, weight) for arrays, weight in postings if arrays is not None]
+        if not n or not postings:
+            return []
+
+        rows = np.concatenate([arrays[0] for arrays, _ in postings])
+        weights = np.concatenate([
+            arrays[1] * (weight * (np.log((1 + n) / (1 + len(arrays[0]))) + 1.0))
+            for arrays, weight in postings
+        ])
+        scores = np.bincount(rows, weights=weights, minlength=n)
+
+        if self._dates_array is None:
+            self._dates_array = np.asarray(self.dates, dtype=np.float64)
+        scores[self._dates_array <= (now if now is not None else time.time())] = 0.0
+
+        top = np.argpartition(-scores, k - 1)[:k] if n > k else np.arange(n)
+        top = top[scores[top] > 0]
+        ranked = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.event_ids[row], float(scores[row])) for row in ranked]
+
+    async def sync(self, database, force: bool = False) -> None:
+        """Pull upcoming events created since the last sync (all of them on first call)."""
+        if not force and time.monotonic() - self.last_sync < settings.recommender_refresh_seconds:
+            return
+        async with self._sync_lock:
+            if not force and time.monotonic() - self.last_sync < settings.recommender_refresh_seconds:
+                return
+            query = {}
+            if self.synced_through is not None:
+                query["created_at"] = {"$gte": self.synced_through}
+            projection = {"_id": 0, "id": 1, "title": 1, "description": 1, "tags": 1, "date": 1, "created_at": 1}
+            now = time.time()
+            async for event in database.events.find(query, projection).sort("created_at", ASCENDING):
+                try:
+                    self.add(event, now)
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if event.get("created_at") is not None:
+                    self.synced_through = event["created_at"]
+            self.expire(now)
+            self.last_sync = time.monotonic()
+
+recommender = EventRecommender()
+
+# Club ledgers
+# One document per club holding running income/expense totals, bumped with $inc by every
+# transaction write so balance reads are O(1). `python server.py rebuild-ledgers`
+# recomputes them from the transactions collection and records LEDGERS_MIGRATION, which
+# startup requires (see DERIVED_MIGRATIONS).
+LEDGERS_MIGRATION = "club-ledgers"
+TRANSACTION_TYPES = ('income', 'expense')
+FINANCE_READ_ROLES = ['treasurer', 'coordinator', 'faculty', 'admin']
+
+def ledger_totals(ledger: Optional[dict]) -> Dict[str, float]:
+    income = (ledger or {}).get('income', 0)
+    expense = (ledger or {}).get('expense', 0)
+    return {"balance": income - expense, "income": income, "expense": expense}
+
+async def apply_to_ledger(club_id: str, income: float, expense: float, count: int) -> None:
+    await db.club_ledgers.update_one(
+        {"club_id": club_id},
+        {
+            "$inc": {"income": income, "expense": expense, "transaction_count": count},
+            "$set": {"updated_at": datetime.now(timezone.utc)},
+        },
+        upsert=True,
+    )
+
+async def rebuild_ledgers(database) -> int:
+    """Recompute every club ledger from raw transactions. Returns the number of clubs.
+
+    Ledgers are replaced wholesale, so a transaction written meanwhile would be lost or
+    counted twice: run this with the app stopped.
+    """
+    totals = await database.transactions.aggregate([
+        {"$group": {
+            "_id": "$club_id",
+            "income": {"$sum": {"$cond": [{"$eq": ["$type", "income"]}, "$amount", 0]}},
+            "expense": {"$sum": {"$cond": [{"$eq": ["$type", "expense"]}, "$amount", 0]}},
+            "transaction_count": {"$sum": 1},
+        }},
+    ]).to_list(None)
+    now = datetime.now(timezone.utc)
+    for total in totals:
+        await database.club_ledgers.replace_one(
+            {"club_id": total["_id"]},
+            {
+                "club_id": total["_id"],
+                "income": total["income"],
+                "expense": total["expense"],
+                "transaction_count": total["transaction_count"],
+                "updated_at": now,
+            },
+            upsert=True,
+        )
+    await record_migration(database, LEDGERS_MIGRATION)
+    return len(totals)
+
+# Club analytics rollups
+# One club_stats document per club, updated with $inc from event creation, RSVP and
+# check-in, so club analytics is a single indexed read. top_events is kept sorted and
+# capped with $push/$sort/$slice after $pull-ing the event's previous entry; concurrent
+# updates to one event can briefly leave a duplicate entry, which reads de-duplicate.
+# `python server.py reconcile-club-stats` recomputes everything from rsvps/attendance and
+# records CLUB_STATS_MIGRATION, which startup requires (see DERIVED_MIGRATIONS).
+CLUB_STATS_MIGRATION = "club-stats"
+TOP_EVENTS_SORT = {"attendance_count": -1, "rsvp_count": -1}
+ROLLUP_EVENT_PROJECTION = {
+    "_id": 0, "id": 1, "club_id": 1, "title": 1, "date": 1, "tags": 1,
+    "rsvp_count": 1, "attendance_count": 1,
+}
+
+def tag_key(tag: str) -> str:
+    """Tags become field names under club_stats.tags, so strip characters Mongo reserves."""
+    return tag.replace(".", "_").replace("$", "_")
+
+def counted_tags(event: dict) -> Dict[str, str]:
+    """tag_key -> tag for the event's tags, skipping blank ones (stored before EventCreate dropped them)."""
+    return {tag_key(tag): tag for tag in event.get("tags", []) if tag.strip()}
+
+def top_event_entry(event: dict) -> dict:
+    return {
+        "id": event["id"],
+        "title": event.get("title"),
+        "date": event.get("date"),
+        "rsvp_count": event.get("rsvp_count", 0),
+        "attendance_count": event.get("attendance_count", 0),
+    }
+
+async def update_club_stats(event: dict, events: int = 0, rsvps: int = 0, attendance: int = 0) -> None:
+    """Apply counter deltas for one event. `event` must carry its post-update counts."""
+    inc: Dict[str, int] = {}
+    fields = {"events": events, "rsvps": rsvps, "attendance": attendance}
+    for name, delta in fields.items():
+        if delta:
+            inc[f"total_{name}"] = delta
+    set_fields: Dict[str, Any] = {"updated_at": datetime.now(timezone.utc)}
+    for key, tag in counted_tags(event).items():
+        prefix = f"tags.{key}"
+        set_fields[f"{prefix}.tag"] = tag
+        for name, delta in fields.items():
+            if delta:
+                inc[f"{prefix}.{name}"] = delta
+
+    club_filter = {"club_id": event["club_id"]}
+    await db.club_stats.bulk_write([
+        UpdateOne(
+            club_filter,
+            {"$inc": inc, "$set": set_fields, "$pull": {"top_events": {"id": event["id"]}}},
+            upsert=True,
+        ),
+        UpdateOne(club_filter, {"$push": {"top_events": {
+            "$each": [top_event_entry(event)],
+            "$sort": TOP_EVENTS_SORT,
+            "$slice": settings.club_top_events,
+        }}}),
+    ], ordered=True)
+
+def club_stats_response(club_id: str, stats: Optional[dict]) -> dict:
+    stats = stats or {}
+    total_rsvps = stats.get("total_rsvps", 0)
+    total_attendance = stats.get("total_attendance", 0)
+    top_events: Dict[str, dict] = {}
+    for entry in stats.get("top_events", []):
+        if entry["id"] not in top_events:
+            top_events[entry["id"]] = entry
+    tags = sorted(
+        (
+            {
+                "tag": t.get("tag", key),
+                "events": t.get("events", 0),
+                "rsvps": t.get("rsvps", 0),
+                "attendance": t.get("attendance", 0),
+            }
+            for key, t in stats.get("tags", {}).items()
+        ),
+        key=lambda t: (-t["attendance"], -t["rsvps"], t["tag"]),
+    )
+    return {
+        "club_id": club_id,
+        "total_events": stats.get("total_events", 0),
+        "total_rsvps": total_rsvps,
+        "total_attendance": total_attendance,
+        "attendance_rate": round(total_attendance / total_rsvps, 4) if total_rsvps else 0.0,
+        "top_events": list(top_events.values()),
+        "tags": tags,
+        "updated_at": stats.get("updated_at"),
+    }
+
+async def reconcile_club_stats(database, fix: bool = True) -> List[dict]:
+    """Recompute event counters and club_stats from rsvps/attendance and report drift.
+
+    With `fix`, stored values are replaced wholesale, so run it with the app stopped.
+    """
+    async def counts_by_event(collection, match: dict) -> Dict[str, int]:
+        pipeline = [{"$match": match}, {"$group": {"_id": "$event_id", "count": {"$sum": 1}}}]
+        return {row["_id"]: row["count"] async for row in collection.aggregate(pipeline)}
+
+    rsvp_counts = await counts_by_event(database.rsvps, {"status": {"$ne": "waitlisted"}})
+    attendance_counts = await counts_by_event(database.attendance, {})
+
+    drift: List[dict] = []
+    event_fixes = []
+    clubs: Dict[str, dict] = {}
+    async for event in database.events.find({}, ROLLUP_EVENT_PROJECTION):
+        actual = {
+            "rsvp_count": rsvp_counts.get(event["id"], 0),
+            "attendance_count": attendance_counts.get(event["id"], 0),
+        }
+        for field, value in actual.items():
+            if event.get(field, 0) != value:
+                drift.append({"event_id": event["id"], "field": field, "stored": event.get(field, 0), "actual": value})
+        if any(event.get(field, 0) != value for field, value in actual.items()):
+            event_fixes.append(UpdateOne({"id": event["id"]}, {"$set": actual}))
+        event.update(actual)
+
+        stats = clubs.setdefault(event["club_id"], {
+            "club_id": event["club_id"], "total_events": 0, "total_rsvps": 0,
+            "total_attendance": 0, "tags": {}, "events": [],
+        })
+        stats["total_events"] += 1
+        stats["total_rsvps"] += actual["rsvp_count"]
+        stats["total_attendance"] += actual["attendance_count"]
+        for key, tag in counted_tags(event).items():
+            tag_stats = stats["tags"].setdefault(key, {"tag": tag, "events": 0, "rsvps": 0, "attendance": 0})
+            tag_stats["events"] += 1
+            tag_stats["rsvps"] += actual["rsvp_count"]
+            tag_stats["attendance"] += actual["attendance_count"]
+        stats["events"].append(top_event_entry(event))
+
+    stored_stats = {
+        doc["club_id"]: doc async for doc in database.club_stats.find({}, {"_id": 0})
+    }
+    now = datetime.now(timezone.utc)
+    club_docs = []
+    for club_id, stats in clubs.items():
+        ranked = heapq.nlargest(
+            settings.club_top_events, stats.pop("events"),
+            key=lambda e: (e["attendance_count"], e["rsvp_count"]),
+        )
+        stats["top_events"] = ranked
+        stored = club_stats_response(club_id, stored_stats.get(club_id))
+        actual = club_stats_response(club_id, stats)
+        for field in ("total_events", "total_rsvps", "total_attendance", "tags"):
+            if stored[field] != actual[field]:
+                drift.append({"club_id": club_id, "field": field, "stored": stored[field], "actual": actual[field]})
+        stored_top = [e["id"] for e in stored["top_events"]]
+        actual_top = [e["id"] for e in ranked]
+        if stored_top != actual_top:
+            drift.append({"club_id": club_id, "field": "top_events", "stored": stored_top, "actual": actual_top})
+        club_docs.append({**stats, "updated_at": now})
+
+    if fix:
+        if event_fixes:
+            await database.events.bulk_write(event_fixes, ordered=False)
+        for doc in club_docs:
+            await database.club_stats.replace_one({"club_id": doc["club_id"]}, doc, upsert=True)
+        await record_migration(database, CLUB_STATS_MIGRATION)
+    return drift
+
+# Activity series
+# Time-bucketed counters for charts: one activity_buckets document per event per minute and
+# per club per day, holding how many RSVPs were made, cancelled and checked in during that
+# bucket. RSVP, cancellation and check-in writes $inc their buckets with upserts (a door
+# batch spreads its scans over the minutes they were made), so a series is one range read on
+# the unique (scope, scope_id, start) index however large the event is. Reads roll minutes
+# up to hours or days and days up to weeks or months, with empty buckets filled as zeros.
+# `python server.py backfill-activity` rebuilds the RSVP and check-in counters from rsvps
+# and attendance; cancelled RSVPs are deleted, so only live writes ever count those.
+ACTIVITY_COUNTERS = ("rsvps", "cancellations", "checkins")
+# Stored bucket width per scope, in seconds, and the resolutions each can be read at
+ACTIVITY_BUCKET_SECONDS = {"event": 60, "club": 86400}
+ACTIVITY_RESOLUTIONS = {"event": ("minute", "hour", "day"), "club": ("day", "week", "month")}
+RESOLUTION_SECONDS = {"minute": 60, "hour": 3600, "day": 86400}
+ACTIVITY_MAX_POINTS = 5000
+
+def activity_bucket(value: datetime, seconds: int) -> datetime:
+    """Start of the `seconds`-wide UTC bucket holding `value`."""
+    timestamp = int(db_datetime(value).timestamp())
+    return datetime.fromtimestamp(timestamp - timestamp % seconds, timezone.utc)
+
+def series_start(value: datetime, resolution: str) -> datetime:
+    if resolution == "week":
+        return WEEK_EPOCH + timedelta(weeks=week_index(value))
+    if resolution == "month":
+        return activity_bucket(value, 86400).replace(day=1)
+    return activity_bucket(value, RESOLUTION_SECONDS[resolution])
+
+def series_next(value: datetime, resolution: str) -> datetime:
+    if resolution == "week":
+        return value + timedelta(weeks=1)
+    if resolution == "month":
+        return value.replace(year=value.year + value.month // 12, month=value.month % 12 + 1)
+    return value + timedelta(seconds=RESOLUTION_SECONDS[resolution])
+
+async def record_activity(event: dict, counter: str, times: List[datetime]) -> None:
+    """$inc `counter` once per timestamp in the event's minute and the club's day buckets."""
+    buckets: Dict[tuple, int] = {}
+    for at in times:
+        for scope, scope_id in (("event", event["id"]), ("club", event["club_id"])):
+            key = (scope, scope_id, activity_bucket(at, ACTIVITY_BUCKET_SECONDS[scope]))
+            buckets[key] = buckets.get(key, 0) + 1
+    if buckets:
+        await db.activity_buckets.bulk_write([
+            UpdateOne({"scope": scope, "scope_id": scope_id, "start": start}, {"$inc": {counter: count}}, upsert=True)
+            for (scope, scope_id, start), count in buckets.items()
+        ], ordered=False)
+
+async def activity_series(scope: str, scope_id: str, start: Optional[datetime], end: Optional[datetime],
+                          resolution: str) -> dict:
+    """Read one scope's buckets over [start, end) and roll them up to `resolution`.
+
+    Open bounds default to the first and last stored buckets.
+    """
+    if resolution not in ACTIVITY_RESOLUTIONS[scope]:
+        raise HTTPException(
+            status_code=400, detail=f"resolution must be one of {', '.join(ACTIVITY_RESOLUTIONS[scope])}"
+        )
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    query = {"scope": scope, "scope_id": scope_id, **datetime_range("start", start, end)}
+    projection = {"_id": 0, "start": 1, **{counter: 1 for counter in ACTIVITY_COUNTERS}}
+    buckets = await db.activity_buckets.find(query, projection).sort("start", ASCENDING).to_list(None)
+
+    totals = dict.fromkeys(ACTIVITY_COUNTERS, 0)
+    rolled: Dict[datetime, Dict[str, int]] = {}
+    for bucket in buckets:
+        point = rolled.setdefault(series_start(bucket["start"], resolution), dict.fromkeys(ACTIVITY_COUNTERS, 0))
+        for counter in ACTIVITY_COUNTERS:
+            point[counter] += bucket.get(counter, 0)
+            totals[counter] += bucket.get(counter, 0)
+    if start is None and rolled:
+        start = min(rolled)
+    if end is None and rolled:
+        end = series_next(max(rolled), resolution)
+
+    points = []
+    if start is not None and end is not None:
+        at = series_start(start, resolution)
+        while at < db_datetime(end):
+            if len(points) == ACTIVITY_MAX_POINTS:
+                raise HTTPException(status_code=400, detail="Range has too many points, use a coarser resolution")
+            points.append({"start": at, **rolled.get(at, dict.fromkeys(ACTIVITY_COUNTERS, 0))})
+            at = series_next(at, resolution)
+    return {
+        "scope": scope, "id": scope_id, "resolution": resolution,
+        "start": points[0]["start"] if points else None,
+        "end": end if points else None,
+        "totals": totals, "points": points,
+    }
+
+async def backfill_activity(database, until: Optional[datetime] = None, batch_size: int = 200) -> Dict[str, int]:
+    """Set the RSVP and check-in counters of buckets before `until` from rsvps and attendance.
+
+    Walks events `batch_size` at a time. Cancellations are left as recorded, and RSVPs
+    cancelled since are no longer counted, so pass the deploy time as `until` to leave
+    buckets written live untouched.
+    """
+    until = db_datetime(until or datetime.now(timezone.utc))
+    sources = ((database.rsvps, "created_at", "rsvps"), (database.attendance, "checked_in_at", "checkins"))
+    club_buckets: Dict[tuple, Dict[str, int]] = {}
+    totals = {"events": 0, "event_buckets": 0, "club_buckets": 0}
+
+    async def write(buckets: Dict[tuple, Dict[str, int]]) -> None:
+        if buckets:
+            await database.activity_buckets.bulk_write([
+                UpdateOne({"scope": scope, "scope_id": scope_id, "start": start}, {"$set": counts}, upsert=True)
+                for (scope, scope_id, start), counts in buckets.items()
+            ], ordered=False)
+
+    last_id = None
+    while True:
+        query = {"id": {"$gt": last_id}} if last_id else {}
+        events = await database.events.find(query, {"_id": 0, "id": 1, "club_id": 1}) \
+            .sort("id", ASCENDING).to_list(batch_size)
+        if not events:
+            break
+        last_id = events[-1]["id"]
+        club_of = {event["id"]: event["club_id"] for event in events}
+        event_buckets: Dict[tuple, Dict[str, int]] = {}
+        for collection, field, counter in sources:
+            async for row in collection.find({"event_id": {"$in": list(club_of)}}, {"_id": 0, "event_id": 1, field: 1}):
+                at = parse_datetime_fields(row, field).get(field)
+                if at is None or db_datetime(at) >= until:
+                    continue
+                for target, scope, scope_id in (
+                    (event_buckets, "event", row["event_id"]), (club_buckets, "club", club_of[row["event_id"]]),
+                ):
+                    key = (scope, scope_id, activity_bucket(at, ACTIVITY_BUCKET_SECONDS[scope]))
+                    target.setdefault(key, {"rsvps": 0, "checkins": 0})[counter] += 1
+        await write(event_buckets)
+        totals["events"] += len(events)
+        totals["event_buckets"] += len(event_buckets)
+    await write(club_buckets)
+    totals["club_buckets"] = len(club_buckets)
+    return totals
+
+# Attendance achievements
+# Per-user counters live in one user_stats document and are bumped by a single $inc per
+# check-in: total attendance plus per-club, per-tag and per-week counts. Badges are declared
+# in ACHIEVEMENT_RULES and awarded when that $inc carries a metric across a rule's
+# threshold, so concurrent check-ins award each badge exactly once (the unique
+# (user_id, rule_id) index backs this up). Scoped rules ("club", "tag") are awarded once per
+# club or tag. `python server.py backfill-achievements` recomputes counters and badges; it
+# is recorded as USER_STATS_MIGRATION, which startup requires (see DERIVED_MIGRATIONS).
+USER_STATS_MIGRATION = "user-stats"
+WEEK_EPOCH = datetime(1970, 1, 5, tzinfo=timezone.utc)  # a Monday
+ACHIEVEMENT_RULES: List[Dict[str, Any]] = [
+    {"id": "attendance-1", "metric": "attendance", "threshold": 1, "badge_type": "bronze",
+     "title": "First Event", "description": "Attended your first event!"},
+    {"id": "attendance-10", "metric": "attendance", "threshold": 10, "badge_type": "silver",
+     "title": "Active Participant", "description": "Attended 10 events!"},
+    {"id": "attendance-50", "metric": "attendance", "threshold": 50, "badge_type": "gold",
+     "title": "Campus Legend", "description": "Attended 50 events!"},
+    {"id": "club-regular", "metric": "club", "threshold": 5, "badge_type": "bronze",
+     "title": "Club Regular", "description": "Attended 5 events of the same club!"},
+    {"id": "tag-enthusiast", "metric": "tag", "threshold": 5, "badge_type": "silver",
+     "title": "{label} Enthusiast", "description": "Attended 5 {label} events!"},
+    {"id": "streak-4", "metric": "streak", "threshold": 4, "badge_type": "silver",
+     "title": "On a Roll", "description": "Attended events 4 weeks in a row!"},
+    {"id": "streak-12", "metric": "streak", "threshold": 12, "badge_type": "gold",
+     "title": "Unstoppable", "description": "Attended events 12 weeks in a row!"},
+]
+# Streaks only matter up to the longest streak threshold, so check-ins read that many
+# weeks either side of their own week instead of the whole history.
+STREAK_WINDOW = max(rule["threshold"] for rule in ACHIEVEMENT_RULES if rule["metric"] == "streak")
+
+def week_index(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - WEEK_EPOCH).days // 7
+
+def month_key(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y-%m")
+
+def streak_through(weeks: Dict[str, int], week: int) -> int:
+    """Length of the run of consecutive active weeks containing `week` (0 if inactive)."""
+    if not weeks.get(str(week)):
+        return 0
+    start = end = week
+    while weeks.get(str(start - 1)):
+        start -= 1
+    while weeks.get(str(end + 1)):
+        end += 1
+    return end - start + 1
+
+def longest_streak(weeks: Dict[str, int]) -> int:
+    active = sorted(int(week) for week, count in weeks.items() if count)
+    best = run = 0
+    for position, week in enumerate(active):
+        run = run + 1 if position and week == active[position - 1] + 1 else 1
+        best = max(best, run)
+    return best
+
+def rule_achievements(user_id: str, metrics: List[tuple]) -> List[dict]:
+    """Achievement documents for every rule whose threshold lies in (before, after].
+
+    `metrics` holds (metric, scope key, label, before, after) tuples; scoped metrics get
+    one badge per scope key, e.g. per club or per tag.
+    """
+    awarded = []
+    for rule in ACHIEVEMENT_RULES:
+        for metric, scope, label, before, after in metrics:
+            if metric != rule["metric"] or not before < rule["threshold"] <= after:
+                continue
+            achievement = Achievement(
+                user_id=user_id,
+                rule_id=f"{rule['id']}:{scope}" if scope else rule["id"],
+                title=rule["title"].format(label=label),
+                description=rule["description"].format(label=label),
+                badge_type=rule["badge_type"],
+            )
+            awarded.append(to_document(achievement))
+    return awarded
+
+async def record_attendance(user_id: str, event: dict, checked_in_at: datetime) -> List[dict]:
+    """Count one check-in in the user's stats and return the achievements it earns."""
+    week = week_index(checked_in_at)
+    tags = counted_tags(event)
+    inc = {
+        "attendance_count": 1, f"clubs.{event['club_id']}": 1, f"weeks.{week}": 1,
+        f"months.{month_key(checked_in_at)}": 1,
+    }
+    inc.update({f"tags.{key}": 1 for key in tags})
+    set_fields = {f"tag_labels.{key}": tag for key, tag in tags.items()}
+    projection = {"_id": 0, "attendance_count": 1, f"clubs.{event['club_id']}": 1}
+    projection.update({f"tags.{key}": 1 for key in tags})
+    projection.update({f"weeks.{w}": 1 for w in range(week - STREAK_WINDOW, week + STREAK_WINDOW + 1)})
+    stats = await db.user_stats.find_one_and_update(
+        {"user_id": user_id},
+        {"$inc": inc, "$set": {"updated_at": datetime.now(timezone.utc), **set_fields}},
+        projection=projection, upsert=True, return_document=ReturnDocument.AFTER,
+    )
+
+    count = stats["attendance_count"]
+    club_count = stats["clubs"][event["club_id"]]
+    metrics = [
+        ("attendance", None, None, count - 1, count),
+        ("club", event["club_id"], event["club_id"], club_count - 1, club_count),
+    ]
+    for key, tag in tags.items():
+        tag_count = stats["tags"][key]
+        metrics.append(("tag", key, tag, tag_count - 1, tag_count))
+    weeks = stats.get("weeks", {})
+    before = dict(weeks, **{str(week): weeks[str(week)] - 1})
+    metrics.append((
+        "streak", None, None,
+        max(streak_through(before, w) for w in (week - 1, week, week + 1)),
+        streak_through(weeks, week),
+    ))
+    return rule_achievements(user_id, metrics)
+
+async def save_achievements(database, achievements: List[dict]) -> int:
+    """Insert awarded achievements, skipping any the user already holds. Returns the count inserted."""
+    if not achievements:
+        return 0
+    try:
+        await database.achievements.insert_many(achievements, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != 11000 for error in errors):
+            raise
+        return len(achievements) - len(errors)
+    return len(achievements)
+
+async def backfill_achievements(database, batch_size: int = 500) -> Dict[str, int]:
+    """Recompute user_stats and rule-based achievements from attendance, a batch of users at a time.
+
+    Achievements awarded before rules existed are matched to their rule by title; copies
+    of the same badge left by concurrent check-ins are removed.
+    """
+    legacy_rules = {rule["title"]: rule["id"] for rule in ACHIEVEMENT_RULES if rule["metric"] == "attendance"}
+    totals = {"users": 0, "awarded": 0, "relabelled": 0, "duplicates_removed": 0}
+    last_id = None
+    while True:
+        query = {"id": {"$gt": last_id}} if last_id else {}
+        users = await database.users.find(query, {"_id": 0, "id": 1}).sort("id", ASCENDING).to_list(batch_size)
+        if not users:
+            break
+        user_ids = [user["id"] for user in users]
+        last_id = user_ids[-1]
+
+        attendance = await database.attendance.find(
+            {"user_id": {"$in": user_ids}}, {"_id": 0, "user_id": 1, "event_id": 1, "checked_in_at": 1}
+        ).to_list(None)
+        event_ids = list({row["event_id"] for row in attendance})
+        events = {
+            event["id"]: event
+            async for event in database.events.find({"id": {"$in": event_ids}}, {"_id": 0, "id": 1, "club_id": 1, "tags": 1})
+        }
+        now = datetime.now(timezone.utc)
+        stats = {
+            user_id: {
+                "user_id": user_id, "attendance_count": 0, "clubs": {}, "tags": {}, "tag_labels": {},
+                "weeks": {}, "months": {}, "updated_at": now,
+            }
+            for user_id in user_ids
+        }
+        tag_labels: Dict[str, str] = {}
+        for row in attendance:
+            event = events.get(row["event_id"])
+            if event is None:
+                continue
+            user_stats = stats[row["user_id"]]
+            checked_in_at = parse_datetime_fields(dict(row), "checked_in_at")["checked_in_at"]
+            week, month = str(week_index(checked_in_at)), month_key(checked_in_at)
+            user_stats["attendance_count"] += 1
+            user_stats["clubs"][event["club_id"]] = user_stats["clubs"].get(event["club_id"], 0) + 1
+            user_stats["weeks"][week] = user_stats["weeks"].get(week, 0) + 1
+            user_stats["months"][month] = user_stats["months"].get(month, 0) + 1
+            for key, tag in counted_tags(event).items():
+                tag_labels[key] = tag
+                user_stats["tags"][key] = user_stats["tags"].get(key, 0) + 1
+                user_stats["tag_labels"][key] = tag
+
+        held: set = set()
+        relabels, duplicates = [], []
+        async for achievement in database.achievements.find(
+            {"user_id": {"$in": user_ids}}, {"_id": 0, "id": 1, "user_id": 1, "title": 1, "rule_id": 1}
+        ).sort("earned_at", ASCENDING):
+            rule_id = achievement.get("rule_id") or legacy_rules.get(achievement["title"])
+            if rule_id is None:
+                continue
+            key = (achievement["user_id"], rule_id)
+            if key in held:
+                duplicates.append(achievement["id"])
+            else:
+                held.add(key)
+                if not achievement.get("rule_id"):
+                    relabels.append(UpdateOne({"id": achievement["id"]}, {"$set": {"rule_id": rule_id}}))
+
+        awarded = []
+        for user_id, user_stats in stats.items():
+            metrics = [("attendance", None, None, 0, user_stats["attendance_count"])]
+            metrics += [("club", club_id, club_id, 0, n) for club_id, n in user_stats["clubs"].items()]
+            metrics += [("tag", key, tag_labels[key], 0, n) for key, n in user_stats["tags"].items()]
+            metrics.append(("streak", None, None, 0, longest_streak(user_stats["weeks"])))
+            awarded += [
+                a for a in rule_achievements(user_id, metrics) if (user_id, a["rule_id"]) not in held
+            ]
+
+        if duplicates:
+            await database.achievements.delete_many({"id": {"$in": duplicates}})
+        if relabels:
+            await database.achievements.bulk_write(relabels, ordered=False)
+        await database.user_stats.bulk_write([
+            ReplaceOne({"user_id": user_id}, doc, upsert=True) for user_id, doc in stats.items()
+        ], ordered=False)
+        totals["users"] += len(user_ids)
+        totals["awarded"] += await save_achievements(database, awarded)
+        totals["relabelled"] += len(relabels)
+        totals["duplicates_removed"] += len(duplicates)
+        for user_id in user_ids:
+            await portfolio_cache.delete(user_id)
+    await record_migration(database, USER_STATS_MIGRATION)
+    return totals
+
+# Student portfolio
+# GET /analytics/student/{id}/portfolio: attendance history joined with each event and club
+# in one aggregation, plus summary counts read from user_stats. The first page is cached per
+# user; check-ins (which are also the only way achievements are earned) invalidate it.
+STUDENT_RECORD_ROLES = ['coordinator', 'faculty', 'admin']
+
+portfolio_cache: Any = None  # built by configure()
+
+def require_student_access(current_user: User, user_id: str) -> None:
+    if current_user.id != user_id and current_user.role not in STUDENT_RECORD_ROLES:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+def portfolio_history_pipeline(user_id: str, cursor: Optional[str], limit: int) -> List[dict]:
+    return [
+        {"$match": keyset_filter({"user_id": user_id}, "checked_in_at", DESCENDING, cursor)},
+        {"$sort": {"checked_in_at": DESCENDING, "id": DESCENDING}},
+        {"$limit": limit + 1},
+        # Plain equality joins, trimmed by the $project below: at most limit + 1 rows carry
+        # the whole event, and the join stays portable to engines without $lookup pipelines
+        {"$lookup": {"from": "events", "localField": "event_id", "foreignField": "id", "as": "event"}},
+        {"$unwind": {"path": "$event", "preserveNullAndEmptyArrays": True}},
+        {"$lookup": {"from": "clubs", "localField": "event.club_id", "foreignField": "id", "as": "club"}},
+        {"$project": {
+            "_id": 0, "id": 1, "event_id": 1, "checked_in_at": 1,
+            "event.title": 1, "event.date": 1, "event.club_id": 1, "event.tags": 1,
+            "club_name": {"$arrayElemAt": ["$club.name", 0]},
+        }},
+    ]
+
+async def portfolio_history(user_id: str, cursor: Optional[str], limit: int) -> tuple:
+    rows = await db.attendance.aggregate(portfolio_history_pipeline(user_id, cursor, limit)).to_list(limit + 1)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["checked_in_at"], rows[-1]["id"])
+    history = []
+    for row in rows:
+        # Deleted events leave the attendance row without an event
+        event = row.pop("event", None)
+        club_name = row.pop("club_name", None)
+        if event:
+            event = {**parse_datetime_fields(event, 'date'), "club_name": club_name}
+        history.append({**decode_attendance(row), "event": event})
+    return history, next_cursor
+
+async def portfolio_summary(user_id: str) -> dict:
+    stats = await db.user_stats.find_one(
+        {"user_id": user_id}, {"_id": 0, "attendance_count": 1, "clubs": 1, "tags": 1, "tag_labels": 1, "months": 1}
+    ) or {}
+    clubs = stats.get("clubs", {})
+    names = {
+        club["id"]: club.get("name")
+        async for club in db.clubs.find({"id": {"$in": list(clubs)}}, {"_id": 0, "id": 1, "name": 1})
+    }
+    labels = stats.get("tag_labels", {})
+    return {
+        "attendance_count": stats.get("attendance_count", 0),
+        "clubs": sorted(
+            ({"club_id": club_id, "name": names.get(club_id), "count": n} for club_id, n in clubs.items()),
+            key=lambda entry: (-entry["count"], entry["club_id"]),
+        ),
+        "tags": sorted(
+            ({"tag": labels.get(key, key), "count": n} for key, n in stats.get("tags", {}).items()),
+            key=lambda entry: (-entry["count"], entry["tag"]),
+        ),
+        "months": [{"month": month, "count": n} for month, n in sorted(stats.get("months", {}).items())],
+    }
+
+async def build_portfolio(user_id: str) -> dict:
+    achievements = await db.achievements.find({"user_id": user_id}, {"_id": 0}) \
+        .sort("earned_at", DESCENDING).to_list(MAX_PAGE_SIZE)
+    summary = await portfolio_summary(user_id)
+    history, next_cursor = await portfolio_history(user_id, None, DEFAULT_PAGE_SIZE)
+    return jsonable_encoder({
+        "user_id": user_id,
+        "attendance_count": summary.pop("attendance_count"),
+        "summary": summary,
+        "achievements": [decode_achievement(a) for a in achievements],
+        "attendance_history": history,
+        "next_cursor": next_cursor
+    })
+
+# Bulk export and import
+# GET /clubs/{id}/export/{dataset} streams a club's transactions, attendance or RSVPs over a
+# date range as CSV or NDJSON. Rows are read off Motor cursors batch by batch and encoded
+# (and gzip-compressed, when the client accepts it) as they arrive, so memory stays flat
+# whatever the export size. Attendance and RSVPs are walked event by event over the club's
+# events dated in the range, keeping every read an index range, and each batch is joined
+# with its users in one query. POST /finances/import takes the transaction columns of an
+# export as CSV or NDJSON, optionally gzipped: rows are validated and written in chunks
+# with one unordered insert_many and one ledger $inc per chunk, and the response reports
+# every rejected row by the line it starts on. A malformed CSV record (say an unclosed
+# quote) is rejected alone and parsing resumes on its next line. Rows keep their id, so
+# re-sending an export reports duplicates instead of double counting.
+EXPORT_BATCH_SIZE = 1000
+EXPORT_GZIP_LEVEL = 6
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+EXPORT_COLUMNS = {
+    "transactions": ["id", "club_id", "created_at", "type", "amount", "category", "description",
+                     "receipt_url", "created_by"],
+    "attendance": ["event_id", "event_title", "event_date", "user_id", "user_name", "user_email",
+                   "checked_in_at"],
+    "rsvps": ["event_id", "event_title", "event_date", "user_id", "user_name", "user_email",
+              "status", "created_at"],
+}
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_ROWS = 100000
+IMPORT_MAX_ERRORS = 1000
+IMPORT_MAX_LINE = 64 * 1024
+IMPORT_REQUIRED_COLUMNS = {"type", "amount", "category", "description"}
+# Leading characters that make spreadsheets evaluate a cell as a formula
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, *params = [part.strip() for part in coding.split(";")]
+        if name.lower() == "gzip":
+            q = next((param[2:] for param in params if param.startswith("q=")), "1")
+            try:
+                return float(q) > 0
+            except ValueError:
+                return False
+    return False
+
+def csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+def encode_export_rows(fmt: str, columns: List[str], rows: List[dict]) -> bytes:
+    if fmt == "ndjson":
+        return b"".join(
+            orjson.dumps({c: row.get(c) for c in columns}, option=orjson.OPT_UTC_Z) + b"\n" for row in rows
+        )
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows([csv_cell(row.get(c)) for c in columns] for row in rows)
+    return buffer.getvalue().encode()
+
+def export_response(request: Request, batches: AsyncIterator[List[dict]], fmt: str, columns: List[str],
+                    filename: str) -> StreamingResponse:
+    gzip = accepts_gzip(request)
+
+    async def body():
+        compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if gzip else None
+        header = (",".join(columns) + "\n").encode() if fmt == "csv" else b""
+        async for rows in batches:
+            chunk = header + encode_export_rows(fmt, columns, rows)
+            header = b""
+            # The compressor holds data back until it has a full block, so this may be empty
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+        tail = compressor.compress(header) + compressor.flush() if compressor else header
+        if tail:
+            yield tail
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{fmt}"', "Vary": "Accept-Encoding"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body(), media_type=EXPORT_MEDIA_TYPES[fmt], headers=headers)
+
+async def batched(cursor, size: int) -> AsyncIterator[List[dict]]:
+    batch = []
+    async for doc in cursor.batch_size(size):
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def export_transactions(club_id: str, start: Optional[datetime], end: Optional[datetime]) -> AsyncIterator[List[dict]]:
+    query = {"club_id": club_id, **datetime_range('created_at', start, end)}
+    async for docs in batched(find_sorted(db.transactions, query, 'created_at', ASCENDING, None), EXPORT_BATCH_SIZE):
+        yield [decode_transaction(doc) for doc in docs]
+
+async def club_event_docs(collection, sort: List[tuple], club_id: str, start: Optional[datetime],
+                          end: Optional[datetime]) -> AsyncIterator[dict]:
+    """Documents of `collection` for the club's events dated in [start, end), event by event."""
+    events = db.events.find(
+        {"club_id": club_id, **datetime_range('date', start, end)}, {"_id": 0, "id": 1, "title": 1, "date": 1}
+    ).sort([("date", ASCENDING), ("id", ASCENDING)])
+    async for event in events.batch_size(EXPORT_BATCH_SIZE):
+        parse_datetime_fields(event, 'date')
+        async for doc in collection.find({"event_id": event["id"]}, {"_id": 0}).sort(sort).batch_size(EXPORT_BATCH_SIZE):
+            doc["event_title"] = event.get("title")
+            doc["event_date"] = event.get("date")
+            yield doc
+
+async def with_users(rows: List[dict]) -> List[dict]:
+    user_ids = list({row["user_id"] for row in rows})
+    users = await db.users.find(
+        {"id": {"$in": user_ids}}, {"_id": 0, "id": 1, "name": 1, "email": 1}
+    ).to_list(len(user_ids))
+    by_id = {user["id"]: user for user in users}
+    for row in rows:
+        user = by_id.get(row["user_id"], {})
+        row["user_name"] = user.get("name")
+        row["user_email"] = user.get("email")
+    return rows
+
+async def export_event_records(collection, sort: List[tuple], decode, club_id: str, start: Optional[datetime],
+                               end: Optional[datetime]) -> AsyncIterator[List[dict]]:
+    batch = []
+    async for doc in club_event_docs(collection, sort, club_id, start, end):
+        batch.append(decode(doc))
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield await with_users(batch)
+            batch = []
+    if batch:
+        yield await with_users(batch)
+
+def export_batches(dataset: str, club_id: str, start: Optional[datetime], end: Optional[datetime]) -> AsyncIterator[List[dict]]:
+    if dataset == "transactions":
+        return export_transactions(club_id, start, end)
+    if dataset == "attendance":
+        return export_event_records(
+            db.attendance, [("checked_in_at", ASCENDING), ("id", ASCENDING)], decode_attendance, club_id, start, end
+        )
+    # Served by the (event_id, status, created_at, id) index
+    return export_event_records(
+        db.rsvps, [("status", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], decode_rsvp, club_id, start, end
+    )
+
+async def request_lines(request: Request) -> AsyncIterator[str]:
+    """Lines of a UTF-8 request body, gunzipped on the fly with Content-Encoding: gzip."""
+    gzip = request.headers.get("content-encoding", "").strip().lower() == "gzip"
+    decompressor = zlib.decompressobj(31) if gzip else None
+    # utf-8-sig drops the byte order mark spreadsheet exports start with
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    try:
+        async for chunk in request.stream():
+            while chunk:
+                if decompressor:
+                    # Bounded output per step, so a small compressed body can't balloon in memory
+                    data = decompressor.decompress(chunk, IMPORT_MAX_LINE)
+                    chunk = decompressor.unconsumed_tail
+                else:
+                    data, chunk = chunk, b""
+                *lines, pending = (pending + decoder.decode(data)).split("\n")
+                for line in lines:
+                    yield line.rstrip("\r")
+                if len(pending) > IMPORT_MAX_LINE:
+                    raise HTTPException(status_code=400, detail=f"Lines are limited to {IMPORT_MAX_LINE} bytes")
+        pending += decoder.decode(decompressor.flush() if decompressor else b"", final=True)
+    except zlib.error:
+        raise HTTPException(status_code=400, detail="Body is not valid gzip")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8")
+    if pending.strip():
+        yield pending.rstrip("\r")
+
+class CSVLineFeed:
+    """Physical lines handed to one csv.reader, remembering those of the record being read.
+
+    A record may span lines (quoted newlines) but not IMPORT_MAX_LINE characters, so an
+    unclosed quote costs at most that much before the reader gives up on the record.
+    """
+
+    def __init__(self):
+        self.pending: deque = deque()  # (line number, text)
+        self.pending_size = 0
+        self.record: List[tuple] = []
+        self.record_size = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.pending:
+            raise StopIteration
+        number, text = self.pending.popleft()
+        self.pending_size -= len(text)
+        self.record.append((number, text))
+        self.record_size += len(text)
+        if self.record_size > IMPORT_MAX_LINE:
+            raise csv.Error(f"records are limited to {IMPORT_MAX_LINE} bytes")
+        return text + "\n"
+
+    def add(self, number: int, text: str) -> None:
+        self.pending.append((number, text))
+        self.pending_size += len(text)
+
+    def start_record(self) -> None:
+        self.record, self.record_size = [], 0
+
+    def reread_after_first_line(self) -> None:
+        """Queue the lines a failed record swallowed, so parsing resumes at its second line."""
+        for number, text in reversed(self.record[1:]):
+            self.pending.appendleft((number, text))
+            self.pending_size += len(text)
+
+async def import_rows(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[tuple]:
+    """(line number, row) pairs of an import body; row is a dict, or a string saying why
+    the record starting on that line can't be parsed."""
+    if fmt == "ndjson":
+        number = 0
+        async for line in lines:
+            number += 1
+            if not line.strip():
+                continue
+            try:
+                row = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                yield number, "invalid JSON"
+                continue
+            yield number, row if isinstance(row, dict) else "expected a JSON object"
+        return
+
+    # One strict reader over the whole body. Before each record, more than IMPORT_MAX_LINE
+    # characters are buffered (or the body has ended), so the reader never runs dry mid-record.
+    feed = CSVLineFeed()
+    reader = csv.reader(feed, strict=True)
+    lines = aiter(lines)
+    number = 0
+    exhausted = False
+    header = None
+    while True:
+        while not exhausted and feed.pending_size <= IMPORT_MAX_LINE:
+            try:
+                line = await anext(lines)
+            except StopAsyncIteration:
+                exhausted = True
+                break
+            number += 1
+            feed.add(number, line)
+        if not feed.pending:
+            return
+        feed.start_record()
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            if header is None:
+                raise HTTPException(status_code=400, detail=f"Invalid CSV header: {e}")
+            yield feed.record[0][0], f"invalid CSV: {e}"
+            feed.reread_after_first_line()
+            continue
+        except StopIteration:
+            return
+        if not values:
+            continue
+        record_number = feed.record[0][0]
+        if header is None:
+            header = [name.strip() for name in values]
+            missing = IMPORT_REQUIRED_COLUMNS - set(header)
+            if missing:
+                raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(sorted(missing))}")
+        elif len(values) != len(header):
+            yield record_number, f"expected {len(header)} columns, got {len(values)}"
+        else:
+            yield record_number, dict(zip(header, values))
+
+def validation_message(error: ValueError) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+def import_document(row: dict, club_id: str, user_id: str) -> dict:
+    """Validate one import row into a transaction document; raises ValueError."""
+    # Empty cells mean "not given", so optional columns fall back to their defaults
+    data = TransactionImportRow.model_validate({k: v for k, v in row.items() if v not in ("", None)})
+    if data.type not in TRANSACTION_TYPES:
+        raise ValueError("type must be income or expense")
+    if not math.isfinite(data.amount):
+        raise ValueError("amount must be a finite number")
+    if data.club_id not in (None, club_id):
+        raise ValueError(f"club_id must be {club_id}")
+    fields = data.model_dump(exclude_none=True, exclude={"club_id"})
+    return to_document(Transaction(**fields, club_id=club_id, created_by=user_id))
+
+async def insert_import_chunk(club_id: str, chunk: List[tuple], errors: List[dict]) -> int:
+    """Insert (line number, document) pairs; returns how many were inserted and records the rest."""
+    failed = {}
+    try:
+        await db.transactions.insert_many([doc for _, doc in chunk], ordered=False)
+    except BulkWriteError as e:
+        failed = {error["index"]: error for error in e.details.get("writeErrors", [])}
+    income = expense = 0.0
+    for index, (row_number, doc) in enumerate(chunk):
+        error = failed.get(index)
+        if error is not None:
+            message = "duplicate id" if error.get("code") == 11000 else error.get("errmsg", "write failed")
+            errors.append({"row": row_number, "error": message})
+        elif doc["type"] == "income":
+            income += doc["amount"]
+        else:
+            expense += doc["amount"]
+    inserted = len(chunk) - len(failed)
+    if inserted:
+        await apply_to_ledger(club_id, income, expense, inserted)
+    return inserted
+
+# Live updates
+# Dashboards subscribe to counter changes for events or whole clubs over SSE (GET /live) or a
+# WebSocket (/live/ws) instead of re-polling. Every counter write publishes the event document
+# it returned to an in-process bus. A connection keeps only the latest counters per event until
+# its writer wakes up, waits LIVE_COALESCE_SECONDS for more, then sends the fields that changed
+# since its last message: a check-in burst becomes a few batched messages, and a slow client
+# holds at most one pending entry per event. With LIVE_CHANGE_STREAM=true each worker also
+# feeds its bus from a change stream on events (replica set required) to pick up other
+# workers' writes.
+LIVE_FIELDS = ("rsvp_count", "attendance_count")
+LIVE_MAX_TOPICS = 100
+
+class LiveSubscription:
+    def __init__(self, topics: List[str]):
+        self.topics = topics
+        self.pending: Dict[str, dict] = {}
+        self.sent: Dict[str, dict] = {}
+        self.ready = asyncio.Event()
+
+    def offer(self, update: dict) -> None:
+        self.pending[update["id"]] = update
+        self.ready.set()
+
+    async def next_batch(self, timeout: float) -> Optional[List[dict]]:
+        """Wait for updates and return their deltas, or None after `timeout` idle seconds."""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        await asyncio.sleep(settings.live_coalesce_seconds)
+        self.ready.clear()
+        pending, self.pending = self.pending, {}
+        deltas = []
+        for event_id, update in pending.items():
+            last = self.sent.setdefault(event_id, {})
+            changed = {f: update[f] for f in LIVE_FIELDS if f in update and last.get(f) != update[f]}
+            if changed:
+                last.update(changed)
+                deltas.append({"id": event_id, "club_id": update.get("club_id"), **changed})
+        return deltas
+
+class LiveBus:
+    def __init__(self):
+        self.topics: Dict[str, set] = {}
+        self.connections = 0
+
+    def full(self) -> bool:
+        return self.connections >= settings.live_max_connections
+
+    def subscribe(self, topics: List[str]) -> LiveSubscription:
+        subscription = LiveSubscription(topics)
+        for topic in topics:
+            self.topics.setdefault(topic, set()).add(subscription)
+        self.connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: LiveSubscription) -> None:
+        for topic in subscription.topics:
+            subscribers = self.topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.topics[topic]
+        self.connections -= 1
+
+    def publish(self, event: Optional[dict]) -> None:
+        """Fan an event's counters out to its subscribers. Never blocks the writer."""
+        if not event or not self.topics:
+            return
+        update = {"id": event["id"], "club_id": event.get("club_id")}
+        update.update({f: event[f] for f in LIVE_FIELDS if f in event})
+        for topic in (f"event:{event['id']}", f"club:{event.get('club_id')}"):
+            for subscription in self.topics.get(topic, ()):
+                subscription.offer(update)
+
+live_bus = LiveBus()
+
+async def watch_event_counters(database) -> None:
+    """Publish counter updates made by any worker, resuming after errors."""
+    pipeline = [
+        {"$match": {
+            "operationType": "update",
+            "$or": [{f"updateDescription.updatedFields.{f}": {"$exists": True}} for f in LIVE_FIELDS],
+        }},
+        {"$project": {f"fullDocument.{f}": 1 for f in ("id", "club_id") + LIVE_FIELDS}},
+    ]
+    resume_after = None
+    while True:
+        try:
+            async with database.events.watch(pipeline, full_document="updateLookup", resume_after=resume_after) as stream:
+                async for change in stream:
+                    resume_after = stream.resume_token
+                    event = change.get("fullDocument")
+                    if event:
+                        read_cache.bump(f"event:{event['id']}")
+                    live_bus.publish(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"Event change stream failed, retrying in 5s: {e}")
+            await asyncio.sleep(5)
+
+async def open_live_subscription(event_ids: List[str], club_ids: List[str]) -> LiveSubscription:
+    """Subscribe and queue the current counters of the requested events as the first message."""
+    subscription = live_bus.subscribe([f"event:{i}" for i in event_ids] + [f"club:{c}" for c in club_ids])
+    if event_ids:
+        async for event in db.events.find(
+            {"id": {"$in": event_ids}}, {"_id": 0, "id": 1, "club_id": 1, **{f: 1 for f in LIVE_FIELDS}}
+        ):
+            subscription.offer(event)
+    return subscription
+
+def check_live_request(event_ids: List[str], club_ids: List[str]) -> None:
+    if not event_ids and not club_ids:
+        raise HTTPException(status_code=400, detail="Subscribe to at least one event_id or club_id")
+    if len(event_ids) + len(club_ids) > LIVE_MAX_TOPICS:
+        raise HTTPException(status_code=400, detail=f"At most {LIVE_MAX_TOPICS} subscriptions per connection")
+    if live_bus.full():
+        raise HTTPException(status_code=503, detail="Too many live connections", headers={"Retry-After": "5"})
 
 # Auth Routes
 @api_router.post("/auth/register", response_model=Token)
@@ -232,11 +2722,13 @@ async def register(user_data: UserRegister):
         role=user_data.role
     )
     
-    user_dict = user.model_dump()
-    user_dict['password'] = hash_password(user_data.password)
-    user_dict['created_at'] = user_dict['created_at'].isoformat()
+    user_dict = to_document(user)
+    user_dict['password'] = await hash_password(user_data.password)
     
-    await db.users.insert_one(user_dict)
+    try:
+        await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     
     access_token = create_access_token(data={"sub": user.id})
     return Token(access_token=access_token, token_type="bearer", user=user)
@@ -244,9 +2736,16 @@ async def register(user_data: UserRegister):
 @api_router.post("/auth/login", response_model=Token)
 async def login(credentials: UserLogin):
     user_doc = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    if not user_doc or not verify_password(credentials.password, user_doc['password']):
+    if not user_doc:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
+    valid, new_hash = await verify_password(credentials.password, user_doc['password'])
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Transparently upgrade hashes that passlib flags as deprecated
+        await db.users.update_one({"id": user_doc['id']}, {"$set": {"password": new_hash}})
+    
     user = User(**{k: v for k, v in user_doc.items() if k != 'password'})
     access_token = create_access_token(data={"sub": user.id})
     return Token(access_token=access_token, token_type="bearer", user=user)
@@ -259,57 +2758,181 @@ async def get_me(current_user: User = Depends(get_current_user)):
 @api_router.put("/users/profile", response_model=User)
 async def update_profile(name: str, current_user: User = Depends(get_current_user)):
     await db.users.update_one({"id": current_user.id}, {"$set": {"name": name}})
+    await invalidate_principal(current_user.id)
     current_user.name = name
     return current_user
 
 @api_router.put("/users/interests")
 async def update_interests(interests: List[str], current_user: User = Depends(get_current_user)):
     await db.users.update_one({"id": current_user.id}, {"$set": {"interests": interests}})
+    await invalidate_principal(current_user.id)
     return {"message": "Interests updated"}
 
 # Club Routes
 @api_router.get("/clubs", response_model=List[Club])
-async def get_clubs():
-    clubs = await db.clubs.find({}, {"_id": 0}).to_list(1000)
-    for club in clubs:
-        if isinstance(club.get('created_at'), str):
-            club['created_at'] = datetime.fromisoformat(club['created_at'])
-    return clubs
+async def get_clubs(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+):
+    if stream:
+        return await paginated_list(
+            response, db.clubs, {}, 'created_at', ASCENDING, cursor, limit, stream, decode_club
+        )
+    
+    async def load():
+        clubs, next_cursor = await fetch_page(
+            db.clubs, {}, 'created_at', ASCENDING, cursor, limit or DEFAULT_PAGE_SIZE, decode_club
+        )
+        return render_json(Club, clubs), {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    
+    return await cached_response(request, "club_list", ("clubs", cursor, limit), "clubs", CLUB_CACHE_CONTROL, load)
 
 @api_router.post("/clubs", response_model=Club)
 async def create_club(club: Club, current_user: User = Depends(get_current_user)):
     if current_user.role not in ['admin']:
         raise HTTPException(status_code=403, detail="Only admins can create clubs")
     
-    club_dict = club.model_dump()
-    club_dict['created_at'] = club_dict['created_at'].isoformat()
+    club_dict = to_document(club)
     await db.clubs.insert_one(club_dict)
+    read_cache.bump("clubs", f"club:{club.id}")
     return club
 
 @api_router.get("/clubs/{club_id}", response_model=Club)
-async def get_club(club_id: str):
-    club = await db.clubs.find_one({"id": club_id}, {"_id": 0})
-    if not club:
-        raise HTTPException(status_code=404, detail="Club not found")
-    if isinstance(club.get('created_at'), str):
-        club['created_at'] = datetime.fromisoformat(club['created_at'])
-    return Club(**club)
+async def get_club(club_id: str, request: Request):
+    async def load():
+        club = await db.clubs.find_one({"id": club_id}, {"_id": 0})
+        if not club:
+            raise HTTPException(status_code=404, detail="Club not found")
+        return render_json(Club, decode_club(club)), {}
+    
+    return await cached_response(request, "club", ("club", club_id), f"club:{club_id}", CLUB_CACHE_CONTROL, load)
 
 # Event Routes
 @api_router.get("/events", response_model=List[Event])
-async def get_events(tag: Optional[str] = None, current_user: User = Depends(get_current_user)):
+async def get_events(
+    response: Response,
+    tag: Optional[str] = None,
+    club_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    current_user: User = Depends(get_current_user),
+):
     query = {}
     if tag:
         query['tags'] = tag
+    if club_id:
+        query['club_id'] = club_id
     
-    events = await db.events.find(query, {"_id": 0}).to_list(1000)
-    for event in events:
-        if isinstance(event.get('created_at'), str):
-            event['created_at'] = datetime.fromisoformat(event['created_at'])
-        if isinstance(event.get('date'), str):
-            event['date'] = datetime.fromisoformat(event['date'])
+    return await paginated_list(
+        response, db.events, query, 'date', ASCENDING, cursor, limit, stream, decode_event,
+        EVENT_PROJECTION, model=Event
+    )
+
+# Event search: the page is an index-backed keyset read, a find() in (date, id) order (the
+# tag and club variants of that index serve the filtered views) or, for relevance, a $text
+# aggregation whose $sort + $limit only keeps the top page of matches. Total and per-tag /
+# per-club counts come from one $facet aggregation over every match; it is cached per
+# filter set in read_cache under the "events" stamp, which event creation bumps, so the
+# Discovery view does not recount on every request or page.
+SEARCH_FACET_LIMIT = 50
+
+async def event_search_page(match: dict, sort: str, cursor: Optional[str], limit: int) -> List[dict]:
+    """Up to `limit` + 1 matching events from `cursor` on; relevance rows carry their score."""
+    if sort == "date":
+        return await find_sorted(db.events, match, "date", ASCENDING, cursor, EVENT_PROJECTION) \
+            .limit(limit + 1).to_list(limit + 1)
+    pipeline: List[dict] = [{"$match": match}, {"$addFields": {"score": {"$meta": "textScore"}}}]
+    if cursor:
+        pipeline.append({"$match": keyset_filter({}, "score", DESCENDING, cursor)})
+    pipeline += [
+        {"$sort": {"score": DESCENDING, "id": DESCENDING}},
+        {"$limit": limit + 1},
+        {"$project": EVENT_PROJECTION},
+    ]
+    return await db.events.aggregate(pipeline).to_list(limit + 1)
+
+def event_facets_pipeline(match: dict) -> List[dict]:
+    return [{"$match": match}, {"$facet": {
+        "total": [{"$count": "count"}],
+        "tags": [
+            {"$unwind": "$tags"},
+            {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+            {"$sort": {"count": DESCENDING, "_id": ASCENDING}},
+            {"$limit": SEARCH_FACET_LIMIT},
+            {"$project": {"_id": 0, "value": "$_id", "count": 1}},
+        ],
+        "clubs": [
+            {"$group": {"_id": "$club_id", "count": {"$sum": 1}}},
+            {"$sort": {"count": DESCENDING, "_id": ASCENDING}},
+            {"$limit": SEARCH_FACET_LIMIT},
+            {"$lookup": {"from": "clubs", "localField": "_id", "foreignField": "id", "as": "club"}},
+            {"$project": {"_id": 0, "value": "$_id", "count": 1,
+                          "label": {"$arrayElemAt": ["$club.name", 0]}}},
+        ],
+    }}]
+
+async def event_search_facets(match: dict) -> dict:
+    """{"total", "tags", "clubs"} over every event matching `match`."""
+    key = ("event_facets", json.dumps(match, sort_keys=True, default=str))
+    entry = read_cache.get(key)
+    record_cache("event_facets", entry is not None)
+    if entry is None:
+        async def fill():
+            seq = read_cache.begin()
+            result = (await db.events.aggregate(event_facets_pipeline(match)).to_list(1))[0]
+            facets = {
+                "total": result["total"][0]["count"] if result["total"] else 0,
+                "tags": result["tags"],
+                "clubs": result["clubs"],
+            }
+            return read_cache.put(key, "events", seq, orjson.dumps(facets), {})
+        entry = await read_flight.do(key, fill)
+    return orjson.loads(entry[3])
+
+@api_router.get("/events/search")
+async def search_events(
+    q: Optional[str] = Query(None, max_length=200),
+    tags: List[str] = Query([]),
+    tag_mode: str = Query("any", pattern="^(any|all)$"),
+    club_id: List[str] = Query([]),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    sort: Optional[str] = Query(None, pattern="^(relevance|date)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+):
+    q = (q or "").strip()
+    sort = sort or ("relevance" if q else "date")
+    if sort == "relevance" and not q:
+        raise HTTPException(status_code=400, detail="Relevance sort requires a search query")
+    
+    match = datetime_range('date', date_from, date_to)
+    if q:
+        match["$text"] = {"$search": q}
+    if tags:
+        match["tags"] = {"$all" if tag_mode == "all" else "$in": tags}
+    if club_id:
+        match["club_id"] = {"$in": club_id}
     
-    return events
+    docs, facets = await asyncio.gather(
+        event_search_page(match, sort, cursor, limit), event_search_facets(match)
+    )
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1]["score" if sort == "relevance" else "date"], docs[-1]["id"])
+    
+    return {
+        "events": [Event(**decode_event(doc)) for doc in docs],
+        "total": facets["total"],
+        "facets": {"tags": facets["tags"], "clubs": facets["clubs"]},
+        "next_cursor": next_cursor
+    }
 
 @api_router.post("/events", response_model=Event)
 async def create_event(event_data: EventCreate, current_user: User = Depends(get_current_user)):
@@ -318,109 +2941,288 @@ async def create_event(event_data: EventCreate, current_user: User = Depends(get
     
     event = Event(**event_data.model_dump())
     
-    qr_data = f"event:{event.id}"
-    event.qr_code = generate_qr_code(qr_data)
-    
-    event_dict = event.model_dump()
-    event_dict['created_at'] = event_dict['created_at'].isoformat()
-    event_dict['date'] = event_dict['date'].isoformat()
+    event_dict = to_document(event)
     
     await db.events.insert_one(event_dict)
+    read_cache.bump("events")
+    recommender.add(event_dict)
+    await update_club_stats(event_dict, events=1)
     return event
 
 @api_router.get("/events/{event_id}", response_model=Event)
-async def get_event(event_id: str):
-    event = await db.events.find_one({"id": event_id}, {"_id": 0})
-    if not event:
+async def get_event(event_id: str, request: Request):
+    async def load():
+        event = await db.events.find_one({"id": event_id}, EVENT_PROJECTION)
+        if not event:
+            raise HTTPException(status_code=404, detail="Event not found")
+        return render_json(Event, decode_event(event)), {}
+    
+    return await cached_response(request, "event", ("event", event_id), f"event:{event_id}", EVENT_CACHE_CONTROL, load)
+
+@api_router.get("/events/{event_id}/qr")
+async def get_event_qr(
+    event_id: str,
+    request: Request,
+    fmt: str = Query("png", alias="format", pattern="^(png|svg)$"),
+):
+    key = (event_id, fmt)
+    entry = qr_cache.get(key)
+    if entry is None:
+        event = await db.events.find_one({"id": event_id}, {"_id": 1})
+        if not event:
+            raise HTTPException(status_code=404, detail="Event not found")
+        loop = asyncio.get_running_loop()
+        body = await loop.run_in_executor(qr_executor, render_qr_code, f"event:{event_id}", fmt)
+        entry = (body, make_etag(body))
+        qr_cache.put(key, entry)
+    
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400, immutable"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=QR_MEDIA_TYPES[fmt], headers=headers)
+
+@api_router.get("/events/{event_id}/activity")
+async def get_event_activity(
+    event_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: str = "minute",
+    current_user: User = Depends(get_current_user),
+):
+    series = await activity_series("event", event_id, start, end, resolution)
+    if not series["points"] and not await db.events.find_one({"id": event_id}, {"_id": 1}):
         raise HTTPException(status_code=404, detail="Event not found")
-    if isinstance(event.get('created_at'), str):
-        event['created_at'] = datetime.fromisoformat(event['created_at'])
-    if isinstance(event.get('date'), str):
-        event['date'] = datetime.fromisoformat(event['date'])
-    return Event(**event)
+    return series
+
+# RSVPs and the waitlist
+# rsvp_count only ever counts confirmed RSVPs and is claimed with a conditional $inc, so
+# it can never pass max_attendees. RSVPs that find the event full are stored with status
+# "waitlisted" and promoted FIFO (by created_at) whenever a confirmed seat is released.
+async def claim_seat(event_id: str) -> Optional[dict]:
+    """Atomically take a seat; returns the updated event, or None if full or missing."""
+    event = await db.events.find_one_and_update(
+        {
+            "id": event_id,
+            "$or": [
+                {"max_attendees": None},
+                {"$expr": {"$lt": ["$rsvp_count", "$max_attendees"]}},
+            ],
+        },
+        {"$inc": {"rsvp_count": 1}},
+        projection=ROLLUP_EVENT_PROJECTION, return_document=ReturnDocument.AFTER
+    )
+    if event:
+        read_cache.bump(f"event:{event_id}")
+    live_bus.publish(event)
+    return event
+
+async def unclaim_seat(event_id: str) -> None:
+    """Hand back a seat taken by claim_seat() for an RSVP that never held it.
+
+    Unlike release_seat(), nobody is promoted and club_stats is left alone: the claim was
+    never counted there.
+    """
+    event = await db.events.find_one_and_update(
+        {"id": event_id}, {"$inc": {"rsvp_count": -1}},
+        projection=ROLLUP_EVENT_PROJECTION, return_document=ReturnDocument.AFTER
+    )
+    if event:
+        read_cache.bump(f"event:{event_id}")
+        live_bus.publish(event)
+
+async def release_seat(event_id: str) -> Optional[str]:
+    """Give a freed seat to the longest-waiting user, or back to the event.
+
+    Returns the promoted user's id, if any.
+    """
+    promoted = await db.rsvps.find_one_and_update(
+        {"event_id": event_id, "status": "waitlisted"},
+        {"$set": {"status": "confirmed", "promoted_at": datetime.now(timezone.utc)}},
+        sort=[("created_at", ASCENDING), ("id", ASCENDING)],
+        projection={"_id": 0, "user_id": 1},
+    )
+    if promoted:
+        return promoted["user_id"]
+    
+    event = await db.events.find_one_and_update(
+        {"id": event_id}, {"$inc": {"rsvp_count": -1}},
+        projection=ROLLUP_EVENT_PROJECTION, return_document=ReturnDocument.AFTER
+    )
+    if event:
+        read_cache.bump(f"event:{event_id}")
+        live_bus.publish(event)
+        await update_club_stats(event, rsvps=-1)
+    return None
 
 @api_router.post("/events/{event_id}/rsvp")
 async def rsvp_event(event_id: str, current_user: User = Depends(get_current_user)):
-    event = await db.events.find_one({"id": event_id})
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
+    event = await claim_seat(event_id)
+    owner = event
+    if event is None:
+        owner = await db.events.find_one({"id": event_id}, {"_id": 0, "id": 1, "club_id": 1})
+        if not owner:
+            raise HTTPException(status_code=404, detail="Event not found")
+    
+    rsvp = RSVP(event_id=event_id, user_id=current_user.id, status="confirmed" if event else "waitlisted")
+    rsvp_dict = to_document(rsvp)
     
-    existing_rsvp = await db.rsvps.find_one({"event_id": event_id, "user_id": current_user.id})
-    if existing_rsvp:
+    # The unique (event_id, user_id) index rejects a second RSVP, even under concurrent clicks
+    try:
+        await db.rsvps.insert_one(rsvp_dict)
+    except DuplicateKeyError:
+        if event:
+            await unclaim_seat(event_id)
         raise HTTPException(status_code=400, detail="Already RSVP'd")
+    await record_activity(owner, "rsvps", [rsvp_dict['created_at']])
     
-    rsvp = RSVP(event_id=event_id, user_id=current_user.id, status="confirmed")
-    rsvp_dict = rsvp.model_dump()
-    rsvp_dict['created_at'] = rsvp_dict['created_at'].isoformat()
+    if event is None:
+        # A seat may have been released between the failed claim and the insert
+        event = await claim_seat(event_id)
+        if event:
+            promoted = await db.rsvps.update_one(
+                {"id": rsvp.id, "status": "waitlisted"}, {"$set": {"status": "confirmed"}}
+            )
+            if not promoted.modified_count:
+                # Someone else's cancellation already promoted us into their seat
+                await unclaim_seat(event_id)
+                return {"message": "RSVP successful", "status": "confirmed"}
     
-    await db.rsvps.insert_one(rsvp_dict)
-    await db.events.update_one({"id": event_id}, {"$inc": {"rsvp_count": 1}})
+    if event is None:
+        position = await db.rsvps.count_documents({
+            "event_id": event_id, "status": "waitlisted", "created_at": {"$lte": rsvp_dict['created_at']}
+        })
+        return {
+            "message": f"Event is full, added to waitlist (position {position})",
+            "status": "waitlisted",
+            "waitlist_position": position
+        }
     
-    return {"message": "RSVP successful"}
+    await update_club_stats(event, rsvps=1)
+    return {"message": "RSVP successful", "status": "confirmed"}
 
 @api_router.delete("/events/{event_id}/rsvp")
 async def cancel_rsvp(event_id: str, current_user: User = Depends(get_current_user)):
-    result = await db.rsvps.delete_one({"event_id": event_id, "user_id": current_user.id})
-    if result.deleted_count == 0:
+    rsvp = await db.rsvps.find_one_and_delete(
+        {"event_id": event_id, "user_id": current_user.id}, projection={"_id": 0, "status": 1}
+    )
+    if not rsvp:
         raise HTTPException(status_code=404, detail="RSVP not found")
+    event = await db.events.find_one({"id": event_id}, {"_id": 0, "id": 1, "club_id": 1})
+    if event:
+        await record_activity(event, "cancellations", [datetime.now(timezone.utc)])
+    if rsvp.get("status") == "waitlisted":
+        return {"message": "Removed from waitlist"}
     
-    await db.events.update_one({"id": event_id}, {"$inc": {"rsvp_count": -1}})
+    await release_seat(event_id)
     return {"message": "RSVP cancelled"}
 
 @api_router.post("/events/{event_id}/checkin")
 async def checkin_event(event_id: str, current_user: User = Depends(get_current_user)):
-    event = await db.events.find_one({"id": event_id})
+    event = await db.events.find_one({"id": event_id}, {"_id": 1})
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    existing_attendance = await db.attendance.find_one({"event_id": event_id, "user_id": current_user.id})
-    if existing_attendance:
+    attendance = Attendance(event_id=event_id, user_id=current_user.id)
+    attendance_dict = to_document(attendance)
+    
+    try:
+        await db.attendance.insert_one(attendance_dict)
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="Already checked in")
+    event = await db.events.find_one_and_update(
+        {"id": event_id}, {"$inc": {"attendance_count": 1}},
+        projection=ROLLUP_EVENT_PROJECTION, return_document=ReturnDocument.AFTER
+    )
+    read_cache.bump(f"event:{event_id}")
+    live_bus.publish(event)
+    # Independent writes to club_stats, activity_buckets and user_stats: one round trip of latency
+    _, _, achievements = await asyncio.gather(
+        update_club_stats(event, attendance=1),
+        record_activity(event, "checkins", [attendance_dict['checked_in_at']]),
+        record_attendance(current_user.id, event, attendance.checked_in_at),
+    )
+    await save_achievements(db, achievements)
+    await portfolio_cache.delete(current_user.id)
     
-    attendance = Attendance(event_id=event_id, user_id=current_user.id)
-    attendance_dict = attendance.model_dump()
-    attendance_dict['checked_in_at'] = attendance_dict['checked_in_at'].isoformat()
-    
-    await db.attendance.insert_one(attendance_dict)
-    await db.events.update_one({"id": event_id}, {"$inc": {"attendance_count": 1}})
-    
-    attendance_count = await db.attendance.count_documents({"user_id": current_user.id})
-    if attendance_count == 1:
-        achievement = Achievement(
-            user_id=current_user.id,
-            title="First Event",
-            description="Attended your first event!",
-            badge_type="bronze"
-        )
-        achievement_dict = achievement.model_dump()
-        achievement_dict['earned_at'] = achievement_dict['earned_at'].isoformat()
-        await db.achievements.insert_one(achievement_dict)
-    elif attendance_count == 10:
-        achievement = Achievement(
-            user_id=current_user.id,
-            title="Active Participant",
-            description="Attended 10 events!",
-            badge_type="silver"
+    return {"message": "Checked in successfully"}
+
+@api_router.post("/events/{event_id}/checkin/batch")
+async def batch_checkin_event(event_id: str, batch: BatchCheckin, current_user: User = Depends(get_current_user)):
+    if current_user.role not in ['coordinator', 'faculty', 'admin']:
+        raise HTTPException(status_code=403, detail="Only coordinators can submit door scans")
+    
+    event = await db.events.find_one({"id": event_id}, {"_id": 1})
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    
+    results: List[Dict[str, str]] = [{"user_id": scan.user_id, "status": ""} for scan in batch.scans]
+    first_scan: Dict[str, int] = {}
+    for index, scan in enumerate(batch.scans):
+        if scan.user_id in first_scan:
+            results[index]["status"] = "duplicate_scan"
+        else:
+            first_scan[scan.user_id] = index
+    
+    known_users = {
+        doc["id"] async for doc in db.users.find({"id": {"$in": list(first_scan)}}, {"_id": 0, "id": 1})
+    }
+    now = datetime.now(timezone.utc)
+    pending = []  # (result index, attendance document)
+    for user_id, index in first_scan.items():
+        if user_id not in known_users:
+            results[index]["status"] = "unknown_user"
+            continue
+        scanned_at = batch.scans[index].scanned_at or now
+        attendance = Attendance(event_id=event_id, user_id=user_id, checked_in_at=scanned_at)
+        attendance_dict = to_document(attendance)
+        pending.append((index, attendance_dict))
+    
+    failed: Dict[int, str] = {}
+    if pending:
+        # Unordered: one round trip, and duplicates (already checked in) don't stop the rest
+        try:
+            await db.attendance.insert_many([doc for _, doc in pending], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = "already_checked_in" if error.get("code") == 11000 else "error"
+    
+    checked_in = []  # (user_id, checked_in_at)
+    for position, (index, doc) in enumerate(pending):
+        results[index]["status"] = failed.get(position, "checked_in")
+        if position not in failed:
+            checked_in.append((doc["user_id"], batch.scans[index].scanned_at or now))
+    
+    if checked_in:
+        event = await db.events.find_one_and_update(
+            {"id": event_id}, {"$inc": {"attendance_count": len(checked_in)}},
+            projection=ROLLUP_EVENT_PROJECTION, return_document=ReturnDocument.AFTER
         )
-        achievement_dict = achievement.model_dump()
-        achievement_dict['earned_at'] = achievement_dict['earned_at'].isoformat()
-        await db.achievements.insert_one(achievement_dict)
-    elif attendance_count == 50:
-        achievement = Achievement(
-            user_id=current_user.id,
-            title="Campus Legend",
-            description="Attended 50 events!",
-            badge_type="gold"
+        read_cache.bump(f"event:{event_id}")
+        live_bus.publish(event)
+        _, _, awarded = await asyncio.gather(
+            update_club_stats(event, attendance=len(checked_in)),
+            record_activity(event, "checkins", [checked_in_at for _, checked_in_at in checked_in]),
+            asyncio.gather(*(
+                record_attendance(user_id, event, checked_in_at) for user_id, checked_in_at in checked_in
+            )),
         )
-        achievement_dict = achievement.model_dump()
-        achievement_dict['earned_at'] = achievement_dict['earned_at'].isoformat()
-        await db.achievements.insert_one(achievement_dict)
+        await save_achievements(db, [a for achievements in awarded for a in achievements])
+        for user_id, _ in checked_in:
+            await portfolio_cache.delete(user_id)
     
-    return {"message": "Checked in successfully"}
+    return {"event_id": event_id, "checked_in": len(checked_in), "results": results}
 
 # Task Routes
 @api_router.get("/tasks")
-async def get_tasks(club_id: Optional[str] = None, current_user: User = Depends(get_current_user)):
+async def get_tasks(
+    response: Response,
+    club_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    current_user: User = Depends(get_current_user),
+):
     query = {}
     if club_id:
         query['club_id'] = club_id
@@ -429,13 +3231,9 @@ async def get_tasks(club_id: Optional[str] = None, current_user: User = Depends(
     elif current_user.role == 'student':
         query['assigned_to'] = current_user.id
     
-    tasks = await db.tasks.find(query, {"_id": 0}).to_list(1000)
-    for task in tasks:
-        if isinstance(task.get('created_at'), str):
-            task['created_at'] = datetime.fromisoformat(task['created_at'])
-        if isinstance(task.get('deadline'), str):
-            task['deadline'] = datetime.fromisoformat(task['deadline'])
-    return tasks
+    return await paginated_list(
+        response, db.tasks, query, 'created_at', DESCENDING, cursor, limit, stream, decode_task
+    )
 
 @api_router.post("/tasks")
 async def create_task(task_data: TaskCreate, current_user: User = Depends(get_current_user)):
@@ -443,9 +3241,7 @@ async def create_task(task_data: TaskCreate, current_user: User = Depends(get_cu
         raise HTTPException(status_code=403, detail="Only coordinators can create tasks")
     
     task = Task(**task_data.model_dump(), created_by=current_user.id, status="pending")
-    task_dict = task.model_dump()
-    task_dict['created_at'] = task_dict['created_at'].isoformat()
-    task_dict['deadline'] = task_dict['deadline'].isoformat()
+    task_dict = to_document(task)
     
     await db.tasks.insert_one(task_dict)
     return {"message": "Task created", "task": task}
@@ -461,102 +3257,351 @@ async def update_task(task_id: str, status: str, current_user: User = Depends(ge
 
 # Finance Routes
 @api_router.get("/finances")
-async def get_transactions(club_id: str, current_user: User = Depends(get_current_user)):
-    if current_user.role not in ['treasurer', 'coordinator', 'faculty', 'admin']:
+async def get_transactions(
+    club_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    current_user: User = Depends(get_current_user),
+):
+    if current_user.role not in FINANCE_READ_ROLES:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    
+    query = {"club_id": club_id, **datetime_range('created_at', start, end)}
+    if stream:
+        db_cursor = find_sorted(db.transactions, query, 'created_at', DESCENDING, cursor)
+        return ndjson_stream(db_cursor.limit(limit) if limit else db_cursor, decode_transaction)
+    
+    transactions, next_cursor = await fetch_page(
+        db.transactions, query, 'created_at', DESCENDING, cursor,
+        limit or DEFAULT_PAGE_SIZE, decode_transaction
+    )
+    ledger = await db.club_ledgers.find_one({"club_id": club_id}, {"_id": 0})
+    
+    return {
+        "transactions": transactions,
+        **ledger_totals(ledger),
+        "next_cursor": next_cursor
+    }
+
+@api_router.get("/finances/summary")
+async def get_finance_summary(
+    club_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: str = Query('month', pattern="^(day|week|month)$"),
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+):
+    if current_user.role not in FINANCE_READ_ROLES:
         raise HTTPException(status_code=403, detail="Unauthorized")
     
-    transactions = await db.transactions.find({"club_id": club_id}, {"_id": 0}).to_list(1000)
-    for transaction in transactions:
-        if isinstance(transaction.get('created_at'), str):
-            transaction['created_at'] = datetime.fromisoformat(transaction['created_at'])
+    query = {"club_id": club_id, **datetime_range('created_at', start, end)}
+    by_type = {
+        "income": {"$sum": {"$cond": [{"$eq": ["$type", "income"]}, "$amount", 0]}},
+        "expense": {"$sum": {"$cond": [{"$eq": ["$type", "expense"]}, "$amount", 0]}},
+        "count": {"$sum": 1},
+    }
+    period = {"date": {"$toDate": "$created_at"}, "unit": granularity}
+    if granularity == 'week':
+        period["startOfWeek"] = "monday"
+    facets = await db.transactions.aggregate([
+        {"$match": query},
+        {"$facet": {
+            "totals": [{"$group": {"_id": None, **by_type}}],
+            "by_category": [
+                {"$group": {"_id": "$category", **by_type}},
+                {"$sort": {"_id": 1}},
+            ],
+            "by_period": [
+                {"$group": {
+                    "_id": {"$dateTrunc": period},
+                    **by_type,
+                }},
+                {"$sort": {"_id": 1}},
+            ],
+        }},
+    ]).to_list(1)
+    facets = facets[0] if facets else {"totals": [], "by_category": [], "by_period": []}
+    
+    def bucket(row: dict, key: str) -> dict:
+        return {
+            key: row["_id"],
+            "income": row["income"],
+            "expense": row["expense"],
+            "net": row["income"] - row["expense"],
+            "count": row["count"],
+        }
     
-    income = sum(t['amount'] for t in transactions if t['type'] == 'income')
-    expense = sum(t['amount'] for t in transactions if t['type'] == 'expense')
-    balance = income - expense
+    totals = facets["totals"][0] if facets["totals"] else {"income": 0, "expense": 0, "count": 0}
+    transactions, next_cursor = await fetch_page(
+        db.transactions, query, 'created_at', DESCENDING, cursor,
+        limit or DEFAULT_PAGE_SIZE, decode_transaction
+    )
     
     return {
+        "club_id": club_id,
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+        "income": totals["income"],
+        "expense": totals["expense"],
+        "net": totals["income"] - totals["expense"],
+        "transaction_count": totals["count"],
+        "by_category": [bucket(row, "category") for row in facets["by_category"]],
+        "by_period": [bucket(row, "period") for row in facets["by_period"]],
         "transactions": transactions,
-        "balance": balance,
-        "income": income,
-        "expense": expense
+        "next_cursor": next_cursor
     }
 
 @api_router.post("/finances")
 async def create_transaction(transaction_data: TransactionCreate, current_user: User = Depends(get_current_user)):
     if current_user.role not in ['treasurer', 'coordinator', 'admin']:
         raise HTTPException(status_code=403, detail="Only treasurers can add transactions")
+    if transaction_data.type not in TRANSACTION_TYPES:
+        raise HTTPException(status_code=400, detail="Transaction type must be income or expense")
     
     transaction = Transaction(**transaction_data.model_dump(), created_by=current_user.id)
-    transaction_dict = transaction.model_dump()
-    transaction_dict['created_at'] = transaction_dict['created_at'].isoformat()
+    transaction_dict = to_document(transaction)
     
     await db.transactions.insert_one(transaction_dict)
+    await apply_to_ledger(
+        transaction.club_id,
+        transaction.amount if transaction.type == 'income' else 0,
+        transaction.amount if transaction.type == 'expense' else 0,
+        1,
+    )
     return {"message": "Transaction added", "transaction": transaction}
 
-# Analytics Routes
-@api_router.get("/analytics/student/{user_id}")
-async def get_student_analytics(user_id: str):
-    attendance = await db.attendance.find({"user_id": user_id}, {"_id": 0}).to_list(1000)
-    achievements = await db.achievements.find({"user_id": user_id}, {"_id": 0}).to_list(1000)
-    
-    for item in attendance:
-        if isinstance(item.get('checked_in_at'), str):
-            item['checked_in_at'] = datetime.fromisoformat(item['checked_in_at'])
+# Export and import Routes
+@api_router.get("/clubs/{club_id}/export/{dataset}")
+async def export_club_data(
+    club_id: str,
+    dataset: str,
+    request: Request,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_user),
+):
+    if dataset not in EXPORT_COLUMNS:
+        raise HTTPException(status_code=404, detail="Unknown export")
+    if current_user.role not in (FINANCE_READ_ROLES if dataset == "transactions" else STUDENT_RECORD_ROLES):
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    if not await db.clubs.find_one({"id": club_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Club not found")
+    filename = f"{re.sub(r'[^A-Za-z0-9_-]', '_', club_id)}-{dataset}"
+    return export_response(
+        request, export_batches(dataset, club_id, start, end), fmt, EXPORT_COLUMNS[dataset], filename
+    )
+
+@api_router.post("/finances/import")
+async def import_transactions(
+    club_id: str,
+    request: Request,
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_user),
+):
+    if current_user.role not in ['treasurer', 'coordinator', 'admin']:
+        raise HTTPException(status_code=403, detail="Only treasurers can add transactions")
+    if not await db.clubs.find_one({"id": club_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Club not found")
     
-    for item in achievements:
-        if isinstance(item.get('earned_at'), str):
-            item['earned_at'] = datetime.fromisoformat(item['earned_at'])
+    rows = inserted = 0
+    errors: List[dict] = []
+    chunk: List[tuple] = []
+    async for line, row in import_rows(request_lines(request), fmt):
+        if rows == IMPORT_MAX_ROWS:
+            errors.append({"row": line, "error": f"Imports are limited to {IMPORT_MAX_ROWS} rows; the rest was not read"})
+            break
+        rows += 1
+        try:
+            if isinstance(row, str):
+                raise ValueError(row)
+            chunk.append((line, import_document(row, club_id, current_user.id)))
+        except ValueError as e:
+            errors.append({"row": line, "error": validation_message(e)})
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            inserted += await insert_import_chunk(club_id, chunk, errors)
+            chunk = []
+    if chunk:
+        inserted += await insert_import_chunk(club_id, chunk, errors)
     
+    errors.sort(key=lambda error: error["row"])
+    ledger = await db.club_ledgers.find_one({"club_id": club_id}, {"_id": 0})
     return {
-        "attendance_count": len(attendance),
-        "achievements": achievements,
-        "attendance_history": attendance
+        "club_id": club_id,
+        "rows": rows,
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": errors[:IMPORT_MAX_ERRORS],
+        "errors_truncated": len(errors) > IMPORT_MAX_ERRORS,
+        **ledger_totals(ledger),
     }
 
-@api_router.get("/analytics/club/{club_id}")
-async def get_club_analytics(club_id: str, current_user: User = Depends(get_current_user)):
-    events = await db.events.find({"club_id": club_id}, {"_id": 0}).to_list(1000)
+# Live update Routes
+@api_router.get("/live")
+async def live_updates(
+    event_id: List[str] = Query([]),
+    club_id: List[str] = Query([]),
+    token: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+):
+    # EventSource cannot set headers, so browsers pass the token in the query string
+    if credentials is None and token is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    await user_from_token(credentials.credentials if credentials else token)
+    check_live_request(event_id, club_id)
     
-    total_events = len(events)
-    total_rsvps = sum(e.get('rsvp_count', 0) for e in events)
-    total_attendance = sum(e.get('attendance_count', 0) for e in events)
+    async def messages():
+        subscription = await open_live_subscription(event_id, club_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                deltas = await subscription.next_batch(settings.live_heartbeat_seconds)
+                if deltas is None:
+                    yield ": ping\n\n"
+                elif deltas:
+                    yield f"event: counters\ndata: {json.dumps({'events': deltas})}\n\n"
+        finally:
+            live_bus.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        messages(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.websocket("/live/ws")
+async def live_updates_ws(
+    websocket: WebSocket,
+    token: str,
+    event_id: List[str] = Query([]),
+    club_id: List[str] = Query([]),
+):
+    try:
+        await user_from_token(token)
+        check_live_request(event_id, club_id)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+    
+    await websocket.accept()
+    subscription = await open_live_subscription(event_id, club_id)
+    try:
+        while True:
+            deltas = await subscription.next_batch(settings.live_heartbeat_seconds)
+            if deltas is None:
+                await websocket.send_json({"type": "ping"})
+            elif deltas:
+                await websocket.send_json({"type": "counters", "events": deltas})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        live_bus.unsubscribe(subscription)
+
+# Analytics Routes
+@api_router.get("/analytics/student/{user_id}")
+async def get_student_analytics(
+    user_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    current_user: User = Depends(get_current_user),
+):
+    require_student_access(current_user, user_id)
+    query = {"user_id": user_id}
+    if stream:
+        db_cursor = find_sorted(db.attendance, query, 'checked_in_at', DESCENDING, cursor)
+        return ndjson_stream(db_cursor.limit(limit) if limit else db_cursor, decode_attendance)
+    
+    attendance, next_cursor = await fetch_page(
+        db.attendance, query, 'checked_in_at', DESCENDING, cursor,
+        limit or DEFAULT_PAGE_SIZE, decode_attendance
+    )
+    stats = await db.user_stats.find_one(query, {"_id": 0, "attendance_count": 1})
+    achievements = await db.achievements.find(query, {"_id": 0}).to_list(MAX_PAGE_SIZE)
     
     return {
-        "total_events": total_events,
-        "total_rsvps": total_rsvps,
-        "total_attendance": total_attendance,
-        "events": events
+        "attendance_count": stats["attendance_count"] if stats else 0,
+        "achievements": [decode_achievement(a) for a in achievements],
+        "attendance_history": attendance,
+        "next_cursor": next_cursor
     }
 
-# AI Recommendations
-@api_router.get("/recommendations")
-async def get_recommendations(current_user: User = Depends(get_current_user)):
-    try:
-        user_doc = await db.users.find_one({"id": current_user.id}, {"_id": 0})
-        interests = user_doc.get("interests", []) if user_doc else []
+@api_router.get("/analytics/student/{user_id}/portfolio")
+async def get_student_portfolio(
+    user_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+):
+    require_student_access(current_user, user_id)
+    portfolio = await portfolio_cache.get(user_id)
+    record_cache("portfolio", portfolio is not None)
+    if portfolio is None:
+        portfolio = await build_portfolio(user_id)
+        await portfolio_cache.set(user_id, portfolio)
+    if cursor is None and limit in (None, DEFAULT_PAGE_SIZE):
+        return portfolio
+    
+    # Later pages (or another page size) reuse the cached summary and only read history
+    history, next_cursor = await portfolio_history(user_id, cursor, limit or DEFAULT_PAGE_SIZE)
+    return {**portfolio, "attendance_history": history, "next_cursor": next_cursor}
 
-        now = datetime.now(timezone.utc)
-        events = await db.events.find({}, {"_id": 0}).to_list(1000)
+@api_router.get("/analytics/club/{club_id}")
+async def get_club_analytics(club_id: str, current_user: User = Depends(get_current_user)):
+    stats = await db.club_stats.find_one({"club_id": club_id}, {"_id": 0})
+    return club_stats_response(club_id, stats)
+
+@api_router.get("/analytics/club/{club_id}/activity")
+async def get_club_activity(
+    club_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: str = "day",
+    current_user: User = Depends(get_current_user),
+):
+    series = await activity_series("club", club_id, start, end, resolution)
+    if not series["points"] and not await db.clubs.find_one({"id": club_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Club not found")
+    return series
 
-        upcoming_events = []
-        for event in events:
-            event_date = event.get("date")
-            if isinstance(event_date, str):
-                try:
-                    event_date = datetime.fromisoformat(event_date)
-                except ValueError:
-                    continue
-            if event_date > now:
-                upcoming_events.append(event)
+# AI Recommendations
+async def recommend_locally(interests: List[str], k: int = 5) -> List[dict]:
+    await recommender.sync(db)
+    ranked = recommender.recommend(interests, k)
+    if not ranked:
+        return []
+    scores = dict(ranked)
+    events = await db.events.find({"id": {"$in": list(scores)}}, EVENT_PROJECTION).to_list(k)
+    for event in events:
+        event["score"] = round(scores[event["id"]], 4)
+    return sorted(events, key=lambda e: -e["score"])
 
-        if not upcoming_events:
-            return {"recommended_events": [], "message": "No upcoming events"}
+@api_router.get("/recommendations")
+async def get_recommendations(current_user: User = Depends(get_current_user)):
+    interests = current_user.interests
+    if not gemini_client.enabled:
+        return {"recommended_events": await recommend_locally(interests)}
+
+    # Whole seconds, so that concurrent requests build the same query and share it
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    upcoming_events = await shared_find(
+        db.events, {"date": {"$gt": now}}, EVENT_PROJECTION, [("date", ASCENDING), ("id", ASCENDING)], 1000
+    )
 
-        events_text = "\n".join([
-            f"- {e['title']}: {e['description']} (Tags: {', '.join(e.get('tags', []))})"
-            for e in upcoming_events
-        ])
+    if not upcoming_events:
+        return {"recommended_events": [], "message": "No upcoming events"}
 
+    version = upcoming_events_version(upcoming_events)
+    cache_key = json.dumps([sorted(interests), version])
+    recommended_titles = await recommendation_cache.get(cache_key)
+    record_cache("llm_answer", recommended_titles is not None)
+    if recommended_titles is None:
+        events_text = await events_prompt_text(upcoming_events, version)
         prompt = f"""User interests: {', '.join(interests) if interests else 'None specified'}
 
 Upcoming events:
@@ -564,54 +3609,89 @@ Upcoming events:
 
 Based on the user's interests, recommend the top 3-5 most relevant events. Return only the event titles, one per line, nothing else."""
 
-        gemini_api_key = os.environ.get("GEMINI_API_KEY")
-
-        if not gemini_api_key:
-            recommended = [
-                e for e in upcoming_events if any(tag in interests for tag in e.get("tags", []))
-            ]
-            return {"recommended_events": recommended[:5]}
-
-        url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
-        headers = {"Content-Type": "application/json"}
-        params = {"key": gemini_api_key}
-
-        data = {
-            "contents": [
-                {"parts": [{"text": prompt}]}
-            ]
-        }
-
-        response = requests.post(url, headers=headers, params=params, json=data)
-
-        if response.status_code != 200:
-            logging.error(f"Gemini API error: {response.text}")
-            raise Exception("Gemini API request failed")
-
-        result = response.json()
-        text_response = result["candidates"][0]["content"]["parts"][0]["text"].strip()
+        try:
+            text_response = await llm_flight.do(
+                hashlib.sha256(prompt.encode()).hexdigest(), lambda: gemini_client.generate(prompt)
+            )
+        except LLMUnavailable as e:
+            logging.warning(f"Recommendations falling back to tag match: {str(e)}")
+            return {"recommended_events": await recommend_locally(interests)}
 
         recommended_titles = [
             line.strip() for line in text_response.split("\n") if line.strip()
         ]
-        recommended_events = [e for e in upcoming_events if e["title"] in recommended_titles]
+        await recommendation_cache.set(cache_key, recommended_titles)
+
+    recommended_events = [e for e in upcoming_events if e["title"] in recommended_titles]
+    return {"recommended_events": recommended_events[:5]}
+
+async def get_metrics():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# App factory
+def configure(config: Settings) -> None:
+    """Build the module's services from `config`.
+
+    One configuration per process: calling it again replaces the services (and caches) the
+    previous call built.
+    """
+    global settings, password_hasher, principal_cache, qr_executor, qr_cache, query_flight, read_cache
+    global gemini_client, recommendation_cache, events_prompt_cache, portfolio_cache
+    settings = config
+    password_hasher = PasswordHasher(
+        config.password_hash_workers, config.password_hash_max_queue, config.password_hash_retry_after
+    )
+    principal_cache = PrincipalCache(make_cache_backend(
+        config.principal_cache_url, config.principal_cache_size, config.principal_cache_ttl, "principal:"
+    ))
+    qr_executor = ThreadPoolExecutor(max_workers=config.qr_render_workers, thread_name_prefix="qr-render")
+    qr_cache = QRCodeCache(config.qr_cache_size)
+    query_flight = SingleFlight("mongo", config.single_flight_stale_seconds)
+    read_cache = VersionedReadCache(config.read_cache_size, config.read_cache_ttl)
+    gemini_client = GeminiClient(
+        config.gemini_api_url,
+        config.gemini_api_key,
+        config.llm_timeout_seconds,
+        config.llm_max_connections,
+        CircuitBreaker(config.llm_circuit_failures, config.llm_circuit_reset_seconds),
+    )
+    recommendation_cache = LocalCacheBackend(config.llm_cache_size, config.llm_cache_ttl)
+    events_prompt_cache = LocalCacheBackend(8, config.llm_cache_ttl)
+    portfolio_cache_url = config.principal_cache_url if config.portfolio_cache_url is None else config.portfolio_cache_url
+    portfolio_cache = make_cache_backend(
+        portfolio_cache_url, config.portfolio_cache_size, config.portfolio_cache_ttl, "portfolio:"
+    )
 
-        return {"recommended_events": recommended_events[:5]}
+def create_app(settings: Optional[Settings] = None, database=None) -> FastAPI:
+    """Build the ASGI app from `settings` (Settings.from_env() by default).
+
+    With `database` the app serves from that database and its lifespan neither connects
+    nor pings; benchmarks pass an in-memory one.
+    """
+    global db
+    config = settings if settings is not None else Settings.from_env()
+    configure(config)
+    db = database
+    application = FastAPI(lifespan=lifespan)
+    application.add_api_route("/metrics", get_metrics, include_in_schema=False)
+    application.include_router(api_router)
+    application.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=config.cors_origins,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
+    )
+    application.add_middleware(MetricsMiddleware)
+    return application
 
-    except Exception as e:
-        logging.error(f"Error in recommendations: {str(e)}")
-        return {"recommended_events": upcoming_events[:5]}
-
-# Include router
-app.include_router(api_router)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def __getattr__(name: str) -> Any:
+    # `uvicorn server:app` and `from server import app` build the app on first access
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 logging.basicConfig(
     level=logging.INFO,
@@ -619,4 +3699,118 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# run the file using : python -m uvicorn server:app --reload
\ No newline at end of file
+# Management commands
+async def run_command(command) -> Any:
+    """Connect using the configured settings, run `command(database)` and disconnect."""
+    mongo, database = await connect_database(settings)
+    try:
+        return await command(database)
+    finally:
+        mongo.close()
+
+async def convert_datetimes(database, batch_size: int = 1000) -> None:
+    converted = await migrate_datetimes(database, batch_size)
+    logging.info(f"Converted datetime fields: {json.dumps(converted)}")
+    await check_native_datetimes(database)
+
+# Derived collections that live writes only ever $inc. On a database written before one
+# existed they would start empty and undercount forever, so `migrate` builds each from the
+# raw collections and the command doing so records it in `migrations`. Startup refuses to
+# serve until every one is recorded, except on a database whose source collections are all
+# empty, where there is nothing to build and the migration is recorded straight away.
+DERIVED_MIGRATIONS: Dict[str, tuple] = {
+    USER_STATS_MIGRATION: ("backfill-achievements", ("attendance", "achievements")),
+    LEDGERS_MIGRATION: ("rebuild-ledgers", ("transactions",)),
+    CLUB_STATS_MIGRATION: ("reconcile-club-stats", ("events",)),
+}
+
+async def check_derived_collections(database) -> None:
+    """Raise RuntimeError while a collection in DERIVED_MIGRATIONS has not been built."""
+    recorded = {
+        doc["id"] async for doc in database.migrations.find({"id": {"$in": list(DERIVED_MIGRATIONS)}}, {"_id": 0, "id": 1})
+    }
+    missing = []
+    for migration_id, (command, sources) in DERIVED_MIGRATIONS.items():
+        if migration_id in recorded:
+            continue
+        for collection_name in sources:
+            if await database[collection_name].find_one({}, {"_id": 1}):
+                missing.append(f"{migration_id} (`python server.py {command}`)")
+                break
+        else:
+            await record_migration(database, migration_id)
+    if missing:
+        raise RuntimeError(
+            f"Derived collections not built yet: {', '.join(missing)}; "
+            "run `python server.py migrate` before starting the app"
+        )
+
+async def run_migrations(database) -> None:
+    removed = await remove_duplicates(database)
+    if any(removed.values()):
+        logging.warning(f"Removed duplicate rows: {json.dumps(removed)}")
+    await ensure_indexes(database)
+    result = await database.events.update_many({"qr_code": {"$exists": True}}, {"$unset": {"qr_code": ""}})
+    logging.info(f"Removed embedded QR images from {result.modified_count} events")
+    await convert_datetimes(database)
+    drift = await reconcile_club_stats(database)
+    logging.info(f"Reconciled club_stats and event counters: {len(drift)} drifted values repaired")
+    totals = await backfill_achievements(database)
+    logging.info(f"Backfilled achievements: {json.dumps(totals)}")
+    count = await rebuild_ledgers(database)
+    logging.info(f"Rebuilt ledgers for {count} clubs")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Smart Club Connect management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser(
+        "migrate", help="Create the indexes declared in INDEXES and apply data migrations, including migrate-datetimes"
+    )
+    subparsers.add_parser("rebuild-ledgers", help="Recompute club ledger totals from transactions (app stopped)")
+    reconcile = subparsers.add_parser(
+        "reconcile-club-stats", help="Recompute club_stats and event counters from raw RSVPs and attendance"
+    )
+    reconcile.add_argument("--dry-run", action="store_true", help="Only report drift")
+    backfill = subparsers.add_parser(
+        "backfill-achievements", help="Recompute per-user attendance counters and rule-based achievements"
+    )
+    backfill.add_argument("--batch-size", type=int, default=500, help="Users processed per batch")
+    activity = subparsers.add_parser(
+        "backfill-activity", help="Rebuild RSVP and check-in activity buckets from rsvps and attendance"
+    )
+    activity.add_argument(
+        "--until", type=datetime.fromisoformat, default=None,
+        help="Only count records before this ISO datetime (default: now)",
+    )
+    activity.add_argument("--batch-size", type=int, default=200, help="Events processed per batch")
+    datetimes = subparsers.add_parser(
+        "migrate-datetimes", help="Convert ISO-string datetime fields to native BSON dates"
+    )
+    datetimes.add_argument("--batch-size", type=int, default=1000, help="Documents updated per batch")
+    args = parser.parse_args(argv)
+    configure(Settings.from_env())
+
+    if args.command == "migrate":
+        asyncio.run(run_command(run_migrations))
+    elif args.command == "rebuild-ledgers":
+        count = asyncio.run(run_command(rebuild_ledgers))
+        logging.info(f"Rebuilt ledgers for {count} clubs")
+    elif args.command == "reconcile-club-stats":
+        drift = asyncio.run(run_command(lambda database: reconcile_club_stats(database, fix=not args.dry_run)))
+        for item in drift:
+            print(json.dumps(item, default=str))
+        logging.info(f"Found {len(drift)} drifted values" + ("" if args.dry_run else ", repaired"))
+    elif args.command == "backfill-achievements":
+        totals = asyncio.run(run_command(lambda database: backfill_achievements(database, args.batch_size)))
+        logging.info(f"Backfilled achievements: {json.dumps(totals)}")
+    elif args.command == "backfill-activity":
+        totals = asyncio.run(run_command(lambda database: backfill_activity(database, args.until, args.batch_size)))
+        logging.info(f"Backfilled activity buckets: {json.dumps(totals)}")
+    elif args.command == "migrate-datetimes":
+        asyncio.run(run_command(lambda database: convert_datetimes(database, args.batch_size)))
+
+if __name__ == "__main__":
+    main()
+
+# run the file using : python -m uvicorn server:app --reload
+# run migrations using : python server.py migrate
\ No newline at end of file
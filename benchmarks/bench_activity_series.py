@@ -0,0 +1,121 @@
+"""Event check-in chart: pre-bucketed activity series against bucketing raw attendance per request.
+
+    python benchmarks/bench_activity_series.py --mongo-url mongodb://localhost:27017 --checkins 50000
+    python benchmarks/bench_activity_series.py --in-memory --checkins 5000 --repeat 20
+
+Runs the app in-process through httpx's ASGI transport against a throwaway database. Seeds
+one event with `--checkins` attendance rows spread over `--minutes` minutes of door
+scanning, then builds its activity buckets with `backfill_activity` (the same counters
+check-ins $inc live). Times `--repeat` GET /api/events/{id}/activity?resolution=minute
+calls against what a chart had to do before: read every attendance row of the event and
+count them per minute. Prints p50/p95 latency and the documents each approach reads; the
+bucketed read stays at `--minutes` documents however many people check in.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from loadtest import auth, insert_chunked, loadtest_settings, percentile, server
+
+
+async def seed(database, args):
+    club = server.Club(name="Activity Club", description="Benchmark club", category="Tech")
+    start = datetime.now(timezone.utc).replace(second=0, microsecond=0) - timedelta(minutes=args.minutes)
+    event = server.Event(
+        club_id=club.id, title="Busy Event", description="A well attended benchmark event.",
+        date=start, location="Main Hall", tags=["Tech"], attendance_count=args.checkins,
+    )
+    viewer = server.User(email=f"activity-{uuid.uuid4().hex[:12]}@example.com", name="Viewer", role="coordinator")
+    await database.clubs.insert_one(server.to_document(club))
+    await database.events.insert_one(server.to_document(event))
+    await database.users.insert_one(server.to_document(viewer))
+    rng = random.Random(args.seed)
+    await insert_chunked(database.attendance, [
+        server.to_document(server.Attendance(
+            event_id=event.id, user_id=str(uuid.uuid4()),
+            checked_in_at=start + timedelta(seconds=rng.uniform(0, args.minutes * 60)),
+        ))
+        for _ in range(args.checkins)
+    ])
+    return event.id, auth(viewer.id)
+
+
+async def raw_minutes(database, event_id):
+    """The pre-bucketing chart: every attendance row of the event, counted per minute."""
+    counts = {}
+    async for row in database.attendance.find({"event_id": event_id}, {"_id": 0, "checked_in_at": 1}):
+        minute = server.activity_bucket(row["checked_in_at"], 60)
+        counts[minute] = counts.get(minute, 0) + 1
+    return counts
+
+
+async def timed(call, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await call()
+        samples.append(time.perf_counter() - start)
+    return samples, result
+
+
+async def main(args):
+    if args.in_memory:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--in-memory requires mongomock-motor (pip install -r benchmarks/requirements.txt)")
+        mongo = AsyncMongoMockClient(tz_aware=True)
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        mongo = AsyncIOMotorClient(args.mongo_url, tz_aware=True)
+    db_name = f"activity_{uuid.uuid4().hex[:8]}"
+    database = mongo[db_name]
+    app = server.create_app(loadtest_settings(), database=database)
+    await server.ensure_indexes(database)
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        event_id, headers = await seed(database, args)
+        start = time.perf_counter()
+        totals = await server.backfill_activity(database)
+        print(f"backfill {args.checkins} check-ins      {time.perf_counter() - start:8.2f} s  "
+              f"{totals['event_buckets']} minute buckets")
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://activity") as client:
+            async def series():
+                response = await client.get(f"/api/events/{event_id}/activity", params={"resolution": "minute"},
+                                            headers=headers)
+                response.raise_for_status()
+                return response.json()
+
+            bucketed, body = await timed(series, args.repeat)
+            raw, counts = await timed(lambda: raw_minutes(database, event_id), args.repeat)
+        assert body["totals"]["checkins"] == sum(counts.values()) == args.checkins
+        for name, samples, docs in (
+            ("activity buckets", bucketed, totals["event_buckets"]),
+            ("raw attendance", raw, args.checkins),
+        ):
+            print(f"{name:<18} p50 {percentile(samples, 50) * 1000:8.1f} ms  "
+                  f"p95 {percentile(samples, 95) * 1000:8.1f} ms  {docs:8d} documents read")
+    finally:
+        if not args.in_memory:
+            await mongo.drop_database(db_name)
+        server.password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    backend.add_argument("--in-memory", action="store_true")
+    parser.add_argument("--checkins", type=int, default=50000)
+    parser.add_argument("--minutes", type=int, default=120, help="Length of the door-scanning window")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
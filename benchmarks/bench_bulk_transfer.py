@@ -0,0 +1,136 @@
+"""Bulk transaction import and streaming export against adding transactions one at a time.
+
+    python benchmarks/bench_bulk_transfer.py --mongo-url mongodb://localhost:27017 --rows 50000
+    python benchmarks/bench_bulk_transfer.py --in-memory --rows 2000 --single 200
+
+Runs the app in-process through httpx's ASGI transport against a throwaway database. First
+posts `--single` transactions one per request to POST /api/finances (the only way to add
+them before bulk import), then imports `--rows` transactions as one gzipped CSV body through
+POST /api/finances/import, then downloads the club's transactions from
+GET /api/clubs/{id}/export/transactions as gzipped CSV and as NDJSON. Prints rows per second
+for each, the transferred size, and the peak memory tracemalloc sees during one more CSV
+export, which stays flat as `--rows` grows because rows are streamed batch by batch. The
+in-memory backend checks unique indexes row by row, so its inserts slow down quadratically
+and dominate the import time there; use mongod for representative numbers.
+"""
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from loadtest import loadtest_settings, server
+
+CATEGORIES = ["Dues", "Food", "Venue", "Travel", "Equipment", "Sponsorship"]
+
+
+def import_body(rows):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(["type", "amount", "category", "description", "created_at"])
+    for i in range(rows):
+        writer.writerow([
+            "income" if i % 3 else "expense", f"{(i % 500) + 0.5:.2f}", CATEGORIES[i % len(CATEGORIES)],
+            f"Imported row {i}", (start + timedelta(minutes=i)).isoformat(),
+        ])
+    return gzip.compress(buffer.getvalue().encode(), compresslevel=6)
+
+
+async def download(client, club_id, headers, fmt, accept_encoding):
+    """Stream one export; returns (rows, bytes on the wire)."""
+    rows = size = 0
+    async with client.stream(
+        "GET", f"/api/clubs/{club_id}/export/transactions", params={"format": fmt},
+        headers={**headers, "Accept-Encoding": accept_encoding},
+    ) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes():
+            rows += chunk.count(b"\n")
+        size = response.num_bytes_downloaded
+    # The CSV header is one line; a quoted field never holds a newline in this data
+    return rows - (1 if fmt == "csv" else 0), size
+
+
+async def main(args):
+    if args.in_memory:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--in-memory requires mongomock-motor (pip install -r benchmarks/requirements.txt)")
+        mongo = AsyncMongoMockClient(tz_aware=True)
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        mongo = AsyncIOMotorClient(args.mongo_url, tz_aware=True)
+    db_name = f"bulk_{uuid.uuid4().hex[:8]}"
+    database = mongo[db_name]
+    app = server.create_app(loadtest_settings(), database=database)
+    await server.ensure_indexes(database)
+
+    treasurer = server.User(email=f"bulk-{uuid.uuid4().hex[:12]}@example.com", name="Bulk Treasurer", role="treasurer")
+    club = server.Club(name="Bulk Club", description="Benchmark club", category="Tech")
+    await database.users.insert_one(server.to_document(treasurer))
+    await database.clubs.insert_one(server.to_document(club))
+    headers = {"Authorization": f"Bearer {server.create_access_token({'sub': treasurer.id})}"}
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bulk", timeout=None) as client:
+            start = time.perf_counter()
+            for i in range(args.single):
+                response = await client.post("/api/finances", headers=headers, json={
+                    "club_id": club.id, "type": "income", "amount": 1, "category": "Dues",
+                    "description": f"Single row {i}",
+                })
+                response.raise_for_status()
+            elapsed = time.perf_counter() - start
+            print(f"POST /api/finances x{args.single:<7} {args.single / elapsed:10.1f} rows/s")
+
+            body = import_body(args.rows)
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/finances/import", params={"club_id": club.id}, content=body,
+                headers={**headers, "Content-Encoding": "gzip", "Content-Type": "text/csv"},
+            )
+            response.raise_for_status()
+            elapsed = time.perf_counter() - start
+            result = response.json()
+            assert result["inserted"] == args.rows, result["errors"][:5]
+            print(f"import {args.rows:<7} rows       {args.rows / elapsed:10.1f} rows/s  {elapsed:7.2f} s  "
+                  f"body {len(body) / 1024:9.1f} KiB")
+
+            total = args.rows + args.single
+            for fmt, accept_encoding in (("csv", "gzip"), ("ndjson", "gzip"), ("ndjson", "identity")):
+                start = time.perf_counter()
+                rows, size = await download(client, club.id, headers, fmt, accept_encoding)
+                elapsed = time.perf_counter() - start
+                assert rows == total, (fmt, rows, total)
+                print(f"export {fmt:<6} {accept_encoding:<8}    {rows / elapsed:10.1f} rows/s  {elapsed:7.2f} s  "
+                      f"wire {size / 1024:9.1f} KiB")
+
+            tracemalloc.start()
+            await download(client, club.id, headers, "csv", "gzip")
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"export csv peak memory         {peak / 1024:10.1f} KiB for {total} rows")
+    finally:
+        if not args.in_memory:
+            await mongo.drop_database(db_name)
+        server.password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    backend.add_argument("--in-memory", action="store_true")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--single", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
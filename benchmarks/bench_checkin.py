@@ -0,0 +1,99 @@
+"""Compare door check-in throughput for the single and batch check-in endpoints.
+
+Runs against a live backend (uvicorn + MongoDB):
+
+    python benchmarks/bench_checkin.py --base-url http://localhost:8001 --attendees 500 \
+        --concurrency 32 --batch-size 100
+
+Registers `--attendees` students and one coordinator, creates two events, then checks
+everyone in to the first event with one POST /checkin per student and to the second
+with POST /checkin/batch in chunks of `--batch-size`. Prints scans per second for each.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+
+async def register(client, role):
+    response = await client.post("/api/auth/register", json={
+        "email": f"bench-{uuid.uuid4().hex[:12]}@example.com",
+        "password": "bench-password",
+        "name": "Bench User",
+        "role": role,
+    })
+    response.raise_for_status()
+    body = response.json()
+    return body["user"]["id"], {"Authorization": f"Bearer {body['access_token']}"}
+
+
+async def create_event(client, headers, title):
+    response = await client.post("/api/events", headers=headers, json={
+        "club_id": "bench-club",
+        "title": title,
+        "description": "Check-in benchmark",
+        "date": (datetime.now(timezone.utc) + timedelta(days=1)).isoformat(),
+        "location": "Main Hall",
+        "tags": ["Benchmark"],
+    })
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def gather_limited(concurrency, coroutines):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(run(c) for c in coroutines))
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120, limits=limits) as client:
+        _, coordinator = await register(client, "coordinator")
+        print(f"registering {args.attendees} attendees...")
+        attendees = await gather_limited(
+            args.concurrency, [register(client, "student") for _ in range(args.attendees)]
+        )
+        single_event = await create_event(client, coordinator, "Single check-in benchmark")
+        batch_event = await create_event(client, coordinator, "Batch check-in benchmark")
+
+        async def single(headers):
+            response = await client.post(f"/api/events/{single_event}/checkin", headers=headers)
+            response.raise_for_status()
+
+        start = time.perf_counter()
+        await gather_limited(args.concurrency, [single(headers) for _, headers in attendees])
+        single_elapsed = time.perf_counter() - start
+
+        async def batch(chunk):
+            response = await client.post(
+                f"/api/events/{batch_event}/checkin/batch", headers=coordinator,
+                json={"scans": [{"user_id": user_id} for user_id, _ in chunk]},
+            )
+            response.raise_for_status()
+            return response.json()["checked_in"]
+
+        chunks = [attendees[i:i + args.batch_size] for i in range(0, len(attendees), args.batch_size)]
+        start = time.perf_counter()
+        checked_in = await gather_limited(args.concurrency, [batch(chunk) for chunk in chunks])
+        batch_elapsed = time.perf_counter() - start
+
+        print(f"single: {args.attendees} scans in {single_elapsed:.2f}s = {args.attendees / single_elapsed:,.0f} scans/s")
+        print(f"batch:  {sum(checked_in)} scans in {batch_elapsed:.2f}s = {sum(checked_in) / batch_elapsed:,.0f} scans/s "
+              f"({len(chunks)} requests of up to {args.batch_size})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--attendees", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
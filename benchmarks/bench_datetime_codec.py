@@ -0,0 +1,85 @@
+"""Decode cost per 1000 events: ISO-string datetimes versus native BSON dates.
+
+    python benchmarks/bench_datetime_codec.py --events 1000 --repeat 200
+
+Builds one batch of event documents in both storage forms, encodes each batch to BSON
+the way it would arrive from the server, then times decoding it into documents with
+aware datetimes: bson.decode_all followed by a datetime.fromisoformat pass over `date`
+and `created_at` for the string form, and bson.decode_all alone (tz_aware, as the app's
+client is configured) for native dates. Naive native decoding is listed for reference:
+the gap to the tz_aware line is the cost of attaching tzinfo inside the BSON decoder.
+Reports the best-of-`--repeat` time per 1000 events.
+"""
+import argparse
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import bson
+from bson.codec_options import CodecOptions
+
+DATETIME_FIELDS = ("date", "created_at")
+
+
+def make_events(count):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "club_id": f"club-{i % 40}",
+            "title": f"Event {i}",
+            "description": "A benchmark event with a typical description length for the catalog.",
+            "date": start + timedelta(hours=i),
+            "location": "Main Hall",
+            "tags": ["Tech", "Workshop"],
+            "max_attendees": 100,
+            "rsvp_count": i % 100,
+            "attendance_count": i % 50,
+            "created_at": start - timedelta(days=30, minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def as_strings(events):
+    return [{**e, **{f: e[f].isoformat() for f in DATETIME_FIELDS}} for e in events]
+
+
+def decode_strings(raw, options):
+    docs = bson.decode_all(raw, options)
+    for doc in docs:
+        for field in DATETIME_FIELDS:
+            if isinstance(doc.get(field), str):
+                doc[field] = datetime.fromisoformat(doc[field])
+    return docs
+
+
+def decode_native(raw, options):
+    return bson.decode_all(raw, options)
+
+
+def main(args):
+    options = CodecOptions(tz_aware=True)
+    naive = CodecOptions()
+    events = make_events(args.events)
+    raw_strings = b"".join(bson.encode(doc) for doc in as_strings(events))
+    raw_native = b"".join(bson.encode(doc) for doc in events)
+
+    assert decode_strings(raw_strings, options)[0]["date"] == decode_native(raw_native, options)[0]["date"]
+
+    scale = 1000 / args.events
+    for name, decode, raw in (
+        ("iso strings + fromisoformat", decode_strings, raw_strings),
+        ("native BSON dates (tz_aware)", decode_native, raw_native),
+        ("native BSON dates (naive)", decode_native, raw_native),
+    ):
+        codec = naive if name.endswith("(naive)") else options
+        best = min(timeit.repeat(lambda: decode(raw, codec), number=1, repeat=args.repeat))
+        print(f"{name:<30} {best * scale * 1e6:9.1f} us per 1000 events  ({len(raw)} bytes)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,101 @@
+"""Response-building cost for GET /api/events with and without FAST_JSON_RESPONSES.
+
+    python benchmarks/bench_json_responses.py --sizes 100 1000 10000 --repeat 50
+
+Runs in-process, without a database: builds a page of event documents as Motor returns
+them, applies the route's decoder, then times the two ways the page can become a
+response body. The default path is FastAPI's own serialize_response() against the
+route's response_model followed by JSONResponse; the fast path is trusted_document()
+plus FastJSONResponse. Reports best-of-`--repeat` pages per second (the serialization
+ceiling for requests per second at that page size) and the peak memory tracemalloc sees
+while building one response. The API caps pages at 1000 rows; the 10000 size shows how
+either path scales.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+import server  # noqa: E402
+
+
+def make_events(count):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "club_id": f"club-{i % 40}",
+            "title": f"Event {i}",
+            "description": "A benchmark event with a typical description length for the catalog.",
+            "date": start + timedelta(hours=i),
+            "location": "Main Hall",
+            "tags": ["Tech", "Workshop"],
+            "max_attendees": 100,
+            "rsvp_count": i % 100,
+            "attendance_count": i % 50,
+            "created_at": start - timedelta(days=30, minutes=i),
+        }
+        for i in range(count)
+    ]
+
+
+def events_route():
+    # The app is only built to look up the route; it never starts, so no connection is made
+    app = server.create_app(server.Settings())
+    return next(
+        route for route in app.routes
+        if getattr(route, "path", None) == "/api/events" and "GET" in route.methods
+    )
+
+
+async def default_path(field, docs):
+    items = [server.decode_event(dict(doc)) for doc in docs]
+    content = await serialize_response(field=field, response_content=items)
+    return JSONResponse(content).body
+
+
+async def fast_path(field, docs):
+    items = [server.decode_event(dict(doc)) for doc in docs]
+    return server.FastJSONResponse([server.trusted_document(server.Event, item) for item in items]).body
+
+
+async def measure(build, field, docs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await build(field, docs)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    body = await build(field, docs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, body
+
+
+async def main(args):
+    field = events_route().secure_cloned_response_field
+    for size in args.sizes:
+        docs = make_events(size)
+        results = {}
+        for name, build in (("default", default_path), ("fast", fast_path)):
+            results[name] = await measure(build, field, docs, args.repeat)
+        assert results["default"][2] == results["fast"][2], "fast path body differs from the default path"
+        for name, (best, peak, body) in results.items():
+            print(f"events={size:<6} {name:<8} {1 / best:9.1f} pages/s  {best * 1000:8.2f} ms  "
+                  f"peak {peak / 1024:9.1f} KiB  body {len(body) / 1024:8.1f} KiB")
+        print(f"events={size:<6} speedup  {results['default'][0] / results['fast'][0]:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,97 @@
+"""Measure /api/events latency while a login storm is running.
+
+Runs against a live backend (uvicorn + MongoDB):
+
+    python benchmarks/bench_login_contention.py --base-url http://localhost:8001 \
+        --logins 200 --login-concurrency 50 --probes 300
+
+A baseline pass probes /api/events with no other traffic; the second pass repeats the
+probes while `--logins` concurrent logins hammer /api/auth/login. With bcrypt on the event
+loop the p99 of the second pass grows by the full bcrypt queue; with the hashing pool it
+stays close to the baseline (logins beyond the queue limit come back as fast 503s).
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name, samples):
+    return (
+        f"{name:<24} n={len(samples):<5} "
+        f"p50={percentile(samples, 50) * 1000:7.1f}ms "
+        f"p95={percentile(samples, 95) * 1000:7.1f}ms "
+        f"p99={percentile(samples, 99) * 1000:7.1f}ms "
+        f"mean={statistics.mean(samples) * 1000:7.1f}ms"
+    )
+
+
+async def register_user(client, password):
+    email = f"bench-{uuid.uuid4().hex[:12]}@example.com"
+    response = await client.post("/api/auth/register", json={
+        "email": email, "password": password, "name": "Bench User", "role": "student"
+    })
+    response.raise_for_status()
+    return email, response.json()["access_token"]
+
+
+async def probe_events(client, token, count, interval):
+    headers = {"Authorization": f"Bearer {token}"}
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get("/api/events", headers=headers, params={"limit": 20})
+        samples.append(time.perf_counter() - start)
+        response.raise_for_status()
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def login_storm(client, email, password, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses = {}
+
+    async def one_login():
+        async with semaphore:
+            response = await client.post("/api/auth/login", json={"email": email, "password": password})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(one_login() for _ in range(total)))
+    return statuses
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.login_concurrency + 10)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        password = "bench-password"
+        email, token = await register_user(client, password)
+
+        baseline = await probe_events(client, token, args.probes, args.interval)
+        print(summarize("events (idle)", baseline))
+
+        storm = asyncio.create_task(
+            login_storm(client, email, password, args.logins, args.login_concurrency)
+        )
+        contended = await probe_events(client, token, args.probes, args.interval)
+        statuses = await storm
+        print(summarize("events (login storm)", contended))
+        print(f"login responses by status: {dict(sorted(statuses.items()))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--probes", type=int, default=300)
+    parser.add_argument("--interval", type=float, default=0.005)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,115 @@
+"""RSVP rush: hundreds of concurrent RSVPs against one capacity-limited event.
+
+Runs against a live backend (uvicorn + MongoDB):
+
+    python benchmarks/bench_rsvp_rush.py --base-url http://localhost:8001 \
+        --students 300 --capacity 50 --concurrency 300 --cancellations 20
+
+Fires every student's RSVP at once, then cancels `--cancellations` confirmed seats
+concurrently. Checks the invariants and exits non-zero if any fail: rsvp_count never
+exceeds max_attendees, exactly min(students, capacity) seats are confirmed, everyone
+else is waitlisted, and every cancellation is backfilled from the waitlist. Also prints
+RSVP latency percentiles.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def register(client, role):
+    response = await client.post("/api/auth/register", json={
+        "email": f"bench-{uuid.uuid4().hex[:12]}@example.com",
+        "password": "bench-password",
+        "name": "Bench User",
+        "role": role,
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def gather_limited(concurrency, coroutines):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(run(c) for c in coroutines))
+
+
+async def main(args):
+    failures = []
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120, limits=limits) as client:
+        coordinator = await register(client, "coordinator")
+        response = await client.post("/api/events", headers=coordinator, json={
+            "club_id": "bench-club",
+            "title": "RSVP rush benchmark",
+            "description": "Capacity-limited event",
+            "date": (datetime.now(timezone.utc) + timedelta(days=1)).isoformat(),
+            "location": "Main Hall",
+            "tags": ["Benchmark"],
+            "max_attendees": args.capacity,
+        })
+        response.raise_for_status()
+        event_id = response.json()["id"]
+
+        print(f"registering {args.students} students...")
+        students = await gather_limited(32, [register(client, "student") for _ in range(args.students)])
+
+        async def rsvp(headers):
+            start = time.perf_counter()
+            response = await client.post(f"/api/events/{event_id}/rsvp", headers=headers)
+            response.raise_for_status()
+            return headers, response.json()["status"], time.perf_counter() - start
+
+        results = await gather_limited(args.concurrency, [rsvp(headers) for headers in students])
+        confirmed = [headers for headers, status, _ in results if status == "confirmed"]
+        waitlisted = [headers for headers, status, _ in results if status == "waitlisted"]
+        latencies = [elapsed for _, _, elapsed in results]
+
+        event = (await client.get(f"/api/events/{event_id}")).json()
+        expected = min(args.students, args.capacity)
+        print(f"confirmed={len(confirmed)} waitlisted={len(waitlisted)} rsvp_count={event['rsvp_count']}")
+        print(f"rsvp latency p50={percentile(latencies, 50) * 1000:.1f}ms "
+              f"p95={percentile(latencies, 95) * 1000:.1f}ms p99={percentile(latencies, 99) * 1000:.1f}ms")
+        if event["rsvp_count"] > args.capacity:
+            failures.append(f"rsvp_count {event['rsvp_count']} exceeds capacity {args.capacity}")
+        if len(confirmed) != expected or event["rsvp_count"] != expected:
+            failures.append(f"expected {expected} confirmed seats")
+        if len(waitlisted) != args.students - expected:
+            failures.append(f"expected {args.students - expected} waitlisted")
+
+        cancelling = confirmed[:args.cancellations]
+        await gather_limited(args.concurrency, [
+            client.delete(f"/api/events/{event_id}/rsvp", headers=headers) for headers in cancelling
+        ])
+        event = (await client.get(f"/api/events/{event_id}")).json()
+        expected_after = min(expected, args.students - len(cancelling))
+        print(f"after {len(cancelling)} cancellations: rsvp_count={event['rsvp_count']} (expected {expected_after})")
+        if event["rsvp_count"] != expected_after:
+            failures.append("cancelled seats were not backfilled from the waitlist")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--capacity", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=300)
+    parser.add_argument("--cancellations", type=int, default=20)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,133 @@
+"""Cold start: import cost of backend/server.py and time until a fresh process serves its first request.
+
+    python benchmarks/bench_startup.py --mongo-url mongodb://localhost:27017 --repeat 5
+    python benchmarks/bench_startup.py --in-memory --repeat 5
+
+Import: runs `python -X importtime -c "import server"` in a fresh interpreter `--repeat`
+times and reports the median cumulative import time of server.py, the `--top` modules it
+imports directly ranked by cumulative time, and which of the lazily loaded dependencies
+(qrcode, PIL, httpx, passlib, bcrypt, dotenv) the import pulled in anyway; there should be
+none. First request: starts uvicorn in a fresh process and polls GET /api/clubs?limit=1
+until it answers 200, which includes the lifespan (Mongo connect and ping, index checks).
+With --mongo-url the process serves `server:app` against a throwaway database; with
+--in-memory it serves create_app() over mongomock-motor, which skips the connect.
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+LAZY_MODULES = ("qrcode", "PIL", "httpx", "passlib", "bcrypt", "dotenv")
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+IN_MEMORY_SERVER = """
+import sys
+import uvicorn
+from mongomock_motor import AsyncMongoMockClient
+import server
+database = AsyncMongoMockClient(tz_aware=True)["startup"]
+app = server.create_app(server.Settings.from_env(env_file=None), database=database)
+uvicorn.run(app, host="127.0.0.1", port=int(sys.argv[1]), log_level="warning")
+"""
+
+
+def profile_import():
+    """One cold import: (server cumulative seconds, {direct import: cumulative seconds}, lazy modules loaded)."""
+    check = f"import sys, server; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        cwd=BACKEND, capture_output=True, text=True, check=True,
+    )
+    # importtime prints children before their parent, one indent level deeper
+    pending, total = [], None
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)) / 1e6, len(match.group(3)) // 2, match.group(4)
+        pending.append((depth, name, cumulative))
+        if name == "server" and depth == 0:
+            total = cumulative
+            children = {child: seconds for child_depth, child, seconds in pending if child_depth == 1}
+            break
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return total, children, loaded
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def first_request(args, db_name, timeout=60.0):
+    """Seconds from spawning the server process until GET /api/clubs answers 200."""
+    port = free_port()
+    env = dict(os.environ)
+    if args.in_memory:
+        command = [sys.executable, "-c", IN_MEMORY_SERVER, str(port)]
+    else:
+        env.update(MONGO_URL=args.mongo_url, DB_NAME=db_name)
+        command = [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1",
+                   "--port", str(port), "--log-level", "warning"]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=BACKEND, env=env)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            while time.perf_counter() - start < timeout:
+                if process.poll() is not None:
+                    sys.exit(f"server exited with status {process.returncode} before serving")
+                try:
+                    if client.get("/api/clubs", params={"limit": 1}).status_code == 200:
+                        return time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.005)
+        sys.exit(f"no 200 from /api/clubs within {timeout:.0f}s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(args):
+    imports = [profile_import() for _ in range(args.repeat)]
+    totals = [total for total, _, _ in imports]
+    print(f"import server        median {statistics.median(totals) * 1000:8.1f} ms  "
+          f"best {min(totals) * 1000:8.1f} ms")
+    children = {}
+    for _, direct, _ in imports:
+        for name, seconds in direct.items():
+            children.setdefault(name, []).append(seconds)
+    ranked = sorted(children.items(), key=lambda item: -statistics.median(item[1]))
+    for name, samples in ranked[:args.top]:
+        print(f"  {name:<24} median {statistics.median(samples) * 1000:8.1f} ms")
+    loaded = sorted({m for _, _, modules in imports for m in modules})
+    print(f"lazy dependencies loaded at import: {', '.join(loaded) if loaded else 'none'}")
+
+    db_name = f"startup_{uuid.uuid4().hex[:8]}"
+    try:
+        samples = [first_request(args, db_name) for _ in range(args.repeat)]
+    finally:
+        if not args.in_memory:
+            from pymongo import MongoClient
+            MongoClient(args.mongo_url).drop_database(db_name)
+    print(f"first request        median {statistics.median(samples) * 1000:8.1f} ms  "
+          f"best {min(samples) * 1000:8.1f} ms  ({'mongomock-motor' if args.in_memory else 'mongod'})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    backend.add_argument("--in-memory", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Direct imports of server.py to list")
+    main(parser.parse_args())
@@ -0,0 +1,148 @@
+"""Thundering herd: many clients open one event and ask for recommendations at the same moment.
+
+    python benchmarks/bench_thundering_herd.py --mongo-url mongodb://localhost:27017 --clients 500
+    python benchmarks/bench_thundering_herd.py --in-memory --clients 200 --waves 3
+
+Runs the app in-process through httpx's ASGI transport against a throwaway database, with
+Gemini replaced by fake_llm_server answering after `--llm-latency` seconds. Every wave
+starts cold (read cache, LLM caches and single-flight results cleared; the principal cache
+is warm) and fires `--clients` concurrent GET /api/events/{id} for one hot event together
+with `--clients` GET /api/recommendations from students who share the same interests. All
+waves run once with SINGLE_FLIGHT_ENABLED off and once with it on. Prints the Mongo
+operations each wave issued and their rate, the Gemini calls, and request latency. The
+in-memory backend answers without yielding to the event loop, so some reads never overlap
+there; use mongod for representative numbers.
+"""
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from fake_llm_server import create_fake_llm
+from loadtest import CountingDatabase, current_ops, loadtest_settings, percentile, server
+
+INTERESTS = ["Tech", "Music"]
+
+
+async def seed(database, args):
+    now = datetime.now(timezone.utc)
+    club = server.Club(name="Herd Club", description="Benchmark club", category="Tech")
+    await database.clubs.insert_one(server.to_document(club))
+    events = [
+        server.Event(
+            club_id=club.id, title=f"Event {i}", description="An upcoming benchmark event.",
+            date=now + timedelta(days=1, hours=i), location="Main Hall",
+            tags=[INTERESTS[i % 2], "Workshop"],
+        )
+        for i in range(args.events)
+    ]
+    await database.events.insert_many([server.to_document(event) for event in events])
+    students = [
+        server.User(email=f"herd-{uuid.uuid4().hex[:12]}@example.com", name="Herd Student",
+                    role="student", interests=INTERESTS)
+        for _ in range(args.students)
+    ]
+    await database.users.insert_many([server.to_document(student) for student in students])
+    await server.ensure_indexes(database)
+    tokens = [server.create_access_token({"sub": student.id}) for student in students]
+    return events[0].id, [{"Authorization": f"Bearer {token}"} for token in tokens]
+
+
+def reset_caches():
+    settings = server.settings
+    server.read_cache = server.VersionedReadCache(settings.read_cache_size, settings.read_cache_ttl)
+    server.recommendation_cache = server.LocalCacheBackend(settings.llm_cache_size, settings.llm_cache_ttl)
+    server.events_prompt_cache = server.LocalCacheBackend(8, settings.llm_cache_ttl)
+    server.read_flight = server.SingleFlight("read_cache")
+    server.query_flight = server.SingleFlight("mongo", settings.single_flight_stale_seconds)
+    server.llm_flight = server.SingleFlight("llm")
+
+
+async def wave(client, llm, event_id, headers, clients):
+    reset_caches()
+    ops = [0]
+    token = current_ops.set(ops)
+    latencies = []
+
+    async def timed(method, url, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+    llm_before = (await llm.get("/stats")).json()["calls"]
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            coroutine
+            for i in range(clients)
+            for coroutine in (
+                timed("GET", f"/api/events/{event_id}"),
+                timed("GET", "/api/recommendations", headers=headers[i % len(headers)]),
+            )
+        ))
+    finally:
+        current_ops.reset(token)
+    elapsed = time.perf_counter() - start
+    llm_calls = (await llm.get("/stats")).json()["calls"] - llm_before
+    return {"ops": ops[0], "elapsed": elapsed, "llm_calls": llm_calls, "latencies": latencies}
+
+
+async def main(args):
+    if args.in_memory:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--in-memory requires mongomock-motor (pip install -r benchmarks/requirements.txt)")
+        mongo = AsyncMongoMockClient(tz_aware=True)
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        mongo = AsyncIOMotorClient(args.mongo_url, tz_aware=True)
+    db_name = f"herd_{uuid.uuid4().hex[:8]}"
+    database = mongo[db_name]
+    settings = loadtest_settings(gemini_api_key="bench", gemini_api_url="http://fake-llm/generate")
+    app = server.create_app(settings, database=CountingDatabase(database))
+
+    llm_app = create_fake_llm(latency=args.llm_latency)
+    server.gemini_client._http = httpx.AsyncClient(transport=httpx.ASGITransport(app=llm_app))
+    llm = httpx.AsyncClient(transport=httpx.ASGITransport(app=llm_app), base_url="http://fake-llm")
+    transport = httpx.ASGITransport(app=app)
+    limits = httpx.Limits(max_connections=None)
+    try:
+        event_id, headers = await seed(database, args)
+        async with httpx.AsyncClient(transport=transport, base_url="http://herd", timeout=None, limits=limits) as client:
+            # Warm the principal cache so that waves only measure the herd-prone reads
+            await asyncio.gather(*(client.get("/api/auth/me", headers=h) for h in headers))
+            for enabled in (False, True):
+                settings.single_flight_enabled = enabled
+                runs = [await wave(client, llm, event_id, headers, args.clients) for _ in range(args.waves)]
+                ops = sum(r["ops"] for r in runs) / len(runs)
+                elapsed = sum(r["elapsed"] for r in runs) / len(runs)
+                llm_calls = sum(r["llm_calls"] for r in runs) / len(runs)
+                latencies = [sample for r in runs for sample in r["latencies"]]
+                print(f"single-flight {'on ' if enabled else 'off'}  {2 * args.clients} requests/wave  "
+                      f"mongo ops {ops:8.1f}/wave  {ops / elapsed:9.1f} ops/s  gemini calls {llm_calls:6.1f}/wave  "
+                      f"p50 {percentile(latencies, 50) * 1000:8.1f} ms  p95 {percentile(latencies, 95) * 1000:8.1f} ms")
+    finally:
+        await llm.aclose()
+        await server.gemini_client.close()
+        if not args.in_memory:
+            await mongo.drop_database(db_name)
+        server.password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    backend.add_argument("--in-memory", action="store_true")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--students", type=int, default=50)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--waves", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,60 @@
+"""A local stand-in for the Gemini generateContent API.
+
+    python benchmarks/fake_llm_server.py --port 8099 --latency 0.3 --failure-rate 0.1
+
+Then start the backend with
+    GEMINI_API_KEY=fake GEMINI_API_URL=http://localhost:8099/generate
+
+It answers with the first three event titles found in the prompt, after `--latency`
+seconds, and fails a `--failure-rate` fraction of calls with a 503 (or hangs for
+`--hang` seconds) so timeouts, the circuit breaker and the response cache can be
+exercised. GET /stats returns the number of calls received.
+"""
+import argparse
+import asyncio
+import random
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_fake_llm(latency: float = 0.0, failure_rate: float = 0.0, hang: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    stats = {"calls": 0, "failures": 0}
+
+    @app.post("/{path:path}")
+    async def generate(path: str, request: Request):
+        stats["calls"] += 1
+        body = await request.json()
+        prompt = body["contents"][0]["parts"][0]["text"]
+        await asyncio.sleep(latency)
+        if random.random() < failure_rate:
+            stats["failures"] += 1
+            if hang:
+                await asyncio.sleep(hang)
+            return JSONResponse({"error": "unavailable"}, status_code=503)
+
+        titles = [
+            line[2:].split(":", 1)[0]
+            for line in prompt.splitlines()
+            if line.startswith("- ")
+        ][:3]
+        return {"candidates": [{"content": {"parts": [{"text": "\n".join(titles)}]}}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--hang", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(create_fake_llm(args.latency, args.failure_rate, args.hang), host=args.host, port=args.port)
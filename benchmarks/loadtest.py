@@ -0,0 +1,440 @@
+"""Seeded load test: scenario mixes against backend/server.py with per-route latency and Mongo ops.
+
+    python benchmarks/loadtest.py --mongo-url mongodb://localhost:27017 --scale small \
+        --scenarios discovery rsvp_rush door_checkin treasurer login_storm \
+        --duration 20 --concurrency 32 --output results/loadtest-$(git rev-parse --short HEAD).json
+
+    python benchmarks/loadtest.py --in-memory --scale small   # mongomock-motor, no mongod needed
+
+Seeds a throwaway database with synthetic users, clubs, events, RSVPs, attendance and
+transactions (counters, club_stats, user_stats, achievements and ledgers are rebuilt
+with the server's own management functions), then drives the app in-process through
+httpx's ASGI transport so every request can be attributed its Mongo operations. Each
+scenario runs `--concurrency` virtual users for `--duration` seconds:
+
+    discovery     browse /events (tag filter, next page), open events, list clubs, recommendations
+    rsvp_rush     a capacity-limited event is created and every virtual user RSVPs at once, some cancel
+    door_checkin  students check in one by one while a coordinator submits batch scans
+    treasurer     transaction list, finance summary and new transactions for one club
+    login_storm   concurrent bcrypt logins
+
+The report is JSON: per scenario and route, request count, status codes, p50/p95/p99
+latency, throughput and Mongo operations per request (driver calls issued by the app,
+cursor getMores not included). Pass `--baseline old.json` to print p95 and ops deltas
+against an earlier run. The in-memory backend is far slower than mongod and lacks some
+aggregation operators ($dateTrunc), so compare runs on the same backend only.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+import server  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+PASSWORD = "loadtest-password"
+TAGS = ["Tech", "Arts", "Sports", "Music", "Workshop", "Career", "Social", "Hackathon", "Film", "Robotics"]
+SCALES = {
+    "small": {"students": 500, "clubs": 20, "events": 500, "rsvps_per_event": 20, "transactions": 2000},
+    "medium": {"students": 5000, "clubs": 100, "events": 5000, "rsvps_per_event": 40, "transactions": 20000},
+    "large": {"students": 50000, "clubs": 400, "events": 50000, "rsvps_per_event": 60, "transactions": 200000},
+}
+SCENARIOS = ["discovery", "rsvp_rush", "door_checkin", "treasurer", "login_storm"]
+SEED_CHUNK = 5000
+
+# Mongo operations issued while serving the current request, per virtual user task
+current_ops: contextvars.ContextVar = contextvars.ContextVar("current_ops", default=None)
+
+COLLECTION_OPERATIONS = frozenset({
+    "find", "find_one", "find_one_and_update", "find_one_and_delete", "find_one_and_replace",
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one", "delete_one",
+    "delete_many", "count_documents", "estimated_document_count", "aggregate", "bulk_write",
+    "distinct", "create_indexes",
+})
+
+
+class CountingCollection:
+    """Counts driver calls on a Motor collection against the current request."""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in COLLECTION_OPERATIONS:
+            return attr
+
+        def counted(*args, **kwargs):
+            ops = current_ops.get()
+            if ops is not None:
+                ops[0] += 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+class CountingDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def __getattr__(self, name):
+        return CountingCollection(getattr(self._database, name))
+
+    def __getitem__(self, name):
+        return CountingCollection(self._database[name])
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Recorder:
+    """Latency, status and Mongo op samples per route template."""
+
+    def __init__(self):
+        self.routes = {}
+
+    def add(self, route, elapsed, status, ops):
+        entry = self.routes.setdefault(route, {"latencies": [], "statuses": {}, "ops": 0})
+        entry["latencies"].append(elapsed)
+        entry["statuses"][str(status)] = entry["statuses"].get(str(status), 0) + 1
+        entry["ops"] += ops
+
+    def report(self, duration):
+        routes = {}
+        for route, entry in sorted(self.routes.items()):
+            latencies = entry["latencies"]
+            routes[route] = {
+                "requests": len(latencies),
+                "statuses": entry["statuses"],
+                "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+                "throughput_rps": round(len(latencies) / duration, 2),
+                "mongo_ops_per_request": round(entry["ops"] / len(latencies), 2),
+            }
+        total = sum(r["requests"] for r in routes.values())
+        return {
+            "duration_s": round(duration, 3),
+            "requests": total,
+            "throughput_rps": round(total / duration, 2),
+            "routes": routes,
+        }
+
+
+class VirtualUser:
+    def __init__(self, client, recorder, headers=None):
+        self.client = client
+        self.recorder = recorder
+        self.headers = headers or {}
+
+    async def request(self, method, route, params=None, json_body=None, headers=None, **path):
+        ops = [0]
+        token = current_ops.set(ops)
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(
+                method, route.format(**path), params=params, json=json_body,
+                headers=headers if headers is not None else self.headers,
+            )
+        finally:
+            current_ops.reset(token)
+        self.recorder.add(f"{method} {route}", time.perf_counter() - start, response.status_code, ops[0])
+        return response
+
+
+def loadtest_settings(**overrides):
+    """Server settings from the environment, with the LLM off unless LOADTEST_GEMINI_API_KEY is set."""
+    overrides.setdefault("gemini_api_key", os.environ.get("LOADTEST_GEMINI_API_KEY") or None)
+    return server.Settings.from_env().model_copy(update=overrides)
+
+
+def auth(user_id):
+    return {"Authorization": f"Bearer {server.create_access_token({'sub': user_id})}"}
+
+
+async def insert_chunked(collection, docs):
+    for start in range(0, len(docs), SEED_CHUNK):
+        await collection.insert_many(docs[start:start + SEED_CHUNK], ordered=False)
+
+
+async def seed(database, sizes, rng):
+    """Insert a consistent synthetic dataset and return the ids scenarios need."""
+    now = datetime.now(timezone.utc)
+    password_hash = server.password_hasher.context.hash(PASSWORD)
+
+    def user(role, index, club_id=None):
+        doc = server.to_document(server.User(
+            email=f"{role}{index}@loadtest.example.com", name=f"{role.title()} {index}", role=role,
+            club_id=club_id, interests=rng.sample(TAGS, 3),
+        ))
+        doc["password"] = password_hash
+        return doc
+
+    clubs = [
+        server.to_document(server.Club(name=f"Club {i}", description="Synthetic club", category=rng.choice(TAGS)))
+        for i in range(sizes["clubs"])
+    ]
+    club_ids = [club["id"] for club in clubs]
+    students = [user("student", i) for i in range(sizes["students"])]
+    coordinators = [user("coordinator", i, club_id) for i, club_id in enumerate(club_ids)]
+    treasurers = [user("treasurer", i, club_id) for i, club_id in enumerate(club_ids)]
+    for club, coordinator, treasurer in zip(clubs, coordinators, treasurers):
+        club["coordinator_ids"] = [coordinator["id"]]
+        club["treasurer_ids"] = [treasurer["id"]]
+
+    events, rsvps, attendance = [], [], []
+    student_ids = [s["id"] for s in students]
+    for i in range(sizes["events"]):
+        date = now + timedelta(days=rng.uniform(-60, 60))
+        event = server.to_document(server.Event(
+            club_id=rng.choice(club_ids), title=f"{rng.choice(TAGS)} event {i}",
+            description=f"Synthetic event about {' and '.join(rng.sample(TAGS, 2)).lower()}",
+            date=date, location=f"Room {rng.randint(1, 300)}", tags=rng.sample(TAGS, rng.randint(1, 3)),
+            max_attendees=rng.choice([None, 25, 50, 100]), created_at=date - timedelta(days=30),
+        ))
+        events.append(event)
+        capacity = event["max_attendees"] or sizes["rsvps_per_event"]
+        for position, student_id in enumerate(rng.sample(student_ids, min(len(student_ids), sizes["rsvps_per_event"]))):
+            status = "confirmed" if position < capacity else "waitlisted"
+            rsvps.append(server.to_document(server.RSVP(
+                event_id=event["id"], user_id=student_id, status=status,
+                created_at=event["created_at"] + timedelta(minutes=position),
+            )))
+            if status == "confirmed" and date < now and rng.random() < 0.6:
+                attendance.append(server.to_document(server.Attendance(
+                    event_id=event["id"], user_id=student_id,
+                    checked_in_at=date + timedelta(minutes=rng.randint(-10, 30)),
+                )))
+
+    transactions = [
+        server.to_document(server.Transaction(
+            club_id=rng.choice(club_ids), type=rng.choice(["income", "expense"]),
+            amount=round(rng.uniform(5, 500), 2), category=rng.choice(["Food", "Venue", "Sponsorship", "Supplies"]),
+            description="Synthetic transaction", created_by=rng.choice(treasurers)["id"],
+            created_at=now - timedelta(days=rng.uniform(0, 365)),
+        ))
+        for _ in range(sizes["transactions"])
+    ]
+
+    await insert_chunked(database.users, students + coordinators + treasurers)
+    await insert_chunked(database.clubs, clubs)
+    await insert_chunked(database.events, events)
+    await insert_chunked(database.rsvps, rsvps)
+    await insert_chunked(database.attendance, attendance)
+    await insert_chunked(database.transactions, transactions)
+    # Building indexes after the bulk load is much faster than maintaining them during it
+    await server.ensure_indexes(database)
+    # Derived state comes from the server's own rebuild jobs, like a restored backup would
+    await server.reconcile_club_stats(database)
+    await server.backfill_achievements(database)
+    await server.rebuild_ledgers(database)
+    await server.recommender.sync(database, force=True)
+
+    return {
+        "students": [(s["id"], s["email"]) for s in students],
+        "coordinators": [(c["id"], c["club_id"]) for c in coordinators],
+        "treasurers": [(t["id"], t["club_id"]) for t in treasurers],
+        "upcoming_events": [e["id"] for e in events if e["date"] > now],
+        "counts": {
+            "users": len(students) + len(coordinators) + len(treasurers), "clubs": len(clubs),
+            "events": len(events), "rsvps": len(rsvps), "attendance": len(attendance),
+            "transactions": len(transactions),
+        },
+    }
+
+
+async def discovery(vu, data, rng, deadline):
+    while time.monotonic() < deadline:
+        params = {"limit": 20}
+        if rng.random() < 0.5:
+            params["tag"] = rng.choice(TAGS)
+        page = await vu.request("GET", "/api/events", params=params)
+        cursor = page.headers.get(server.NEXT_CURSOR_HEADER)
+        if cursor:
+            await vu.request("GET", "/api/events", params={**params, "cursor": cursor})
+        for event_id in rng.sample(data["upcoming_events"], min(2, len(data["upcoming_events"]))):
+            await vu.request("GET", "/api/events/{event_id}", event_id=event_id)
+        await vu.request("GET", "/api/clubs", params={"limit": 50})
+        await vu.request("GET", "/api/recommendations")
+
+
+async def create_event(vu, data, rng, capacity):
+    coordinator_id, club_id = rng.choice(data["coordinators"])
+    response = await vu.request("POST", "/api/events", headers=auth(coordinator_id), json_body={
+        "club_id": club_id, "title": f"Load test event {uuid.uuid4().hex[:8]}", "description": "Hot event",
+        "date": (datetime.now(timezone.utc) + timedelta(days=7)).isoformat(), "location": "Main Hall",
+        "tags": rng.sample(TAGS, 2), "max_attendees": capacity,
+    })
+    return response.json()["id"]
+
+
+async def rsvp_rush(vus, data, rng, deadline):
+    while time.monotonic() < deadline:
+        event_id = await create_event(vus[0], data, rng, capacity=max(1, len(vus) // 2))
+        students = rng.sample(data["students"], len(vus))
+        await asyncio.gather(*(
+            vu.request("POST", "/api/events/{event_id}/rsvp", headers=auth(student_id), event_id=event_id)
+            for vu, (student_id, _) in zip(vus, students)
+        ))
+        await asyncio.gather(*(
+            vu.request("DELETE", "/api/events/{event_id}/rsvp", headers=auth(student_id), event_id=event_id)
+            for vu, (student_id, _) in zip(vus, students) if rng.random() < 0.1
+        ))
+
+
+async def door_checkin(vus, data, rng, deadline, batch_size=200):
+    while time.monotonic() < deadline:
+        event_id = await create_event(vus[0], data, rng, capacity=None)
+        coordinator_id, _ = rng.choice(data["coordinators"])
+        walk_ins = rng.sample(data["students"], len(vus) + batch_size)
+        singles, scanned = walk_ins[:len(vus)], walk_ins[len(vus):]
+        await asyncio.gather(
+            vus[0].request(
+                "POST", "/api/events/{event_id}/checkin/batch", headers=auth(coordinator_id), event_id=event_id,
+                json_body={"scans": [{"user_id": student_id} for student_id, _ in scanned]},
+            ),
+            *(
+                vu.request("POST", "/api/events/{event_id}/checkin", headers=auth(student_id), event_id=event_id)
+                for vu, (student_id, _) in zip(vus, singles)
+            ),
+        )
+
+
+async def treasurer(vu, data, rng, deadline):
+    treasurer_id, club_id = rng.choice(data["treasurers"])
+    headers = auth(treasurer_id)
+    while time.monotonic() < deadline:
+        await vu.request("GET", "/api/finances", headers=headers, params={"club_id": club_id, "limit": 50})
+        await vu.request("GET", "/api/finances/summary", headers=headers,
+                         params={"club_id": club_id, "granularity": rng.choice(["day", "week", "month"]), "limit": 20})
+        await vu.request("POST", "/api/finances", headers=headers, json_body={
+            "club_id": club_id, "type": rng.choice(["income", "expense"]), "amount": round(rng.uniform(5, 200), 2),
+            "category": "Supplies", "description": "Load test transaction",
+        })
+
+
+async def login_storm(vu, data, rng, deadline):
+    while time.monotonic() < deadline:
+        _, email = rng.choice(data["students"])
+        await vu.request("POST", "/api/auth/login", headers={}, json_body={"email": email, "password": PASSWORD})
+
+
+async def run_scenario(name, client, data, args, rng):
+    recorder = Recorder()
+    vus = [VirtualUser(client, recorder, auth(rng.choice(data["students"])[0])) for _ in range(args.concurrency)]
+    start = time.monotonic()
+    deadline = start + args.duration
+    if name in ("rsvp_rush", "door_checkin"):
+        await globals()[name](vus, data, rng, deadline)
+    else:
+        scenario = globals()[name]
+        await asyncio.gather(*(scenario(vu, data, random.Random(rng.random()), deadline) for vu in vus))
+    return recorder.report(time.monotonic() - start)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    for scenario, report in results["scenarios"].items():
+        old_routes = baseline.get("scenarios", {}).get(scenario, {}).get("routes", {})
+        for route, stats in report["routes"].items():
+            old = old_routes.get(route)
+            if not old:
+                continue
+            print(f"{scenario:<13} {route:<45} p95 {old['p95_ms']:9.2f} -> {stats['p95_ms']:9.2f} ms  "
+                  f"ops {old['mongo_ops_per_request']:5.2f} -> {stats['mongo_ops_per_request']:5.2f}",
+                  file=sys.stderr)
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    db_name = f"loadtest_{uuid.uuid4().hex[:8]}"
+    if args.in_memory:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--in-memory requires mongomock-motor (pip install -r benchmarks/requirements.txt)")
+        mongo = AsyncMongoMockClient(tz_aware=True)
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        mongo = AsyncIOMotorClient(args.mongo_url, tz_aware=True)
+    database = mongo[db_name]
+    app = server.create_app(loadtest_settings(), database=CountingDatabase(database))
+
+    sizes = dict(SCALES[args.scale])
+    sizes["students"] = max(sizes["students"], args.concurrency + 200)
+    seed_start = time.monotonic()
+    data = await seed(database, sizes, rng)
+    print(f"seeded {data['counts']} in {time.monotonic() - seed_start:.1f}s", file=sys.stderr)
+
+    results = {
+        "revision": git_revision(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "backend": "mongomock-motor" if args.in_memory else "mongod",
+        "scale": args.scale,
+        "seed": args.seed,
+        "concurrency": args.concurrency,
+        "dataset": data["counts"],
+        "scenarios": {},
+    }
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    limits = httpx.Limits(max_connections=None)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None, limits=limits) as client:
+            for name in args.scenarios:
+                print(f"running {name} for {args.duration}s with {args.concurrency} virtual users", file=sys.stderr)
+                results["scenarios"][name] = await run_scenario(name, client, data, args, rng)
+    finally:
+        if not args.in_memory and not args.keep:
+            await mongo.drop_database(db_name)
+        server.password_hasher.shutdown()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    if args.baseline:
+        compare(results, json.loads(Path(args.baseline).read_text()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument("--mongo-url", default="mongodb://localhost:27017",
+                         help="mongod to seed a throwaway database in (dropped afterwards)")
+    backend.add_argument("--in-memory", action="store_true", help="use mongomock-motor instead of mongod")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=32, help="virtual users per scenario")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the dataset and the traffic")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON report to print p95 and ops deltas against")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded mongod database")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,17 @@
+import axios from 'axios';
+
+// List endpoints return one page at a time; X-Next-Cursor is set while more rows remain
+const PAGE_LIMIT = 1000;
+
+export async function fetchAllPages(url, params = {}) {
+  const rows = [];
+  let cursor = null;
+  do {
+    const response = await axios.get(url, {
+      params: { limit: PAGE_LIMIT, ...params, ...(cursor ? { cursor } : {}) }
+    });
+    rows.push(...response.data);
+    cursor = response.headers['x-next-cursor'] || null;
+  } while (cursor);
+  return rows;
+}
@@ -1,7 +1,8 @@
-import React, { useState, useEffect, useContext } from 'react';
+import React, { useState, useEffect, useContext, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { AuthContext } from '../App';
+import { fetchAllPages } from '../lib/pagination';
 import { Button } from '../components/ui/button';
 import { Card } from '../components/ui/card';
 import { Input } from '../components/ui/input';
@@ -21,6 +22,7 @@ const CoordinatorDashboard = () => {
   const [showEventDialog, setShowEventDialog] = useState(false);
   const [showTaskDialog, setShowTaskDialog] = useState(false);
   const [loading, setLoading] = useState(true);
+  const liveCounts = useRef({});
   const navigate = useNavigate();
 
   const [eventForm, setEventForm] = useState({
@@ -45,14 +47,59 @@ const CoordinatorDashboard = () => {
     fetchData();
   }, []);
 
+  // Live RSVP/attendance counters: the whole club when the coordinator has one, else the listed events
+  const liveEventIds = user.club_id ? '' : events.slice(0, 100).map((event) => event.id).join(',');
+  useEffect(() => {
+    const token = localStorage.getItem('token');
+    if (!token || (!user.club_id && !liveEventIds)) return undefined;
+    const params = new URLSearchParams({ token });
+    if (user.club_id) {
+      params.append('club_id', user.club_id);
+    } else {
+      liveEventIds.split(',').forEach((id) => params.append('event_id', id));
+    }
+    const source = new EventSource(`${API}/live?${params}`);
+    source.addEventListener('counters', (message) => applyLiveCounters(JSON.parse(message.data).events));
+    return () => source.close();
+  }, [user.club_id, liveEventIds]);
+
+  const applyLiveCounters = (updates) => {
+    const byId = {};
+    const totals = { rsvp_count: 0, attendance_count: 0 };
+    updates.forEach((update) => {
+      // An event not loaded by fetchData has no baseline to diff against: record its counts,
+      // but leave the club totals alone rather than adding its whole count as a change
+      const previous = liveCounts.current[update.id];
+      const counts = { ...previous };
+      Object.keys(totals).forEach((field) => {
+        if (update[field] === undefined) return;
+        if (previous && previous[field] !== undefined && update.club_id === user.club_id) {
+          totals[field] += update[field] - previous[field];
+        }
+        counts[field] = update[field];
+      });
+      liveCounts.current[update.id] = counts;
+      byId[update.id] = counts;
+    });
+    setEvents((current) => current.map((event) => (byId[event.id] ? { ...event, ...byId[event.id] } : event)));
+    setAnalytics((current) => current && {
+      ...current,
+      total_rsvps: current.total_rsvps + totals.rsvp_count,
+      total_attendance: current.total_attendance + totals.attendance_count
+    });
+  };
+
   const fetchData = async () => {
     try {
-      const [eventsRes, tasksRes] = await Promise.all([
-        axios.get(`${API}/events`),
-        axios.get(`${API}/tasks`)
+      const [allEvents, allTasks] = await Promise.all([
+        fetchAllPages(`${API}/events`),
+        fetchAllPages(`${API}/tasks`)
       ]);
-      setEvents(eventsRes.data);
-      setTasks(tasksRes.data);
+      setEvents(allEvents);
+      setTasks(allTasks);
+      liveCounts.current = Object.fromEntries(allEvents.map((event) => [
+        event.id, { rsvp_count: event.rsvp_count, attendance_count: event.attendance_count }
+      ]));
       
       if (user.club_id) {
         const analyticsRes = await axios.get(`${API}/analytics/club/${user.club_id}`);
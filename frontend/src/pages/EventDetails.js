@@ -36,8 +36,8 @@ const EventDetails = () => {
 
   const handleRSVP = async () => {
     try {
-      await axios.post(`${API}/events/${id}/rsvp`);
-      toast.success('RSVP successful!');
+      const response = await axios.post(`${API}/events/${id}/rsvp`);
+      toast.success(response.data.message || 'RSVP successful!');
       setHasRSVP(true);
       fetchEvent();
     } catch (error) {
@@ -139,14 +139,14 @@ const EventDetails = () => {
             )}
           </div>
 
-          {event.qr_code && (
+          {event.id && (
             <div className="bg-gray-50 rounded-lg p-6 text-center">
               <div className="flex items-center justify-center gap-2 mb-4">
                 <QrCode className="h-5 w-5 text-gray-600" />
                 <h3 className="font-bold text-lg">QR Code for Check-in</h3>
               </div>
               <div className="inline-block bg-white p-4 rounded-lg shadow-sm">
-                <img src={event.qr_code} alt="Event QR Code" className="w-48 h-48" data-testid="event-qr-code" />
+                <img src={`${API}/events/${event.id}/qr`} alt="Event QR Code" className="w-48 h-48" data-testid="event-qr-code" />
               </div>
               <p className="text-sm text-gray-600 mt-4">Scan this code at the event to check in</p>
             </div>
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useContext } from 'react';
+import React, { useState, useEffect, useContext, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { AuthContext } from '../App';
@@ -8,58 +8,91 @@ import { Badge } from '../components/ui/badge';
 import { Input } from '../components/ui/input';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../components/ui/select';
 import { toast } from 'sonner';
-import { Search, Calendar, Tag, LogOut, Home } from 'lucide-react';
+import { Search, Calendar, Tag, LogOut, Home, Users } from 'lucide-react';
 import { format } from 'date-fns';
 
+const PAGE_SIZE = 24;
+const SEARCH_DEBOUNCE_MS = 250;
+
 const EventDiscovery = () => {
   const { API } = useContext(AuthContext);
   const [events, setEvents] = useState([]);
-  const [filteredEvents, setFilteredEvents] = useState([]);
+  const [total, setTotal] = useState(0);
+  const [facets, setFacets] = useState({ tags: [], clubs: [] });
+  const [nextCursor, setNextCursor] = useState(null);
   const [searchTerm, setSearchTerm] = useState('');
-  const [selectedTag, setSelectedTag] = useState('all');
+  const [query, setQuery] = useState('');
+  const [selectedTags, setSelectedTags] = useState([]);
+  const [tagMode, setTagMode] = useState('any');
+  const [selectedClub, setSelectedClub] = useState('all');
+  const [dateFrom, setDateFrom] = useState(format(new Date(), 'yyyy-MM-dd'));
+  const [dateTo, setDateTo] = useState('');
+  const [sort, setSort] = useState('relevance');
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [loaded, setLoaded] = useState(false);
+  const latestRequest = useRef(0);
   const navigate = useNavigate();
 
   useEffect(() => {
-    fetchEvents();
-  }, []);
+    const timer = setTimeout(() => setQuery(searchTerm.trim()), SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
 
   useEffect(() => {
-    filterEvents();
-  }, [searchTerm, selectedTag, events]);
+    fetchEvents();
+  }, [query, selectedTags, tagMode, selectedClub, dateFrom, dateTo, sort]);
+
+  const buildParams = (cursor) => {
+    const params = new URLSearchParams();
+    if (query) params.append('q', query);
+    selectedTags.forEach((tag) => params.append('tags', tag));
+    params.append('tag_mode', tagMode);
+    if (selectedClub !== 'all') params.append('club_id', selectedClub);
+    if (dateFrom) params.append('date_from', new Date(`${dateFrom}T00:00:00`).toISOString());
+    // date_to is exclusive, so include the whole selected day
+    if (dateTo) params.append('date_to', new Date(new Date(`${dateTo}T00:00:00`).getTime() + 86400000).toISOString());
+    // Relevance needs a query; without one the server orders by date
+    params.append('sort', query ? sort : 'date');
+    params.append('limit', PAGE_SIZE);
+    if (cursor) params.append('cursor', cursor);
+    return params;
+  };
 
-  const fetchEvents = async () => {
+  const fetchEvents = async (cursor = null) => {
+    // Ignore responses to searches that have since been superseded
+    const requestId = ++latestRequest.current;
+    cursor ? setLoadingMore(true) : setLoading(true);
     try {
-      const response = await axios.get(`${API}/events`);
-      setEvents(response.data);
-      setFilteredEvents(response.data);
+      const response = await axios.get(`${API}/events/search`, { params: buildParams(cursor) });
+      if (requestId !== latestRequest.current) return;
+      setEvents((current) => (cursor ? [...current, ...response.data.events] : response.data.events));
+      setTotal(response.data.total);
+      setFacets(response.data.facets);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
-      toast.error('Failed to load events');
+      if (requestId === latestRequest.current) toast.error('Failed to load events');
     } finally {
-      setLoading(false);
+      if (requestId === latestRequest.current) {
+        setLoading(false);
+        setLoadingMore(false);
+        setLoaded(true);
+      }
     }
   };
 
-  const filterEvents = () => {
-    let filtered = events;
-
-    if (searchTerm) {
-      filtered = filtered.filter(event =>
-        event.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        event.description.toLowerCase().includes(searchTerm.toLowerCase())
-      );
-    }
-
-    if (selectedTag !== 'all') {
-      filtered = filtered.filter(event => event.tags.includes(selectedTag));
-    }
-
-    setFilteredEvents(filtered);
+  const toggleTag = (tag) => {
+    setSelectedTags((current) => (
+      current.includes(tag) ? current.filter((t) => t !== tag) : [...current, tag]
+    ));
   };
 
-  const allTags = [...new Set(events.flatMap(e => e.tags))];
+  const tagFacets = [
+    ...facets.tags,
+    ...selectedTags.filter((tag) => !facets.tags.some((f) => f.value === tag)).map((tag) => ({ value: tag, count: 0 })),
+  ];
 
-  if (loading) {
+  if (!loaded) {
     return (
       <div className="min-h-screen flex items-center justify-center">
         <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-blue-600"></div>
@@ -89,8 +122,8 @@ const EventDiscovery = () => {
       <div className="max-w-7xl mx-auto px-6 py-8">
         {/* Filters */}
         <div className="mb-8 space-y-4">
-          <div className="flex gap-4">
-            <div className="flex-1 relative">
+          <div className="flex flex-wrap gap-4">
+            <div className="flex-1 min-w-[16rem] relative">
               <Search className="absolute left-3 top-1/2 transform -translate-y-1/2 h-5 w-5 text-gray-400" />
               <Input
                 data-testid="search-input"
@@ -100,27 +133,77 @@ const EventDiscovery = () => {
                 className="pl-10"
               />
             </div>
-            <Select value={selectedTag} onValueChange={setSelectedTag}>
-              <SelectTrigger className="w-48" data-testid="tag-filter">
-                <Tag className="h-4 w-4 mr-2" />
+            <Select value={selectedClub} onValueChange={setSelectedClub}>
+              <SelectTrigger className="w-48" data-testid="club-filter">
+                <Users className="h-4 w-4 mr-2" />
                 <SelectValue />
               </SelectTrigger>
               <SelectContent>
-                <SelectItem value="all">All Tags</SelectItem>
-                {allTags.map((tag) => (
-                  <SelectItem key={tag} value={tag}>{tag}</SelectItem>
+                <SelectItem value="all">All Clubs</SelectItem>
+                {facets.clubs.map((club) => (
+                  <SelectItem key={club.value} value={club.value}>
+                    {club.label || club.value} ({club.count})
+                  </SelectItem>
                 ))}
               </SelectContent>
             </Select>
+            <Input
+              type="date"
+              data-testid="date-from-filter"
+              value={dateFrom}
+              onChange={(e) => setDateFrom(e.target.value)}
+              className="w-44"
+            />
+            <Input
+              type="date"
+              data-testid="date-to-filter"
+              value={dateTo}
+              onChange={(e) => setDateTo(e.target.value)}
+              className="w-44"
+            />
+            <Select value={sort} onValueChange={setSort}>
+              <SelectTrigger className="w-40" data-testid="sort-select">
+                <SelectValue />
+              </SelectTrigger>
+              <SelectContent>
+                <SelectItem value="relevance">Best match</SelectItem>
+                <SelectItem value="date">Date</SelectItem>
+              </SelectContent>
+            </Select>
+          </div>
+          <div className="flex flex-wrap items-center gap-2" data-testid="tag-filter">
+            <Tag className="h-4 w-4 text-gray-500" />
+            {tagFacets.map((tag) => (
+              <Badge
+                key={tag.value}
+                variant={selectedTags.includes(tag.value) ? 'default' : 'outline'}
+                className="cursor-pointer"
+                onClick={() => toggleTag(tag.value)}
+                data-testid={`tag-facet-${tag.value}`}
+              >
+                {tag.value} ({tag.count})
+              </Badge>
+            ))}
+            {selectedTags.length > 1 && (
+              <Select value={tagMode} onValueChange={setTagMode}>
+                <SelectTrigger className="w-36 h-8" data-testid="tag-mode-select">
+                  <SelectValue />
+                </SelectTrigger>
+                <SelectContent>
+                  <SelectItem value="any">Any tag</SelectItem>
+                  <SelectItem value="all">All tags</SelectItem>
+                </SelectContent>
+              </Select>
+            )}
           </div>
           <p className="text-sm text-gray-600">
-            Showing {filteredEvents.length} of {events.length} events
+            Showing {events.length} of {total} events
           </p>
         </div>
 
         {/* Events Grid */}
         <div className="grid md:grid-cols-2 lg:grid-cols-3 gap-6">
-          {filteredEvents.map((event) => (
+          {events.map((event) => (
             <Card key={event.id} className="p-6 hover:shadow-xl transition-all duration-300" data-testid={`event-card-${event.id}`}>
               <h3 className="font-bold text-xl mb-2">{event.title}</h3>
               <p className="text-sm text-gray-600 mb-3 line-clamp-3">{event.description}</p>
@@ -146,7 +229,15 @@ const EventDiscovery = () => {
           ))}
         </div>
 
-        {filteredEvents.length === 0 && (
+        {nextCursor && (
+          <div className="text-center mt-8">
+            <Button variant="outline" onClick={() => fetchEvents(nextCursor)} disabled={loadingMore} data-testid="load-more-btn">
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </Button>
+          </div>
+        )}
+
+        {!loading && events.length === 0 && (
           <div className="text-center py-12">
             <p className="text-gray-500 text-lg">No events found</p>
           </div>
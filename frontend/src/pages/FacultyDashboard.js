@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useContext } from 'react';
-import axios from 'axios';
 import { AuthContext } from '../App';
+import { fetchAllPages } from '../lib/pagination';
 import { Button } from '../components/ui/button';
 import { Card } from '../components/ui/card';
 import { Badge } from '../components/ui/badge';
@@ -18,8 +18,7 @@ const FacultyDashboard = () => {
 
   const fetchClubs = async () => {
     try {
-      const response = await axios.get(`${API}/clubs`);
-      setClubs(response.data);
+      setClubs(await fetchAllPages(`${API}/clubs`));
     } catch (error) {
       toast.error('Failed to load clubs');
     } finally {
@@ -13,6 +13,7 @@ const Portfolio = () => {
   const { user, API } = useContext(AuthContext);
   const [analytics, setAnalytics] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const navigate = useNavigate();
 
   useEffect(() => {
@@ -21,7 +22,7 @@ const Portfolio = () => {
 
   const fetchAnalytics = async () => {
     try {
-      const response = await axios.get(`${API}/analytics/student/${user.id}`);
+      const response = await axios.get(`${API}/analytics/student/${user.id}/portfolio`);
       setAnalytics(response.data);
     } catch (error) {
       toast.error('Failed to load portfolio');
@@ -30,12 +31,31 @@ const Portfolio = () => {
     }
   };
 
+  const loadMoreHistory = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(`${API}/analytics/student/${user.id}/portfolio`, {
+        params: { cursor: analytics.next_cursor }
+      });
+      setAnalytics((current) => ({
+        ...current,
+        attendance_history: [...current.attendance_history, ...response.data.attendance_history],
+        next_cursor: response.data.next_cursor
+      }));
+    } catch (error) {
+      toast.error('Failed to load attendance history');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const exportPortfolio = () => {
     const data = {
       name: user.name,
       email: user.email,
       eventsAttended: analytics.attendance_count,
       achievements: analytics.achievements,
+      summary: analytics.summary,
       attendanceHistory: analytics.attendance_history
     };
     
@@ -115,8 +135,8 @@ const Portfolio = () => {
           <Card className="p-6 border-2 border-purple-200 bg-gradient-to-br from-purple-50 to-white">
             <div className="flex items-center justify-between">
               <div>
-                <p className="text-sm text-gray-600 mb-1">Participation Rate</p>
-                <p className="text-4xl font-bold text-purple-600">Active</p>
+                <p className="text-sm text-gray-600 mb-1">Active Months</p>
+                <p className="text-4xl font-bold text-purple-600">{analytics.summary.months.length}</p>
               </div>
               <Award className="h-12 w-12 text-purple-600 opacity-20" />
             </div>
@@ -156,6 +176,41 @@ const Portfolio = () => {
           )}
         </section>
 
+        {/* Participation Summary */}
+        {analytics.attendance_count > 0 && (
+          <section className="mb-8">
+            <h2 className="text-2xl font-bold mb-4">Participation</h2>
+            <div className="grid md:grid-cols-3 gap-6">
+              <Card className="p-6" data-testid="club-summary">
+                <h3 className="font-semibold mb-3">Clubs</h3>
+                {analytics.summary.clubs.map((club) => (
+                  <div key={club.club_id} className="flex justify-between text-sm py-1">
+                    <span>{club.name || `Club #${club.club_id.slice(0, 8)}`}</span>
+                    <span className="text-gray-600">{club.count}</span>
+                  </div>
+                ))}
+              </Card>
+              <Card className="p-6" data-testid="tag-summary">
+                <h3 className="font-semibold mb-3">Interests</h3>
+                <div className="flex flex-wrap gap-2">
+                  {analytics.summary.tags.map((tag) => (
+                    <Badge key={tag.tag} variant="secondary">{tag.tag} ({tag.count})</Badge>
+                  ))}
+                </div>
+              </Card>
+              <Card className="p-6" data-testid="month-summary">
+                <h3 className="font-semibold mb-3">Monthly Activity</h3>
+                {analytics.summary.months.slice(-12).map((month) => (
+                  <div key={month.month} className="flex justify-between text-sm py-1">
+                    <span>{format(new Date(`${month.month}-01T00:00:00`), 'MMM yyyy')}</span>
+                    <span className="text-gray-600">{month.count}</span>
+                  </div>
+                ))}
+              </Card>
+            </div>
+          </section>
+        )}
+
         {/* Attendance History */}
         <section>
           <h2 className="text-2xl font-bold mb-4">Attendance History</h2>
@@ -168,8 +223,11 @@ const Portfolio = () => {
                       <Calendar className="h-5 w-5 text-blue-600" />
                     </div>
                     <div>
-                      <p className="font-medium">Event #{attendance.event_id.slice(0, 8)}</p>
+                      <p className="font-medium">
+                        {attendance.event ? attendance.event.title : `Event #${attendance.event_id.slice(0, 8)}`}
+                      </p>
                       <p className="text-sm text-gray-600">
+                        {attendance.event?.club_name && `${attendance.event.club_name} · `}
                         Checked in on {format(new Date(attendance.checked_in_at), 'PPP p')}
                       </p>
                     </div>
@@ -184,6 +242,13 @@ const Portfolio = () => {
               <p className="text-gray-500">No attendance history yet. Start attending events!</p>
             </Card>
           )}
+          {analytics.next_cursor && (
+            <div className="text-center mt-4">
+              <Button variant="outline" onClick={loadMoreHistory} disabled={loadingMore} data-testid="load-more-history-btn">
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </Button>
+            </div>
+          )}
         </section>
       </div>
     </div>
@@ -2,6 +2,7 @@ import React, { useState, useEffect, useContext } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { AuthContext } from '../App';
+import { fetchAllPages } from '../lib/pagination';
 import { Button } from '../components/ui/button';
 import { Card } from '../components/ui/card';
 import { Badge } from '../components/ui/badge';
@@ -23,13 +24,13 @@ const StudentDashboard = () => {
 
   const fetchData = async () => {
     try {
-      const [recsRes, eventsRes, analyticsRes] = await Promise.all([
+      const [recsRes, allEvents, analyticsRes] = await Promise.all([
         axios.get(`${API}/recommendations`),
-        axios.get(`${API}/events`),
-        axios.get(`${API}/analytics/student/${user.id}`)
+        fetchAllPages(`${API}/events`),
+        axios.get(`${API}/analytics/student/${user.id}/portfolio`)
       ]);
       setRecommendations(recsRes.data.recommended_events || []);
-      setEvents(eventsRes.data);
+      setEvents(allEvents);
       setAnalytics(analyticsRes.data);
     } catch (error) {
       toast.error('Failed to load dashboard data');
@@ -40,8 +41,8 @@ const StudentDashboard = () => {
 
   const handleRSVP = async (eventId) => {
     try {
-      await axios.post(`${API}/events/${eventId}/rsvp`);
-      toast.success('RSVP successful!');
+      const response = await axios.post(`${API}/events/${eventId}/rsvp`);
+      toast.success(response.data.message || 'RSVP successful!');
       fetchData();
     } catch (error) {
       toast.error(error.response?.data?.detail || 'RSVP failed');
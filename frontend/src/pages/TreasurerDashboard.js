@@ -11,6 +11,8 @@ import { toast } from 'sonner';
 import { DollarSign, TrendingUp, TrendingDown, Plus, LogOut } from 'lucide-react';
 import { LineChart, Line, BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 
+const RECENT_TRANSACTIONS = 10;
+
 const TreasurerDashboard = () => {
   const { user, logout, API } = useContext(AuthContext);
   const [finances, setFinances] = useState(null);
@@ -32,7 +34,10 @@ const TreasurerDashboard = () => {
 
   const fetchFinances = async () => {
     try {
-      const response = await axios.get(`${API}/finances?club_id=${user.club_id || 'default-club'}`);
+      // Only the latest transactions are shown; the totals come from the club ledger
+      const response = await axios.get(`${API}/finances`, {
+        params: { club_id: user.club_id || 'default-club', limit: RECENT_TRANSACTIONS }
+      });
       setFinances(response.data);
     } catch (error) {
       toast.error('Failed to load financial data');
@@ -65,7 +70,7 @@ const TreasurerDashboard = () => {
     );
   }
 
-  const chartData = finances?.transactions.slice(0, 10).reverse().map(t => ({
+  const chartData = finances?.transactions.slice(0, RECENT_TRANSACTIONS).reverse().map(t => ({
     name: new Date(t.created_at).toLocaleDateString(),
     amount: t.amount,
     type: t.type
@@ -210,7 +215,7 @@ const TreasurerDashboard = () => {
         <section>
           <h3 className="text-2xl font-bold mb-4">Recent Transactions</h3>
           <Card className="divide-y">
-            {finances?.transactions.slice(0, 10).map((transaction) => (
+            {finances?.transactions.slice(0, RECENT_TRANSACTIONS).map((transaction) => (
               <div key={transaction.id} className="p-4 flex items-center justify-between hover:bg-gray-50">
                 <div>
                   <p className="font-medium">{transaction.description}</p>
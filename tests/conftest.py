@@ -0,0 +1,91 @@
+"""Shared fixtures: the app served in-process over an in-memory mongomock-motor database."""
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+# For the local stand-ins benchmarks share with tests, e.g. fake_llm_server
+sys.path.insert(1, str(ROOT / "benchmarks"))
+
+import server  # noqa: E402
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+def _patch_find_one_and_update():
+    # mongomock returns None from find_one_and_update(projection=...) when the document no
+    # longer matches the filter after the update; MongoDB returns it. claim_seat() relies on
+    # that for the seat that fills an event.
+    import mongomock.collection
+
+    original = mongomock.collection.Collection.find_one_and_update
+    if getattr(original, "patched", False):
+        return
+
+    def find_one_and_update(self, filter, update, projection=None, **kwargs):
+        doc = original(self, filter, update, **kwargs)
+        if doc is None or not projection:
+            return doc
+        keep = {key.split(".")[0] for key, value in projection.items() if value and key != "_id"}
+        return {key: doc[key] for key in keep if key in doc} if keep else doc
+
+    find_one_and_update.patched = True
+    mongomock.collection.Collection.find_one_and_update = find_one_and_update
+
+
+_patch_find_one_and_update()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def database():
+    return mongomock_motor.AsyncMongoMockClient(tz_aware=True)["test"]
+
+
+@pytest.fixture
+def settings():
+    """Overridden by test modules that need other settings."""
+    return server.Settings()
+
+
+@pytest.fixture
+async def app(database, settings):
+    app = server.create_app(settings, database=database)
+    await server.ensure_indexes(database)
+    yield app
+    server.password_hasher.shutdown()
+
+
+@pytest.fixture
+async def client(app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def add_user(database, role="student", **fields):
+    """Insert a user directly (no bcrypt) and return (user, Authorization headers)."""
+    user = server.User(email=f"{server.uuid.uuid4().hex[:12]}@example.com", name="Test User", role=role, **fields)
+    await database.users.insert_one(server.to_document(user))
+    return user, {"Authorization": f"Bearer {server.create_access_token({'sub': user.id})}"}
+
+
+async def add_event(database, **fields):
+    """Insert a club and one of its events, counted in club_stats; returns the event."""
+    club = server.Club(name="Test Club", description="A club", category="Tech")
+    await database.clubs.insert_one(server.to_document(club))
+    fields = {
+        "title": "Test Event", "description": "An event", "location": "Hall", "tags": ["Tech"],
+        "date": server.datetime.now(server.timezone.utc) + server.timedelta(days=1), **fields,
+    }
+    event = server.Event(club_id=club.id, **fields)
+    event_doc = server.to_document(event)
+    await database.events.insert_one(event_doc)
+    await server.update_club_stats(event_doc, events=1)
+    return event
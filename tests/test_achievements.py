@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from tests.conftest import add_event, add_user
+
+pytestmark = pytest.mark.anyio
+
+MONDAY = datetime(2025, 9, 1, 12, tzinfo=timezone.utc)
+
+
+def event(index, club_id="club-1", tags=("Tech",)):
+    return {"id": f"event-{index}", "club_id": club_id, "tags": list(tags)}
+
+
+async def award(user_id, checkins):
+    """Record (event, checked_in_at) pairs in order; returns the rule ids awarded by each."""
+    awarded = []
+    for checked_in, at in checkins:
+        awarded.append([a["rule_id"] for a in await server.record_attendance(user_id, checked_in, at)])
+    return awarded
+
+
+def test_streak_through_counts_the_run_containing_the_week():
+    weeks = {"10": 1, "11": 2, "12": 1, "14": 1}
+
+    assert [server.streak_through(weeks, week) for week in (9, 10, 12, 13, 14)] == [0, 3, 3, 0, 1]
+    assert server.longest_streak(weeks) == 3
+
+
+def test_rules_fire_only_when_a_metric_crosses_their_threshold():
+    def rule_ids(metrics):
+        return [a["rule_id"] for a in server.rule_achievements("u1", metrics)]
+
+    assert rule_ids([("attendance", None, None, 9, 10)]) == ["attendance-10"]
+    assert rule_ids([("attendance", None, None, 10, 11)]) == []
+    # A backfill jumps straight from 0, so it awards every threshold passed
+    assert rule_ids([("attendance", None, None, 0, 50)]) == ["attendance-1", "attendance-10", "attendance-50"]
+    assert rule_ids([("tag", "Tech", "Tech", 4, 5)]) == ["tag-enthusiast:Tech"]
+    assert server.rule_achievements("u1", [("tag", "Tech", "Tech", 4, 5)])[0]["title"] == "Tech Enthusiast"
+
+
+async def test_attendance_thresholds_award_once(database, app):
+    awarded = await award("u1", [(event(i, club_id=f"club-{i}", tags=()), MONDAY) for i in range(11)])
+
+    assert awarded[0] == ["attendance-1"]
+    assert awarded[9] == ["attendance-10"]
+    assert sum(awarded, []) == ["attendance-1", "attendance-10"]
+
+
+async def test_club_and_tag_rules_award_once_per_scope(database, app):
+    checkins = [(event(i, club_id="club-1", tags=("Tech",)), MONDAY) for i in range(6)]
+    checkins += [(event(10 + i, club_id="club-2", tags=("Tech", "Music")), MONDAY) for i in range(5)]
+
+    awarded = sum(await award("u1", checkins), [])
+
+    assert sorted(a for a in awarded if not a.startswith("attendance")) == [
+        "club-regular:club-1", "club-regular:club-2", "tag-enthusiast:Music", "tag-enthusiast:Tech",
+    ]
+
+
+async def test_streak_awards_when_a_late_checkin_joins_two_runs(database, app):
+    weeks = [0, 1, 3, 2]  # week 2 arrives last, recorded offline, and links 0-1 with 3
+
+    awarded = await award("u1", [(event(i, tags=()), MONDAY + timedelta(weeks=w)) for i, w in enumerate(weeks)])
+
+    assert [a for a in sum(awarded, []) if a.startswith("streak")] == ["streak-4"]
+    assert "streak-4" in awarded[3]
+
+
+async def test_concurrent_checkins_award_each_badge_once(database, client):
+    student, headers = await add_user(database)
+    events = [await add_event(database) for _ in range(5)]
+
+    responses = await asyncio.gather(*(
+        client.post(f"/api/events/{e.id}/checkin", headers=headers) for e in events
+    ))
+
+    assert all(response.status_code == 200 for response in responses)
+    rule_ids = sorted([a["rule_id"] async for a in database.achievements.find({"user_id": student.id})])
+    assert rule_ids == ["attendance-1", "tag-enthusiast:Tech"]
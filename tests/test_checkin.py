@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+from tests.conftest import add_event, add_user
+
+pytestmark = pytest.mark.anyio
+
+SCANNED_AT = datetime(2030, 1, 1, 18, 30, tzinfo=timezone.utc)
+
+
+async def test_batch_checkin_reports_each_scan(database, client):
+    _, coordinator_headers = await add_user(database, role="coordinator")
+    (early, early_headers), (first, _), (second, _) = [await add_user(database) for _ in range(3)]
+    event = await add_event(database)
+    await client.post(f"/api/events/{event.id}/checkin", headers=early_headers)
+
+    response = await client.post(f"/api/events/{event.id}/checkin/batch", headers=coordinator_headers, json={
+        "scans": [
+            {"user_id": early.id},
+            {"user_id": first.id, "scanned_at": SCANNED_AT.isoformat()},
+            {"user_id": first.id},
+            {"user_id": "no-such-user"},
+            {"user_id": second.id},
+        ],
+    })
+
+    assert response.status_code == 200
+    assert response.json()["checked_in"] == 2
+    assert [result["status"] for result in response.json()["results"]] == [
+        "already_checked_in", "checked_in", "duplicate_scan", "unknown_user", "checked_in",
+    ]
+    assert (await database.events.find_one({"id": event.id}))["attendance_count"] == 3
+    offline = await database.attendance.find_one({"user_id": first.id})
+    assert offline["checked_in_at"] == SCANNED_AT
+    assert await server.reconcile_club_stats(database, fix=False) == []
+    assert [a["title"] async for a in database.achievements.find({"user_id": second.id})] == ["First Event"]
+
+
+async def test_students_cannot_submit_door_scans(database, client):
+    student, headers = await add_user(database)
+    event = await add_event(database)
+
+    response = await client.post(
+        f"/api/events/{event.id}/checkin/batch", headers=headers, json={"scans": [{"user_id": student.id}]},
+    )
+
+    assert response.status_code == 403
+    assert await database.attendance.count_documents({}) == 0
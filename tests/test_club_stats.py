@@ -0,0 +1,33 @@
+import pytest
+
+import server
+from tests.conftest import add_event, add_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_create_event_drops_blank_tags(database, client):
+    coordinator, headers = await add_user(database, role="coordinator")
+
+    response = await client.post("/api/events", headers=headers, json={
+        "club_id": "club-1", "title": "Workshop", "description": "d", "location": "Lab",
+        "date": "2030-01-01T10:00:00Z", "tags": ["Tech", "", " "],
+    })
+
+    assert response.status_code == 200
+    assert response.json()["tags"] == ["Tech"]
+    stats = (await client.get("/api/analytics/club/club-1", headers=headers)).json()
+    assert [t["tag"] for t in stats["tags"]] == ["Tech"]
+    assert await server.reconcile_club_stats(database, fix=False) == []
+
+
+async def test_checkin_skips_blank_tags_on_stored_events(database, client):
+    student, headers = await add_user(database)
+    event = await add_event(database, tags=["Tech", ""])
+
+    response = await client.post(f"/api/events/{event.id}/checkin", headers=headers)
+
+    assert response.status_code == 200
+    stats = await database.user_stats.find_one({"user_id": student.id})
+    assert stats["tags"] == {"Tech": 1}
+    assert await server.reconcile_club_stats(database, fix=False) == []
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from tests.conftest import add_event, add_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_legacy_event(database, club_id):
+    """An event written before the switch to BSON dates, with ISO-string datetimes."""
+    event = server.Event(
+        club_id=club_id, title="Legacy", description="d", location="Hall",
+        date=datetime.now(timezone.utc) + timedelta(days=2),
+    )
+    doc = event.model_dump()
+    doc["date"], doc["created_at"] = doc["date"].isoformat(), doc["created_at"].isoformat()
+    await database.events.insert_one(doc)
+    return event
+
+
+async def test_startup_check_refuses_string_datetimes(database, app):
+    event = await add_event(database)
+    await add_legacy_event(database, event.club_id)
+
+    with pytest.raises(RuntimeError, match=r"events\.date, events\.created_at.*python server.py migrate"):
+        await server.check_native_datetimes(database)
+    assert await database.migrations.find_one({"id": server.NATIVE_DATETIMES_MIGRATION}) is None
+
+
+async def test_migrate_converts_and_records_the_migration(database, app):
+    event = await add_event(database)
+    legacy = await add_legacy_event(database, event.club_id)
+
+    await server.run_migrations(database)
+
+    assert await server.string_datetime_fields(database) == []
+    doc = await database.events.find_one({"id": legacy.id})
+    assert isinstance(doc["date"], datetime)
+    assert await database.migrations.find_one({"id": server.NATIVE_DATETIMES_MIGRATION})
+    # Recorded, so later startups don't rescan
+    await server.check_native_datetimes(database)
+
+
+async def test_pages_reach_every_event_after_migration(database, client):
+    _, headers = await add_user(database)
+    event = await add_event(database)
+    await add_legacy_event(database, event.club_id)
+    await server.run_migrations(database)
+
+    first = await client.get("/api/events", params={"limit": 1}, headers=headers)
+    second = await client.get(
+        "/api/events", params={"limit": 1, "cursor": first.headers["X-Next-Cursor"]}, headers=headers,
+    )
+
+    assert {e["id"] for e in first.json() + second.json()} == {
+        doc["id"] async for doc in database.events.find({}, {"id": 1})
+    }
@@ -0,0 +1,118 @@
+import gzip
+
+import pytest
+
+import server
+from tests.conftest import add_user
+
+pytestmark = pytest.mark.anyio
+
+HEADER = "type,amount,category,description"
+VALID_ROWS = [f"income,{i + 1},Dues,Row {i}" for i in range(5)]
+
+
+@pytest.fixture
+async def club(database, app):
+    club = server.Club(name="Import Club", description="A club", category="Tech")
+    await database.clubs.insert_one(server.to_document(club))
+    return club
+
+
+@pytest.fixture
+async def treasurer(database, app):
+    return (await add_user(database, role="treasurer"))[1]
+
+
+async def post_import(client, club, headers, body, fmt="csv", **extra_headers):
+    response = await client.post(
+        "/api/finances/import", params={"club_id": club.id, "format": fmt},
+        content=body, headers={**headers, **extra_headers},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_stray_quote_inside_an_unquoted_field_is_literal(client, club, treasurer, database):
+    body = "\n".join([HEADER, 'expense,5,Gear,5" monitor', *VALID_ROWS])
+
+    result = await post_import(client, club, treasurer, body)
+
+    assert (result["rows"], result["inserted"], result["errors"]) == (6, 6, [])
+    assert await database.transactions.find_one({"description": '5" monitor'})
+
+
+async def test_unclosed_quote_only_rejects_its_own_record(client, club, treasurer):
+    body = "\n".join([HEADER, 'expense,5,Gear,"5 monitor', *VALID_ROWS])
+
+    result = await post_import(client, club, treasurer, body)
+
+    assert result["inserted"] == 5
+    assert [error["row"] for error in result["errors"]] == [2]
+    assert result["errors"][0]["error"].startswith("invalid CSV")
+    assert result["income"] == sum(range(1, 6))
+
+
+async def test_unclosed_quote_before_a_long_tail_is_capped(client, club, treasurer):
+    rows = [f"income,1,Dues,{'x' * 200} {i}" for i in range(400)]
+    body = "\n".join([HEADER, 'expense,5,Gear,"never closed', *rows])
+
+    result = await post_import(client, club, treasurer, body)
+
+    assert result["inserted"] == 400
+    assert [error["row"] for error in result["errors"]] == [2]
+    assert "limited" in result["errors"][0]["error"]
+
+
+async def test_quoted_fields_may_span_lines_and_errors_name_physical_lines(client, club, treasurer, database):
+    body = "\n".join([
+        HEADER,
+        'expense,12.5,Food,"Pizza,',
+        'for the ""launch"" night"',
+        "refund,3,Food,wrong type",
+        "income,two,Dues,bad amount",
+        *VALID_ROWS,
+    ])
+
+    result = await post_import(client, club, treasurer, body)
+
+    assert result["inserted"] == 6
+    assert [error["row"] for error in result["errors"]] == [4, 5]
+    assert await database.transactions.find_one({"description": 'Pizza,\nfor the "launch" night'})
+
+
+async def test_gzip_body_and_reimport_reports_duplicates(client, club, treasurer):
+    body = "\n".join(["id,type,amount,category,description", *(f"t{i},{row}" for i, row in enumerate(VALID_ROWS))])
+    compressed = gzip.compress(body.encode())
+
+    first = await post_import(client, club, treasurer, compressed, **{"Content-Encoding": "gzip"})
+    second = await post_import(client, club, treasurer, compressed, **{"Content-Encoding": "gzip"})
+
+    assert first["inserted"] == 5
+    assert second["inserted"] == 0
+    assert {error["error"] for error in second["errors"]} == {"duplicate id"}
+    assert second["balance"] == first["balance"] == sum(range(1, 6))
+
+
+async def test_ndjson_errors_name_their_line(client, club, treasurer):
+    body = "\n".join([
+        '{"type": "income", "amount": 4, "category": "Dues", "description": "ok"}',
+        "not json",
+        "",
+        "[1, 2]",
+    ])
+
+    result = await post_import(client, club, treasurer, body, fmt="ndjson")
+
+    assert result["inserted"] == 1
+    assert [(error["row"], error["error"]) for error in result["errors"]] == [
+        (2, "invalid JSON"), (4, "expected a JSON object"),
+    ]
+
+
+async def test_missing_columns_reject_the_import(client, club, treasurer):
+    response = await client.post(
+        "/api/finances/import", params={"club_id": club.id}, content="type,amount\nincome,1", headers=treasurer,
+    )
+
+    assert response.status_code == 400
+    assert "category" in response.json()["detail"]
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from tests.conftest import add_event, add_user
+
+pytestmark = pytest.mark.anyio
+
+EARLY = datetime(2025, 9, 1, tzinfo=timezone.utc)
+
+
+async def seed_race_duplicates(database):
+    """Rows the pre-index find-then-insert checks let through under concurrent requests."""
+    first = server.User(email="twice@example.com", name="First", role="student", created_at=EARLY)
+    second = server.User(email="twice@example.com", name="Second", role="student",
+                         created_at=EARLY + timedelta(seconds=1))
+    club = server.Club(name="Club", description="d", category="Tech", coordinator_ids=[second.id])
+    event = server.Event(club_id=club.id, title="E", description="d", location="Hall",
+                         date=EARLY + timedelta(days=7), rsvp_count=3, attendance_count=3)
+    await database.users.insert_many([server.to_document(first), server.to_document(second)])
+    await database.clubs.insert_one(server.to_document(club))
+    await database.events.insert_one(server.to_document(event))
+    await database.rsvps.insert_many([
+        server.to_document(server.RSVP(event_id=event.id, user_id=user.id, status="confirmed", created_at=EARLY + timedelta(minutes=i)))
+        for i, user in enumerate([first, first, second])
+    ])
+    await database.attendance.insert_many([
+        server.to_document(server.Attendance(event_id=event.id, user_id=user.id,
+                                             checked_in_at=EARLY + timedelta(days=7, minutes=i)))
+        for i, user in enumerate([first, second, second])
+    ])
+    return first, second, club, event
+
+
+async def test_startup_names_the_collection_holding_duplicates(database):
+    await seed_race_duplicates(database)
+
+    with pytest.raises(RuntimeError, match=r"users: it holds rows with the same \(id\) or \(email\).*migrate"):
+        await server.ensure_indexes(database)
+
+
+async def test_migrate_keeps_the_earliest_rows_and_fixes_counters(database):
+    first, second, club, event = await seed_race_duplicates(database)
+
+    await server.run_migrations(database)
+
+    assert [user["id"] async for user in database.users.find({}, {"id": 1})] == [first.id]
+    rsvps = await database.rsvps.find({}, {"_id": 0}).to_list(None)
+    attendance = await database.attendance.find({}, {"_id": 0}).to_list(None)
+    assert [(row["user_id"], row["created_at"]) for row in rsvps] == [(first.id, EARLY)]
+    assert [(row["user_id"], row["checked_in_at"]) for row in attendance] == [
+        (first.id, EARLY + timedelta(days=7)),
+    ]
+    stored = await database.events.find_one({"id": event.id})
+    assert (stored["rsvp_count"], stored["attendance_count"]) == (1, 1)
+    assert (await database.clubs.find_one({"id": club.id}))["coordinator_ids"] == [first.id]
+    assert await server.reconcile_club_stats(database, fix=False) == []
+    # The unique indexes now build, and running migrate again changes nothing
+    assert await server.remove_duplicates(database) == {"users": 0, "rsvps": 0, "attendance": 0}
+
+
+async def seed_pre_stats_history(database):
+    """A student with two check-ins and the legacy "First Event" badge, and no user_stats yet."""
+    student, headers = await add_user(database)
+    events = [await add_event(database) for _ in range(3)]
+    await database.attendance.insert_many([
+        server.to_document(server.Attendance(event_id=event.id, user_id=student.id, checked_in_at=EARLY))
+        for event in events[:2]
+    ])
+    await database.achievements.insert_one({
+        "id": "legacy-badge", "user_id": student.id, "title": "First Event",
+        "description": "Attended your first event!", "badge_type": "bronze", "earned_at": EARLY,
+    })
+    return student, headers, events[2]
+
+
+async def test_startup_refuses_until_user_stats_are_built(database, app):
+    await seed_pre_stats_history(database)
+
+    with pytest.raises(RuntimeError, match=r"user-stats \(`python server.py backfill-achievements`\).*migrate"):
+        await server.check_derived_collections(database)
+
+    await server.run_migrations(database)
+
+    assert await database.migrations.find_one({"id": server.USER_STATS_MIGRATION})
+    await server.check_derived_collections(database)
+
+
+async def test_new_database_records_derived_collections_on_startup(database, app):
+    await server.check_derived_collections(database)
+
+    assert await database.migrations.count_documents({"id": {"$in": list(server.DERIVED_MIGRATIONS)}}) == len(
+        server.DERIVED_MIGRATIONS
+    )
+
+
+async def test_checkin_after_migrate_keeps_legacy_badges_and_counts(database, client):
+    student, headers, event = await seed_pre_stats_history(database)
+    await server.run_migrations(database)
+
+    response = await client.post(f"/api/events/{event.id}/checkin", headers=headers)
+
+    assert response.status_code == 200
+    titles = [a["title"] async for a in database.achievements.find({"user_id": student.id})]
+    assert titles.count("First Event") == 1
+    analytics = await client.get(f"/api/analytics/student/{student.id}", headers=headers)
+    assert analytics.json()["attendance_count"] == 3
+
+
+async def test_migrate_builds_ledgers_from_existing_transactions(database, client):
+    _, headers = await add_user(database, role="treasurer")
+    await database.transactions.insert_one(server.to_document(server.Transaction(
+        club_id="club-1", type="income", amount=500, category="Grant", description="d", created_by="someone",
+    )))
+
+    with pytest.raises(RuntimeError, match=r"club-ledgers \(`python server.py rebuild-ledgers`\)"):
+        await server.check_derived_collections(database)
+    await server.run_migrations(database)
+    await server.check_derived_collections(database)
+
+    response = await client.get("/api/finances", params={"club_id": "club-1"}, headers=headers)
+    assert response.json()["balance"] == 500
+
+
+async def test_migrate_builds_club_stats_for_existing_events(database, client):
+    _, headers = await add_user(database, role="coordinator")
+    event = server.Event(club_id="club-1", title="E", description="d", location="Hall", date=EARLY,
+                         tags=["Tech"], attendance_count=1)
+    await database.events.insert_one(server.to_document(event))
+    await database.attendance.insert_one(server.to_document(server.Attendance(event_id=event.id, user_id="u1")))
+
+    with pytest.raises(RuntimeError, match=r"club-stats \(`python server.py reconcile-club-stats`\)"):
+        await server.check_derived_collections(database)
+    await server.run_migrations(database)
+    await server.check_derived_collections(database)
+
+    stats = (await client.get("/api/analytics/club/club-1", headers=headers)).json()
+    assert (stats["total_events"], stats["total_attendance"]) == (1, 1)
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from tests.conftest import add_event, add_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("sort_value", [
+    datetime(2026, 3, 1, 12, 30, 15, 123000, tzinfo=timezone.utc),
+    "Robotics Club",
+    42,
+    None,
+])
+def test_cursor_round_trips_its_sort_value_and_id(sort_value):
+    cursor = server.encode_cursor(sort_value, "doc-1")
+
+    assert "=" not in cursor
+    assert server.decode_cursor(cursor) == (sort_value, "doc-1")
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", server.encode_cursor("a", "b")[:-3] + "@@@", "W10"])
+def test_malformed_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as raised:
+        server.decode_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+def test_keyset_filter_breaks_ties_on_id():
+    when = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    cursor = server.encode_cursor(when, "b")
+
+    assert server.keyset_filter({"club_id": "c"}, "date", server.DESCENDING, cursor) == {"$and": [
+        {"club_id": "c"},
+        {"$or": [{"date": {"$lt": when}}, {"date": when, "id": {"$lt": "b"}}]},
+    ]}
+    assert server.keyset_filter({}, "date", server.ASCENDING, None) == {}
+
+
+async def test_pages_cover_every_row_once_when_sort_values_tie(database, client):
+    _, headers = await add_user(database)
+    first = await add_event(database)
+    date = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=3)
+    await database.events.update_one({"id": first.id}, {"$set": {"date": date}})
+    await database.events.insert_many([
+        server.to_document(server.Event(
+            club_id=first.club_id, title=f"Event {i}", description="d", location="Hall", date=date,
+        ))
+        for i in range(6)
+    ])
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/events", params=params, headers=headers)
+        assert response.status_code == 200
+        seen += [event["id"] for event in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert len(seen) == len(set(seen)) == 7
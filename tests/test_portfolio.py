@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from tests.conftest import add_event, add_user
+
+pytestmark = pytest.mark.anyio
+
+EARLY = datetime(2025, 9, 1, tzinfo=timezone.utc)
+
+
+async def add_history(database, user_id, count):
+    """`count` check-ins of `user_id`, one per event, a day apart; returns the events oldest first."""
+    events = [await add_event(database) for _ in range(count)]
+    await database.attendance.insert_many([
+        server.to_document(server.Attendance(event_id=event.id, user_id=user_id, checked_in_at=EARLY + timedelta(days=i)))
+        for i, event in enumerate(events)
+    ])
+    await server.backfill_achievements(database)
+    return events
+
+
+async def test_history_joins_each_event_and_its_club(database, client):
+    student, headers = await add_user(database)
+    [event] = await add_history(database, student.id, 1)
+    await database.attendance.insert_one(server.to_document(server.Attendance(
+        event_id="deleted-event", user_id=student.id, checked_in_at=EARLY - timedelta(days=1),
+    )))
+
+    body = (await client.get(f"/api/analytics/student/{student.id}/portfolio", headers=headers)).json()
+
+    joined, orphan = body["attendance_history"]
+    assert joined["event_id"] == event.id
+    assert joined["event"].pop("date").startswith(event.date.strftime("%Y-%m-%dT%H:%M:%S"))
+    assert joined["event"] == {"title": event.title, "club_id": event.club_id, "tags": event.tags, "club_name": "Test Club"}
+    assert orphan["event"] is None
+    assert body["summary"]["clubs"] == [{"club_id": event.club_id, "name": "Test Club", "count": 1}]
+
+
+async def test_history_pages_follow_the_cursor(database, client):
+    student, headers = await add_user(database)
+    events = await add_history(database, student.id, 5)
+    url = f"/api/analytics/student/{student.id}/portfolio"
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        body = (await client.get(url, params=params, headers=headers)).json()
+        seen += [row["event_id"] for row in body["attendance_history"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [event.id for event in reversed(events)]
+    assert body["attendance_count"] == 5
+
+
+async def test_checkin_invalidates_the_cached_portfolio(database, client):
+    student, headers = await add_user(database)
+    await add_history(database, student.id, 1)
+    url = f"/api/analytics/student/{student.id}/portfolio"
+    before = (await client.get(url, headers=headers)).json()
+    event = await add_event(database)
+
+    await client.post(f"/api/events/{event.id}/checkin", headers=headers)
+    after = (await client.get(url, headers=headers)).json()
+
+    assert (before["attendance_count"], after["attendance_count"]) == (1, 2)
+    assert after["attendance_history"][0]["event_id"] == event.id
@@ -0,0 +1,48 @@
+import pytest
+
+import server
+from tests.conftest import add_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_repeat_requests_reuse_the_cached_principal(database, client):
+    _, headers = await add_user(database)
+
+    for _ in range(3):
+        assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+
+    assert server.principal_cache.stats() == {"hits": 2, "misses": 1, "invalidations": 0}
+
+
+async def test_profile_and_interest_updates_reach_the_next_request(database, client):
+    _, headers = await add_user(database, interests=["Tech"])
+    await client.get("/api/auth/me", headers=headers)
+
+    await client.put("/api/users/profile", params={"name": "Renamed"}, headers=headers)
+    await client.put("/api/users/interests", json=["Music"], headers=headers)
+    me = (await client.get("/api/auth/me", headers=headers)).json()
+
+    assert (me["name"], me["interests"]) == ("Renamed", ["Music"])
+    assert server.principal_cache.invalidations == 2
+
+
+async def test_invalidation_reaches_every_worker_sharing_a_backend(database, client, monkeypatch):
+    user, headers = await add_user(database, role="coordinator")
+    shared = server.LocalCacheBackend(max_size=100, ttl=60)
+    monkeypatch.setattr(server, "principal_cache", server.PrincipalCache(shared))
+    other_worker = server.PrincipalCache(shared)
+    await client.get("/api/auth/me", headers=headers)
+
+    await database.users.update_one({"id": user.id}, {"$set": {"role": "student"}})
+    await other_worker.invalidate(user.id)
+
+    assert (await client.get("/api/auth/me", headers=headers)).json()["role"] == "student"
+
+
+async def test_local_backend_is_bounded():
+    backend = server.LocalCacheBackend(max_size=2, ttl=60)
+    for key in ("a", "b", "c"):
+        await backend.set(key, key)
+
+    assert [await backend.get(key) for key in ("a", "b", "c")] == [None, "b", "c"]
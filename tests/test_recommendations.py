@@ -0,0 +1,86 @@
+import asyncio
+import socket
+
+import httpx
+import pytest
+import uvicorn
+
+import server
+from fake_llm_server import create_fake_llm
+from tests.conftest import add_event, add_user
+
+pytestmark = pytest.mark.anyio
+
+CIRCUIT_FAILURES = 2
+
+
+@pytest.fixture
+async def fake_llm(request):
+    """fake_llm_server on a free local port, with create_fake_llm options from the test's param."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    llm = uvicorn.Server(uvicorn.Config(create_fake_llm(**getattr(request, "param", {})), log_level="warning"))
+    serving = asyncio.create_task(llm.serve(sockets=[sock]))
+    while not llm.started:
+        await asyncio.sleep(0.01)
+    yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+    llm.should_exit = True
+    await serving
+
+
+@pytest.fixture
+def settings(fake_llm):
+    return server.Settings(
+        gemini_api_key="fake", gemini_api_url=f"{fake_llm}/generate", llm_timeout_seconds=0.2,
+        llm_circuit_failures=CIRCUIT_FAILURES, llm_circuit_reset_seconds=60,
+    )
+
+
+@pytest.fixture(autouse=True)
+async def fresh_recommender(monkeypatch, app):
+    monkeypatch.setattr(server, "recommender", server.EventRecommender())
+    yield
+    await server.gemini_client.close()
+
+
+async def llm_calls(fake_llm):
+    async with httpx.AsyncClient() as stats_client:
+        return (await stats_client.get(f"{fake_llm}/stats")).json()["calls"]
+
+
+async def test_same_interests_share_one_llm_answer(database, client, fake_llm):
+    event = await add_event(database, title="Robotics Night")
+    users = [await add_user(database, interests=["Tech"]) for _ in range(3)]
+
+    bodies = [(await client.get("/api/recommendations", headers=headers)).json() for _, headers in users]
+
+    assert all([e["id"] for e in body["recommended_events"]] == [event.id] for body in bodies)
+    assert await llm_calls(fake_llm) == 1
+
+
+@pytest.mark.parametrize("fake_llm", [{"failure_rate": 1}], indirect=True)
+async def test_failing_llm_falls_back_and_opens_the_circuit(database, client, fake_llm):
+    event = await add_event(database, tags=["Robotics"])
+    _, headers = await add_user(database, interests=["Robotics"])
+
+    for _ in range(CIRCUIT_FAILURES + 2):
+        response = await client.get("/api/recommendations", headers=headers)
+        assert response.status_code == 200
+        assert [e["id"] for e in response.json()["recommended_events"]] == [event.id]
+
+    assert server.gemini_client.breaker.opened_at is not None
+    # Once open, the breaker stops calling the upstream
+    assert await llm_calls(fake_llm) == CIRCUIT_FAILURES
+
+
+@pytest.mark.parametrize("fake_llm", [{"latency": 1}], indirect=True)
+async def test_slow_llm_times_out_to_the_local_match(database, client):
+    event = await add_event(database, tags=["Robotics"])
+    _, headers = await add_user(database, interests=["Robotics"])
+
+    started = asyncio.get_running_loop().time()
+    response = await client.get("/api/recommendations", headers=headers)
+
+    assert asyncio.get_running_loop().time() - started < 1
+    assert [e["id"] for e in response.json()["recommended_events"]] == [event.id]
+    assert server.gemini_client.breaker.failures == 1
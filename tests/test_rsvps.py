@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+import server
+from tests.conftest import add_event, add_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def rsvp_statuses(database, event_id):
+    rsvps = await database.rsvps.find({"event_id": event_id}, {"_id": 0}).sort("created_at", 1).to_list(None)
+    return {rsvp["user_id"]: rsvp["status"] for rsvp in rsvps}
+
+
+async def rsvp_count(database, event_id):
+    return (await database.events.find_one({"id": event_id}))["rsvp_count"]
+
+
+async def test_concurrent_rsvps_never_exceed_capacity(database, client):
+    event = await add_event(database, max_attendees=3)
+    students = [await add_user(database) for _ in range(10)]
+
+    responses = await asyncio.gather(*(
+        client.post(f"/api/events/{event.id}/rsvp", headers=headers) for _, headers in students
+    ))
+
+    assert all(response.status_code == 200 for response in responses)
+    answered = [response.json()["status"] for response in responses]
+    assert answered.count("confirmed") == 3
+    assert answered.count("waitlisted") == 7
+    statuses = await rsvp_statuses(database, event.id)
+    assert list(statuses.values()).count("confirmed") == 3
+    assert await rsvp_count(database, event.id) == 3
+    assert await server.reconcile_club_stats(database, fix=False) == []
+
+
+async def test_cancellation_promotes_the_longest_waiting_rsvp(database, client):
+    event = await add_event(database, max_attendees=1)
+    (first, first_headers), (second, second_headers), (third, third_headers) = [
+        await add_user(database) for _ in range(3)
+    ]
+    for headers in (first_headers, second_headers, third_headers):
+        await client.post(f"/api/events/{event.id}/rsvp", headers=headers)
+
+    response = await client.delete(f"/api/events/{event.id}/rsvp", headers=first_headers)
+
+    assert response.status_code == 200
+    assert await rsvp_statuses(database, event.id) == {second.id: "confirmed", third.id: "waitlisted"}
+    assert await rsvp_count(database, event.id) == 1
+    assert await server.reconcile_club_stats(database, fix=False) == []
+
+
+async def test_leaving_the_waitlist_keeps_the_seat_count(database, client):
+    event = await add_event(database, max_attendees=1)
+    (first, first_headers), (_, second_headers) = [await add_user(database) for _ in range(2)]
+    for headers in (first_headers, second_headers):
+        await client.post(f"/api/events/{event.id}/rsvp", headers=headers)
+
+    response = await client.delete(f"/api/events/{event.id}/rsvp", headers=second_headers)
+
+    assert response.json() == {"message": "Removed from waitlist"}
+    assert await rsvp_statuses(database, event.id) == {first.id: "confirmed"}
+    assert await rsvp_count(database, event.id) == 1
+
+
+async def test_repeated_rsvp_leaves_counters_and_rollups_alone(database, client):
+    event = await add_event(database)
+    _, headers = await add_user(database)
+
+    responses = [await client.post(f"/api/events/{event.id}/rsvp", headers=headers) for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 400, 400]
+    assert await rsvp_count(database, event.id) == 1
+    stats = await database.club_stats.find_one({"club_id": event.club_id})
+    assert stats["total_rsvps"] == 1
+    assert await server.reconcile_club_stats(database, fix=False) == []
+
+
+async def test_concurrent_duplicate_rsvps_count_once(database, client):
+    event = await add_event(database, max_attendees=5)
+    _, headers = await add_user(database)
+
+    responses = await asyncio.gather(*(
+        client.post(f"/api/events/{event.id}/rsvp", headers=headers) for _ in range(5)
+    ))
+
+    assert sorted(response.status_code for response in responses) == [200, 400, 400, 400, 400]
+    assert await rsvp_count(database, event.id) == 1
+    assert await server.reconcile_club_stats(database, fix=False) == []
+
+
+async def test_repeated_rsvp_at_capacity_does_not_promote_the_waitlist(database, client):
+    event = await add_event(database, max_attendees=1)
+    (first, first_headers), (second, second_headers) = [await add_user(database) for _ in range(2)]
+    await client.post(f"/api/events/{event.id}/rsvp", headers=first_headers)
+    await client.post(f"/api/events/{event.id}/rsvp", headers=second_headers)
+
+    response = await client.post(f"/api/events/{event.id}/rsvp", headers=first_headers)
+
+    assert response.status_code == 400
+    assert await rsvp_statuses(database, event.id) == {first.id: "confirmed", second.id: "waitlisted"}
+    assert await rsvp_count(database, event.id) == 1
+    assert await server.reconcile_club_stats(database, fix=False) == []
+
+
+async def test_rsvp_to_unknown_event_is_404(client, database):
+    _, headers = await add_user(database)
+
+    response = await client.post("/api/events/missing/rsvp", headers=headers)
+
+    assert response.status_code == 404
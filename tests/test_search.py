@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from tests.conftest import add_event, add_user
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_events(database, club_id, count, tags):
+    start = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1)
+    events = [
+        server.Event(club_id=club_id, title=f"Event {i}", description="d", location="Hall",
+                     date=start + timedelta(hours=i // 2), tags=tags)
+        for i in range(count)
+    ]
+    await database.events.insert_many([server.to_document(event) for event in events])
+    return events
+
+
+async def test_date_ordered_pages_and_facets(database, client):
+    _, headers = await add_user(database)
+    first = await add_event(database, tags=["Music"])
+    await add_events(database, first.club_id, 7, ["Tech", "Workshop"])
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        body = (await client.get("/api/events/search", params=params, headers=headers)).json()
+        assert body["total"] == 8
+        seen += body["events"]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len({event["id"] for event in seen}) == 8
+    dates = [datetime.fromisoformat(event["date"].replace("Z", "+00:00")) for event in seen]
+    assert dates == sorted(dates)
+    assert body["facets"]["tags"] == [
+        {"value": "Tech", "count": 7}, {"value": "Workshop", "count": 7}, {"value": "Music", "count": 1},
+    ]
+    assert body["facets"]["clubs"] == [{"value": first.club_id, "count": 8, "label": "Test Club"}]
+
+
+async def test_facets_are_cached_until_an_event_is_created(database, client):
+    coordinator, headers = await add_user(database, role="coordinator")
+    first = await add_event(database, tags=["Tech"])
+    params = {"tags": "Tech"}
+
+    before = (await client.get("/api/events/search", params=params, headers=headers)).json()
+    # Written behind the app's back: the cached counts are served until an event is created
+    await add_events(database, first.club_id, 2, ["Tech"])
+    cached = (await client.get("/api/events/search", params=params, headers=headers)).json()
+    response = await client.post("/api/events", headers=headers, json={
+        "club_id": first.club_id, "title": "New", "description": "d", "location": "Hall",
+        "date": (datetime.now(timezone.utc) + timedelta(days=3)).isoformat(), "tags": ["Tech"],
+    })
+    assert response.status_code == 200
+    after = (await client.get("/api/events/search", params=params, headers=headers)).json()
+
+    assert (before["total"], cached["total"], after["total"]) == (1, 1, 4)
+    assert len(cached["events"]) == 3
+
+
+async def test_relevance_sort_requires_a_query(database, client):
+    _, headers = await add_user(database)
+
+    response = await client.get("/api/events/search", params={"sort": "relevance"}, headers=headers)
+
+    assert response.status_code == 400
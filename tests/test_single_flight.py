@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+class Call:
+    """A controllable async call that counts its starts and cancellations."""
+
+    def __init__(self, result="value"):
+        self.result = result
+        self.started = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_concurrent_callers_share_one_call():
+    flight, call = server.SingleFlight("test"), Call()
+
+    waiters = [asyncio.ensure_future(flight.do("key", call)) for _ in range(5)]
+    await settle()
+    call.release.set()
+
+    assert await asyncio.gather(*waiters) == ["value"] * 5
+    assert call.started == 1
+
+
+async def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight, call = server.SingleFlight("test"), Call()
+    leader = asyncio.ensure_future(flight.do("key", call))
+    follower = asyncio.ensure_future(flight.do("key", call))
+    await settle()
+
+    leader.cancel()
+    await settle()
+    call.release.set()
+
+    assert await follower == "value"
+    assert leader.cancelled()
+    assert call.started == 1 and call.cancelled == 0
+
+
+async def test_call_is_cancelled_when_its_last_waiter_leaves():
+    flight, call = server.SingleFlight("test"), Call()
+    waiters = [asyncio.ensure_future(flight.do("key", call)) for _ in range(3)]
+    await settle()
+
+    for waiter in waiters:
+        waiter.cancel()
+    await settle()
+
+    assert call.cancelled == 1
+    # A later caller starts a fresh call instead of joining the cancelled one
+    retry = asyncio.ensure_future(flight.do("key", call))
+    await settle()
+    call.release.set()
+    assert await retry == "value"
+    assert call.started == 2
+
+
+async def test_errors_reach_every_waiter_and_are_not_reused():
+    flight, call = server.SingleFlight("test", stale_seconds=60), Call(RuntimeError("upstream down"))
+    waiters = [asyncio.ensure_future(flight.do("key", call)) for _ in range(3)]
+    await settle()
+    call.release.set()
+
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    call.result = "recovered"
+    assert await flight.do("key", call) == "recovered"
+    assert call.started == 2
+
+
+async def test_results_are_reused_for_the_stale_window():
+    flight, call = server.SingleFlight("test", stale_seconds=60), Call()
+    call.release.set()
+
+    assert await flight.do("key", call) == "value"
+    assert await flight.do("key", call) == "value"
+    assert call.started == 1